@@ -0,0 +1,279 @@
+import asyncio
+import collections
+import dataclasses
+import enum
+import logging
+import math
+import time
+import typing
+
+from .types.receive import GatewayDispatchEventPayload
+
+__all__ = (
+    "OverflowPolicy",
+    "GatewayEventBufferMetrics",
+    "GatewayEventBuffer",
+    "get_coalesce_key",
+)
+
+DROP_WARNING_INTERVAL = 10.0
+"""The minimum seconds between two warnings about dropped events."""
+
+
+class OverflowPolicy(enum.StrEnum):
+    """What happens to an event when the event buffer is full."""
+
+    BLOCK = "block"
+    """
+    Wait until the buffer has space. The event is never dropped, but the
+    receive loop is stalled while it waits, so heartbeat acknowledgements are
+    not read either. This is the default policy.
+    """
+    DROP_OLDEST = "drop_oldest"
+    """
+    Make space by dropping the oldest droppable event. Use it for events that
+    can be lost, such as `TYPING_START` or `PRESENCE_UPDATE`.
+    """
+    COALESCE = "coalesce"
+    """
+    Replace a queued event with the same coalesce key, even if the buffer is not
+    full. Otherwise, behave like `DROP_OLDEST`.
+    """
+
+
+@dataclasses.dataclass
+class GatewayEventBufferMetrics:
+    """Metrics about the events passed through a buffer."""
+
+    dropped: int = 0
+    """How many events were dropped because the buffer was full."""
+    coalesced: int = 0
+    """How many events replaced a queued event with the same coalesce key."""
+    blocked: int = 0
+    """How many times adding an event had to wait for space."""
+    max_depth: int = 0
+    """The most events that were queued at the same time."""
+    dropped_by_event: typing.Dict[str, int] = dataclasses.field(default_factory=dict)
+    """How many events were dropped by event name."""
+
+
+def get_coalesce_key(
+    payload: GatewayDispatchEventPayload[typing.Any],
+) -> typing.Hashable:
+    """
+    Get the key an event is coalesced by, which identifies the entity the event
+    is about, such as the user of a `PRESENCE_UPDATE` in a guild.
+
+    :param payload: The payload of the event.
+    :return: The key.
+    """
+    data = payload["d"]
+
+    if not isinstance(data, dict):
+        return (payload["t"],)
+
+    user = data.get("user")
+
+    return (
+        payload["t"],
+        data.get("guild_id"),
+        data.get("channel_id"),
+        data.get("user_id") or (user.get("id") if isinstance(user, dict) else None),
+        data.get("id"),
+    )
+
+
+class GatewayEventBuffer:
+    """
+    This class is responsible for buffering dispatch events between receiving
+    them and handling them.
+
+    The buffer holds at most `maxsize` events. What happens to an event when the
+    buffer is full depends on the `OverflowPolicy` of its event name. Events with
+    the `DROP_OLDEST` or `COALESCE` policy are droppable: when the buffer is full,
+    the oldest droppable event is dropped to make space, whatever the policy of
+    the new event is. If no event can be dropped, a new droppable event is
+    dropped itself, and other events wait for space.
+
+    Events are never dropped unless their policy allows it, so events like
+    `MESSAGE_CREATE` or `GUILD_CREATE` are not lost by default. Events are put
+    in the buffer by the receive loop, so waiting for space stalls the
+    connection. Dropping should therefore be allowed for the high-volume events
+    that can be lost. Every dropped event is counted in `metrics`, and a warning
+    is logged at most every `DROP_WARNING_INTERVAL` seconds while events are
+    dropped.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        policies: typing.Mapping[str, OverflowPolicy] | None = None,
+        default_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        coalesce_key: typing.Callable[
+            [GatewayDispatchEventPayload[typing.Any]], typing.Hashable
+        ] = get_coalesce_key,
+        logger: logging.Logger = logging.getLogger(__name__),
+    ) -> None:
+        """
+        Initialize the buffer.
+
+        :param maxsize: The maximum number of queued events.
+        :param policies: The overflow policies by event name.
+        :param default_policy: The overflow policy of events without a policy.
+        :param coalesce_key: The function that gets the key events with the
+                             `COALESCE` policy are coalesced by.
+        :param logger: The logger to use. Defaults to the logger of this module.
+        """
+        self.maxsize = maxsize
+        self.policies: typing.Dict[str, OverflowPolicy] = dict(policies or {})
+        self.default_policy = default_policy
+        self.coalesce_key = coalesce_key
+        self.metrics = GatewayEventBufferMetrics()
+        self._logger = logger
+        self._last_drop_warning = -math.inf
+        self._entries: collections.OrderedDict[
+            int, GatewayDispatchEventPayload[typing.Any]
+        ] = collections.OrderedDict()
+        self._droppable: typing.Deque[int] = collections.deque()
+        self._coalesce_ids: typing.Dict[typing.Hashable, int] = {}
+        self._coalesce_keys: typing.Dict[int, typing.Hashable] = {}
+        self._next_id = 0
+        self._unfinished = 0
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    @property
+    def depth(self) -> int:
+        """The number of queued events."""
+        return len(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def put(self, payload: GatewayDispatchEventPayload[typing.Any]) -> None:
+        """
+        Add an event to the buffer, applying the overflow policy of the event.
+
+        :param payload: The payload of the event.
+        """
+        policy = self.policies.get(payload["t"], self.default_policy)
+        key: typing.Hashable = None
+
+        if policy is OverflowPolicy.COALESCE:
+            key = self.coalesce_key(payload)
+            entry_id = self._coalesce_ids.get(key)
+
+            if entry_id is not None:
+                self._entries[entry_id] = payload
+                self.metrics.coalesced += 1
+                return
+
+        while len(self._entries) >= self.maxsize:
+            if self._drop_oldest():
+                continue
+
+            if policy is not OverflowPolicy.BLOCK:
+                self._record_drop(payload)
+                return
+
+            self.metrics.blocked += 1
+            self._not_full.clear()
+            await self._not_full.wait()
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = payload
+
+        if policy is not OverflowPolicy.BLOCK:
+            self._droppable.append(entry_id)
+
+        if policy is OverflowPolicy.COALESCE:
+            self._coalesce_ids[key] = entry_id
+            self._coalesce_keys[entry_id] = key
+
+        self._unfinished += 1
+        self._finished.clear()
+        self._not_empty.set()
+        self.metrics.max_depth = max(self.metrics.max_depth, len(self._entries))
+
+    async def get(self) -> GatewayDispatchEventPayload[typing.Any]:
+        """
+        Wait for the oldest queued event and take it from the buffer.
+
+        `task_done` must be called once the event has been handled.
+
+        :return: The payload of the event.
+        """
+        while not self._entries:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        (entry_id, payload) = self._entries.popitem(last=False)
+        self._forget(entry_id)
+        self._not_full.set()
+
+        return payload
+
+    def task_done(self) -> None:
+        """Mark an event taken with `get` as handled."""
+        self._unfinished -= 1
+
+        if self._unfinished <= 0:
+            self._finished.set()
+
+    async def join(self) -> None:
+        """Wait until every queued event has been taken and handled."""
+        await self._finished.wait()
+
+    def _drop_oldest(self) -> bool:
+        """
+        Drop the oldest droppable event.
+
+        :return: Whether an event was dropped.
+        """
+        while self._droppable:
+            entry_id = self._droppable.popleft()
+            payload = self._entries.pop(entry_id, None)
+
+            if payload is not None:
+                self._forget(entry_id)
+                self._record_drop(payload)
+                self.task_done()
+                return True
+
+        return False
+
+    def _forget(self, entry_id: int) -> None:
+        """
+        Remove the indexes of an event that left the buffer.
+
+        :param entry_id: The ID of the event.
+        """
+        if self._droppable and self._droppable[0] == entry_id:
+            self._droppable.popleft()
+
+        if entry_id in self._coalesce_keys:
+            del self._coalesce_ids[self._coalesce_keys.pop(entry_id)]
+
+    def _record_drop(self, payload: GatewayDispatchEventPayload[typing.Any]) -> None:
+        """
+        Count a dropped event.
+
+        :param payload: The payload of the event.
+        """
+        self.metrics.dropped += 1
+        self.metrics.dropped_by_event[payload["t"]] = (
+            self.metrics.dropped_by_event.get(payload["t"], 0) + 1
+        )
+
+        now = time.monotonic()
+
+        if now - self._last_drop_warning >= DROP_WARNING_INTERVAL:
+            self._last_drop_warning = now
+            self._logger.warning(
+                "Event buffer is full, dropped a %s event, %d dropped in total",
+                payload["t"],
+                self.metrics.dropped,
+            )
@@ -1,27 +1,82 @@
 import asyncio
+import collections.abc
 import logging
 import platform
+import random
 import typing
 
 import aiohttp
 
-from concord.types.common import DiscordApiVersion
+from concord.session import ClientSessionProvider, SharedClientSessionProvider
+from concord.types.common import DiscordApiVersion, Snowflake
 
+from .buffer import GatewayEventBuffer
+from .coalescer import CoalesceMode, GatewayEventCoalescer
+from .codec import GatewayCodec, get_default_codec
+from .compression import (
+    GatewayCompression,
+    GatewayDecompressor,
+    get_decompressor_factory,
+)
 from .dispatcher import GatewayEventDispatcher
-from .errors import GatewayConnectionException
+from .encoding import GatewayEncoding
+from .errors import (
+    GatewayConnectionException,
+    GatewayFatalException,
+    GatewayReconnectException,
+)
 from .heartbeat import GatewayHeartbeatHandler
-from .intents import Intents
+from .intents import Intents, plan_intents
+from .members import MEMBER_CHUNK_TIMEOUT, GatewayMemberChunkRouter
+from .ratelimit import GatewayIdentifyLimiter
 from .receiver import GatewayMessageReceiver
-from .sender import GatewayMessageSender
-from .types.receive import GatewayReadyEventPayload, GatewayReceiveOpcode
+from .sender import GatewayMessageSender, MessagePriority
+from .types.common import GatewayActivity, GatewayPresenceStatus, GatewayPresenceUpdate
+from .types.receive import (
+    GatewayCloseEventCode,
+    GatewayDispatchEventPayload,
+    GatewayGuildMembersChunkEventPayloadData,
+    GatewayInvalidSessionEventPayload,
+    GatewayReadyEventPayload,
+    GatewayReceiveOpcode,
+    GatewayReconnectableCloseEventCode,
+    GatewayReconnectEventPayload,
+)
 from .types.send import (
     GatewayIdentifyMessage,
     GatewayIdentifyMessageConnectionProperties,
     GatewayIdentifyMessageData,
+    GatewayPresenceUpdateMessage,
+    GatewayRequestGuildMembersMessage,
+    GatewayRequestGuildMembersMessageData,
+    GatewayResumeMessage,
+    GatewayResumeMessageData,
+    GatewaySendOpcode,
 )
 
 __all__ = ("GatewayClient",)
 
+DEFAULT_GATEWAY_URL = "wss://gateway.discord.gg"
+RESUMABLE_CLOSE_CODE = 4000
+"""
+Close code used when closing a connection that should be resumed. Closing with
+1000 or 1001 invalidates the session.
+"""
+RECONNECT_BASE_DELAY = 0.5
+"""Upper bound in seconds of the delay before retrying a failed connection."""
+RECONNECT_MAX_DELAY = 60.0
+"""Upper bound in seconds of the delay between connection attempts."""
+REQUIRED_EVENTS = frozenset(("READY", "RESUMED", "GUILD_MEMBERS_CHUNK"))
+"""
+The dispatch events the client needs to track its session and answer member
+requests.
+"""
+FRAME_TIMEOUT_INTERVALS = 1.5
+"""
+Heartbeat intervals without a received frame after which the connection is
+considered dead, unless a frame timeout is given.
+"""
+
 
 class GatewayClient:
     """
@@ -31,63 +86,424 @@ class GatewayClient:
 
     def __init__(
         self,
-        intents: Intents,
+        intents: Intents | None,
         api_version: DiscordApiVersion = DiscordApiVersion.DEFAULT,
+        compression: GatewayCompression | None = None,
+        encoding: GatewayEncoding = GatewayEncoding.JSON,
+        codec: GatewayCodec | None = None,
+        shard: typing.Tuple[int, int] | None = None,
+        identify_limiter: GatewayIdentifyLimiter | None = None,
+        frame_timeout: float | None = None,
+        session_provider: ClientSessionProvider | None = None,
+        dispatch_concurrency: int | None = None,
+        event_buffer: GatewayEventBuffer | None = None,
+        coalesce: typing.Mapping[str, CoalesceMode] | None = None,
+        coalesce_window: float = 0.5,
+        events: typing.Iterable[str] | None = None,
+        required_intents: Intents | None = None,
+        check_intents: bool = True,
         logger: logging.Logger = logging.getLogger(__name__),
     ) -> None:
         """
         Initialize the gateway client.
 
-        :param intents: The intents to request.
+        :param intents: The intents to request. `None` requests the smallest
+                        intents causing the events handlers are registered for
+                        when the client is started.
         :param api_version: The API version to use.
+        :param compression: The transport compression to use. Defaults to no
+                            compression.
+        :param encoding: The payload encoding to use. Defaults to JSON.
+        :param codec: The codec to encode and decode payloads with. Overrides
+                      `encoding` when given. Defaults to the fastest installed
+                      codec for `encoding`.
+        :param shard: The shard ID and the total number of shards, if the
+                      connection is sharded.
+        :param identify_limiter: The limiter to wait on before identifying.
+                                 Defaults to no limit.
+        :param frame_timeout: The seconds without a received frame after which
+                              the connection is considered dead and resumed.
+                              Defaults to one and a half heartbeat intervals.
+        :param session_provider: The provider of the session to connect with.
+                                 A provider that is given is shared and is not
+                                 closed by the client. Defaults to a provider
+                                 owned by the client.
+        :param dispatch_concurrency: The maximum number of event handlers the
+                                     dispatcher runs at the same time. Defaults
+                                     to awaiting every handler in turn.
+        :param event_buffer: The buffer to queue events for the event handlers
+                             of the dispatcher in. Defaults to no buffer.
+        :param coalesce: The modes to coalesce events with by event name, see
+                         `GatewayEventCoalescer`. Defaults to not coalescing.
+        :param coalesce_window: The seconds coalesced events are held back for.
+        :param events: The names of the dispatch events handlers are registered
+                       for. Other dispatch events are dropped by the receiver
+                       without decoding their data, unless a handler,
+                       `next_event` or `wait_for` is registered for them on
+                       the dispatcher. Defaults to all events.
+        :param required_intents: The intents to request whatever events are
+                                 handled, such as `GUILD_MEMBERS` to request
+                                 all members of a guild. They are added to
+                                 planned intents and never reported as unused.
+        :param check_intents: Whether to warn on start about requested intents
+                              that cause no event handlers are registered for.
         :param logger: The logger to use. Defaults to the logger of this module.
+        :raises GatewayException: If the backend for the given compression is
+                                  not available.
         """
         self.intents = intents
+        self.check_intents = check_intents
         self.api_version = api_version
+        self.compression = compression
+        self.codec = codec if codec is not None else get_default_codec(encoding)
+        self.shard = shard
+        self._identify_limiter = identify_limiter
+        self.frame_timeout = frame_timeout
+        self.dispatch_concurrency = dispatch_concurrency
+        self.event_buffer = event_buffer
+        self.coalesce = coalesce
+        self.coalesce_window = coalesce_window
+        self.events = (
+            frozenset(events) | REQUIRED_EVENTS if events is not None else None
+        )
+        self.required_intents = required_intents
+        self.event_dispatchers: typing.List[GatewayEventDispatcher] = []
+        """
+        Other dispatchers the dispatch events of the client are passed on to.
+        Like the client's own dispatcher, anything registered on them lets
+        events outside `events` through.
+        """
+        self._decompressor_factory: typing.Callable[[], GatewayDecompressor] | None = (
+            get_decompressor_factory(compression) if compression else None
+        )
         self._logger = logger
         self._loop: asyncio.AbstractEventLoop | None = None
         self._dispatcher: GatewayEventDispatcher | None = None
+        self._coalescer: GatewayEventCoalescer | None = None
         self._receiver: GatewayMessageReceiver | None = None
         self._sender: GatewayMessageSender | None = None
         self._heartbeat_handler: GatewayHeartbeatHandler | None = None
-        self._session: aiohttp.ClientSession | None = None
+        self._member_chunks = GatewayMemberChunkRouter(logger)
+        self._session_ready = False
+        self.presence: GatewayPresenceUpdate | None = None
+        self._identified_presence: GatewayPresenceUpdate | None = None
+        self._session_provider = session_provider or SharedClientSessionProvider()
+        self._owns_session_provider = session_provider is None
         self._ws: aiohttp.ClientWebSocketResponse | None = None
         self._token: str | None = None
-        self._loop_task: typing.Awaitable[typing.Any] | None = None
+        self._session_id: str | None = None
+        self._resume_gateway_url: str | None = None
+        self._invalid_session_task: asyncio.Task[None] | None = None
+        self._closed = False
+
+    @property
+    def dispatcher(self) -> GatewayEventDispatcher:
+        """
+        The dispatcher events are passed to.
+
+        The dispatcher is kept across reconnects, so handlers only need to be
+        registered once. It must first be accessed from a running event loop.
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+
+        self._setup_dispatcher()
+        assert self._dispatcher is not None
+        return self._dispatcher
+
+    @property
+    def latency(self) -> float | None:
+        """
+        The heartbeat latency of the connection in seconds, or `None` if no
+        heartbeat was acknowledged yet.
+        """
+        if self._heartbeat_handler is None:
+            return None
+
+        return self._heartbeat_handler.latency
 
     async def start(self, token: str) -> None:
         """
         Start the gateway client.
 
+        When the connection is lost, the client reconnects with jittered
+        exponential backoff and resumes the session if possible, until `stop` is
+        called.
+
         :param token: The token to use for authentication.
+        :raises GatewayFatalException: If the gateway closes the connection with
+                                       a close code that can't be recovered from.
         """
         self._logger.info("Starting gateway client")
         self._token = token
         self._loop = asyncio.get_running_loop()
-
-        await self._establish_connection()
+        self._closed = False
 
         self._setup_dispatcher()
+
+        if self.intents is None or self.check_intents:
+            self.intents = plan_intents(
+                self.intents,
+                self.events if self.events is not None else self.dispatcher.events,
+                self.required_intents,
+                self._logger,
+            )
+
+        await self._connect_with_backoff(resume=False)
+
+        while not self._closed:
+            await self._wait_for_disconnect()
+
+            if self._closed:
+                break
+
+            close_code = self._ws.close_code if self._ws else None
+            self._logger.info("Gateway connection lost, close code: %s", close_code)
+
+            try:
+                resume = self._should_resume(close_code)
+            except GatewayFatalException:
+                await self.stop()
+                raise
+
+            await self._close_connection(RESUMABLE_CLOSE_CODE)
+            await self._connect_with_backoff(resume=resume and self._can_resume())
+
+    async def request_guild_members(
+        self,
+        guild_id: Snowflake,
+        query: str | None = None,
+        limit: int = 0,
+        presences: bool = False,
+        user_ids: Snowflake | collections.abc.Sequence[Snowflake] | None = None,
+        chunk_timeout: float | None = MEMBER_CHUNK_TIMEOUT,
+        priority: MessagePriority = MessagePriority.MEDIUM,
+    ) -> typing.AsyncIterator[GatewayGuildMembersChunkEventPayloadData]:
+        """
+        Request the members of a guild and yield the chunks they are sent in as
+        they arrive.
+
+        The request is sent with a unique nonce the chunks are routed by, and the
+        iterator ends after the last chunk. Chunks are not buffered beyond what
+        the consumer has not taken yet, so large guilds can be processed while
+        they are streamed.
+
+        Requesting all members requires the `GUILD_MEMBERS` intent, and
+        requesting presences requires the `GUILD_PRESENCES` intent. When intents
+        are planned, pass them as `required_intents`, since receiving the chunks
+        doesn't depend on any intent.
+
+        :param guild_id: The ID of the guild to request the members of.
+        :param query: The prefix usernames must start with. Defaults to all
+                      members if no `user_ids` are given.
+        :param limit: The maximum number of members to send. `0` sends all
+                      members matching an empty query.
+        :param presences: Whether to send the presences of the members.
+        :param user_ids: The IDs of the members to send.
+        :param chunk_timeout: The seconds to wait for each chunk. `None` waits
+                              forever.
+        :param priority: The priority to send the request with.
+        :raises GatewayConnectionException: If the session is not ready, or the
+                                            connection is lost before the last
+                                            chunk was received.
+        :raises asyncio.TimeoutError: If a chunk is not received in time.
+        :return: An iterator over the chunks.
+        """
+        if not self._session_ready or self._sender is None:
+            raise GatewayConnectionException("Gateway session is not ready")
+
+        (nonce, chunks) = self._member_chunks.open()
+        data = GatewayRequestGuildMembersMessageData(
+            guild_id=guild_id, limit=limit, presences=presences, nonce=nonce
+        )
+
+        if user_ids is not None:
+            data["user_ids"] = user_ids
+
+        if query is not None or user_ids is None:
+            data["query"] = query or ""
+
+        try:
+            await self._sender.send(
+                GatewayRequestGuildMembersMessage(data=data), priority
+            )
+
+            while True:
+                chunk = await asyncio.wait_for(chunks.get(), chunk_timeout)
+
+                if isinstance(chunk, Exception):
+                    raise chunk
+
+                yield chunk
+
+                if chunk["chunk_index"] >= chunk["chunk_count"] - 1:
+                    return
+        finally:
+            self._member_chunks.close(nonce)
+
+    async def update_presence(
+        self,
+        status: GatewayPresenceStatus = GatewayPresenceStatus.ONLINE,
+        activities: collections.abc.Iterable[GatewayActivity] = (),
+        afk: bool = False,
+        since: int | None = None,
+    ) -> None:
+        """
+        Update the presence of the bot.
+
+        Presence updates are last-write-wins: an update that is still waiting
+        for the send rate limit is replaced by a newer one, so only the latest
+        presence is sent. The presence is also sent when identifying. An update
+        made while the session is not ready is sent once it is, and the presence
+        is sent again after every resume, since an update queued when the
+        connection was lost may never have been sent.
+
+        :param status: The status of the bot.
+        :param activities: The activities of the bot.
+        :param afk: Whether the bot is AFK.
+        :param since: The Unix time in milliseconds the bot went idle at, if it
+                      is idle.
+        """
+        self.presence = GatewayPresenceUpdate(
+            since=since, activities=list(activities), status=status, afk=afk
+        )
+
+        if self._session_ready:
+            await self._send_presence()
+
+    async def reconnect(self) -> None:
+        """
+        Close the current connection, so that the client reconnects and resumes
+        the session.
+        """
+        if self._ws is not None:
+            await self._ws.close(code=RESUMABLE_CLOSE_CODE)
+
+    async def stop(self) -> None:
+        """Stop the gateway client."""
+        self._logger.info("Closing gateway client")
+        self._closed = True
+
+        if self._invalid_session_task:
+            self._invalid_session_task.cancel()
+
+        await self._close_connection()
+
+        if self._owns_session_provider:
+            try:
+                await self._session_provider.close()
+            except asyncio.CancelledError:
+                self._logger.debug("Session closed")
+
+        self._logger.info("Gateway client closed")
+
+    async def _connect_with_backoff(self, resume: bool) -> None:
+        """
+        Connect to the gateway, retrying failed attempts with jittered
+        exponential backoff.
+
+        :param resume: Whether to resume the previous session instead of
+                       identifying.
+        """
+        attempt = 0
+
+        while not self._closed:
+            try:
+                await self._connect(resume)
+                return
+            except GatewayConnectionException as e:
+                delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2**attempt)
+                delay *= random.random()
+                attempt += 1
+
+                self._logger.warning(
+                    "Failed to connect to the gateway (%s), retrying in %.2fs", e, delay
+                )
+                await self._close_connection(RESUMABLE_CLOSE_CODE)
+                await asyncio.sleep(delay)
+
+    def _should_resume(self, close_code: int | None) -> bool:
+        """
+        Decide how to recover from a closed connection.
+
+        :param close_code: The close code of the connection, if it was closed.
+        :raises GatewayFatalException: If the close code can't be recovered from.
+        :return: Whether the session can be resumed.
+        """
+        if close_code is None:
+            return True
+
+        if (
+            close_code in GatewayCloseEventCode
+            and close_code not in GatewayReconnectableCloseEventCode
+        ):
+            raise GatewayFatalException(
+                f"Gateway closed the connection: {GatewayCloseEventCode(close_code).name}"
+            )
+
+        if close_code in (
+            GatewayCloseEventCode.INVALID_SEQ,
+            GatewayCloseEventCode.SESSION_TIMEOUT,
+        ):
+            self._invalidate_session()
+            return False
+
+        return True
+
+    async def _connect(self, resume: bool) -> None:
+        """
+        Open a connection to the gateway and authenticate on it.
+
+        :param resume: Whether to resume the previous session instead of
+                       identifying.
+        """
+        assert self._dispatcher is not None, "Dispatcher is not set"
+
+        if resume:
+            assert self._resume_gateway_url is not None, "Resume URL is not set"
+            await self._establish_connection(self._resume_gateway_url)
+        else:
+            await self._establish_connection(DEFAULT_GATEWAY_URL)
+
+        hello = asyncio.ensure_future(self._dispatcher.next(GatewayReceiveOpcode.HELLO))
         self._setup_sender()
         self._setup_receiver()
 
+        assert (
+            self._receiver is not None and self._receiver._receive_loop_task is not None
+        )
+
         self._logger.debug("Waiting for hello message")
-        assert self._dispatcher is not None
-        hello_payload = await self._dispatcher.next(GatewayReceiveOpcode.HELLO)
-        self._logger.debug("Received hello message")
+        await asyncio.wait(
+            (hello, self._receiver._receive_loop_task),
+            return_when=asyncio.FIRST_COMPLETED,
+        )
 
-        await self._setup_heartbeat(hello_payload["d"]["heartbeat_interval"])
+        if not hello.done():
+            hello.cancel()
+            raise GatewayConnectionException("Connection closed before hello message")
 
-        await self._identify()
-        ready_payload: GatewayReadyEventPayload = await self._dispatcher.next(
-            GatewayReceiveOpcode.DISPATCH
-        )
-        self._logger.debug("Identified with the gateway")
-        self._logger.info(
-            f"Connected to Discord as {ready_payload['d']['user']['username']}"
+        hello_payload = hello.result()
+        self._logger.debug("Received hello message")
+
+        interval_ms = hello_payload["d"]["heartbeat_interval"]
+        self._receiver.frame_timeout = self.frame_timeout or (
+            interval_ms / 1000 * FRAME_TIMEOUT_INTERVALS
         )
+        await self._setup_heartbeat(interval_ms)
+
+        if resume:
+            await self._resume()
+        else:
+            await self._identify()
+
+    async def _wait_for_disconnect(self) -> None:
+        """
+        Wait until the receive loop or the heartbeat loop of the connection ends.
 
-        assert self._sender is not None and self._sender._send_loop_task is not None
+        A loop ending with a `GatewayReconnectException` means the connection is
+        a zombie, which is logged and then handled like any other disconnect.
+        """
         assert (
             self._receiver is not None and self._receiver._receive_loop_task is not None
         )
@@ -96,17 +512,32 @@ class GatewayClient:
             and self._heartbeat_handler._heartbeat_loop_task is not None
         )
 
-        self._loop_task = asyncio.gather(
-            self._sender._send_loop_task,
-            self._receiver._receive_loop_task,
-            self._heartbeat_handler._heartbeat_loop_task,
+        (done, _) = await asyncio.wait(
+            (
+                self._receiver._receive_loop_task,
+                self._heartbeat_handler._heartbeat_loop_task,
+            ),
+            return_when=asyncio.FIRST_COMPLETED,
         )
 
-        await self._loop_task
+        for task in done:
+            exception = None if task.cancelled() else task.exception()
 
-    async def stop(self) -> None:
-        """Stop the gateway client."""
-        self._logger.info("Closing gateway client")
+            if isinstance(exception, GatewayReconnectException):
+                self._logger.warning("Gateway connection is a zombie: %s", exception)
+            elif exception is not None:
+                raise exception
+
+    async def _close_connection(self, code: int = aiohttp.WSCloseCode.OK) -> None:
+        """
+        Stop the components of the current connection and close the websocket.
+
+        :param code: The close code to send.
+        """
+        self._session_ready = False
+        self._member_chunks.fail_all(
+            GatewayConnectionException("Gateway connection lost")
+        )
 
         if self._receiver:
             try:
@@ -126,37 +557,49 @@ class GatewayClient:
             except asyncio.CancelledError:
                 pass
 
+        if self._coalescer:
+            await self._coalescer.flush()
+
         if self._ws:
             try:
-                await self._ws.close()
+                await self._ws.close(code=code)
             except asyncio.CancelledError:
                 self._logger.debug("WebSocket closed")
 
-        if self._session:
-            try:
-                await self._session.close()
-            except asyncio.CancelledError:
-                self._logger.debug("Session closed")
-
-        self._logger.info("Gateway client closed")
+    async def _establish_connection(self, base_url: str) -> None:
+        """
+        Establish a connection to the gateway.
 
-    async def _establish_connection(self) -> None:
-        """Establish a connection to the gateway."""
+        :param base_url: The URL of the gateway to connect to.
+        """
         self._logger.debug("Establishing connection to the gateway")
-        self._session = aiohttp.ClientSession()
+
+        session = await self._session_provider.get_session()
 
         try:
-            self._ws = await self._session.ws_connect(self._get_ws_url())
+            self._ws = await session.ws_connect(self._get_ws_url(base_url))
             self._logger.debug("Connected to the gateway")
-        except aiohttp.WSServerHandshakeError as e:
+        except (aiohttp.ClientError, OSError, asyncio.TimeoutError) as e:
             raise GatewayConnectionException("Failed to connect to the gateway") from e
 
     def _setup_dispatcher(self) -> None:
-        """Setup the dispatcher."""
+        """Setup the dispatcher, unless it has already been set up."""
         assert self._loop is not None, "Event loop is not set"
 
+        if self._dispatcher is not None:
+            return
+
         self._logger.debug("Setting up dispatcher")
-        self._dispatcher = GatewayEventDispatcher(self._loop)
+        self._dispatcher = GatewayEventDispatcher(
+            self._loop, self.dispatch_concurrency, buffer=self.event_buffer
+        )
+
+        if self.coalesce:
+            self._coalescer = GatewayEventCoalescer(
+                self._loop, self._dispatcher, self.coalesce, self.coalesce_window
+            )
+
+        self._register_handlers()
         self._logger.debug("Dispatcher setup complete")
 
     def _setup_sender(self) -> None:
@@ -164,7 +607,7 @@ class GatewayClient:
         assert self._loop is not None, "Event loop is not set"
         assert self._ws is not None, "WebSocket is not established"
 
-        self._sender = GatewayMessageSender(self._loop)
+        self._sender = GatewayMessageSender(self._loop, self.codec)
         self._sender.start(self._ws)
 
     def _setup_receiver(self) -> None:
@@ -173,8 +616,42 @@ class GatewayClient:
         assert self._ws is not None, "WebSocket is not established"
         assert self._dispatcher is not None, "Dispatcher is not set"
 
-        self._receiver = GatewayMessageReceiver(self._loop)
-        self._receiver.start(self._ws, self._dispatcher)
+        decompressor = None
+
+        if self._decompressor_factory is not None:
+            decompressor = self._decompressor_factory()
+
+        if self._heartbeat_handler is None:
+            self._heartbeat_handler = GatewayHeartbeatHandler(self._loop)
+
+        self._receiver = GatewayMessageReceiver(
+            self._loop,
+            self.codec,
+            event_filter=self._wants_event if self.events is not None else None,
+            on_sequence=self._heartbeat_handler.record_sequence_number,
+        )
+        self._receiver.start(
+            self._ws, self._coalescer or self._dispatcher, decompressor
+        )
+
+    def _wants_event(self, event: str) -> bool:
+        """
+        Check whether a dispatch event is in `events` or has anything
+        registered for it on the dispatchers, so the receiver passes it on.
+
+        :param event: The name of the event.
+        :return: Whether to pass the event on.
+        """
+        assert self.events is not None, "Events are not set"
+        assert self._dispatcher is not None, "Dispatcher is not set"
+
+        return (
+            event in self.events
+            or self._dispatcher.has_listeners(event)
+            or any(
+                dispatcher.has_listeners(event) for dispatcher in self.event_dispatchers
+            )
+        )
 
     async def _setup_heartbeat(self, interval_ms: int) -> None:
         """
@@ -187,29 +664,171 @@ class GatewayClient:
         assert self._dispatcher is not None, "Dispatcher is not set"
         assert self._sender is not None, "Sender is not set"
 
-        self._heartbeat_handler = GatewayHeartbeatHandler(self._loop)
+        assert self._heartbeat_handler is not None, "Heartbeat handler is not set"
+
         self._heartbeat_handler.start(interval_ms, self._dispatcher, self._sender)
 
+    def _register_handlers(self) -> None:
+        """Register the handlers that keep track of the session."""
+        assert self._dispatcher is not None, "Dispatcher is not set"
+
+        self._dispatcher.register_event_handler("READY", self._on_ready, inline=True)
+        self._dispatcher.register_event_handler(
+            "RESUMED", self._on_resumed, inline=True
+        )
+        self._dispatcher.register_event_handler(
+            "GUILD_MEMBERS_CHUNK", self._member_chunks.route, inline=True
+        )
+        self._dispatcher.register_handler(
+            GatewayReceiveOpcode.INVALID_SESSION, self._on_invalid_session
+        )
+        self._dispatcher.register_handler(
+            GatewayReceiveOpcode.RECONNECT, self._on_reconnect
+        )
+
+    async def _on_ready(self, payload: GatewayReadyEventPayload) -> None:
+        """
+        Handle a ready event by keeping track of the session and sending the
+        presence, if it was updated after identifying.
+        """
+        data = payload["d"]
+        self._session_id = data["session_id"]
+        self._resume_gateway_url = data["resume_gateway_url"]
+        self._session_ready = True
+        self._logger.info("Connected to Discord as %s", data["user"]["username"])
+
+        if self.presence is not None and self.presence is not self._identified_presence:
+            await self._send_presence()
+
+    async def _on_resumed(self, _: GatewayDispatchEventPayload[typing.Any]) -> None:
+        """
+        Handle a resumed event by logging it and sending the presence again, as
+        the last update may have been lost with the connection.
+        """
+        self._session_ready = True
+        self._logger.info("Resumed gateway session")
+
+        if self.presence is not None:
+            await self._send_presence()
+
+    async def _on_invalid_session(
+        self, payload: GatewayInvalidSessionEventPayload
+    ) -> None:
+        """
+        Handle an invalid session event by reconnecting. The session is only
+        kept if the gateway reports it as resumable.
+        """
+        self._logger.info("Gateway session invalidated, resumable: %s", payload["d"])
+
+        if not payload["d"]:
+            self._invalidate_session()
+
+        assert self._loop is not None, "Event loop is not set"
+        self._invalid_session_task = self._loop.create_task(
+            self._close_after_invalid_session()
+        )
+
+    async def _on_reconnect(self, _: GatewayReconnectEventPayload) -> None:
+        """Handle a reconnect event by closing the connection, so it is resumed."""
+        self._logger.info("Gateway requested a reconnect")
+        await self.reconnect()
+
+    def _invalidate_session(self) -> None:
+        """Forget the current session, so the client identifies again."""
+        self._session_id = None
+        self._resume_gateway_url = None
+
+        if self._heartbeat_handler is not None:
+            self._heartbeat_handler.reset_sequence_number()
+
+    async def _close_after_invalid_session(self) -> None:
+        """
+        Close the websocket after the random delay the gateway asks for, so the
+        client reconnects.
+        """
+        await asyncio.sleep(random.uniform(1, 5))
+
+        if self._ws is not None:
+            await self._ws.close(code=RESUMABLE_CLOSE_CODE)
+
+    def _can_resume(self) -> bool:
+        """Check whether there is a session that can be resumed."""
+        return (
+            self._session_id is not None
+            and self._resume_gateway_url is not None
+            and self._heartbeat_handler is not None
+            and self._heartbeat_handler.last_sequence_number is not None
+        )
+
+    async def _resume(self) -> None:
+        """Resume the previous session."""
+        assert self._token is not None, "Token is not set"
+        assert self._sender is not None, "Sender is not set"
+        assert self._session_id is not None, "Session ID is not set"
+        assert self._heartbeat_handler is not None
+        assert self._heartbeat_handler.last_sequence_number is not None
+
+        self._logger.debug("Resuming session with the gateway")
+        await self._sender.send(
+            GatewayResumeMessage(
+                data=GatewayResumeMessageData(
+                    token=self._token,
+                    session_id=self._session_id,
+                    seq=self._heartbeat_handler.last_sequence_number,
+                )
+            ),
+            MessagePriority.HIGH,
+        )
+
     async def _identify(self) -> None:
         """Identify with the gateway."""
         assert self._token is not None, "Token is not set"
         assert self._sender is not None, "Sender is not set"
+        assert self.intents is not None, "Intents are not set"
+
+        if self._identify_limiter is not None:
+            await self._identify_limiter.acquire(self.shard[0] if self.shard else 0)
 
         self._logger.debug("Identifying with the gateway")
+        data = GatewayIdentifyMessageData(
+            token=self._token,
+            intents=int(self.intents),
+            properties=GatewayIdentifyMessageConnectionProperties(
+                os=platform.system(),
+                browser="concord",
+                device="concord",
+            ),
+        )
+
+        if self.shard is not None:
+            data["shard"] = self.shard
+
+        if self.presence is not None:
+            data["presence"] = self.presence
+
+        self._identified_presence = self.presence
+
+        await self._sender.send(GatewayIdentifyMessage(data=data), MessagePriority.HIGH)
+
+    async def _send_presence(self) -> None:
+        """Queue the presence to be sent, replacing a presence still queued."""
+        assert self._sender is not None, "Sender is not set"
+        assert self.presence is not None, "Presence is not set"
+
         await self._sender.send(
-            GatewayIdentifyMessage(
-                data=GatewayIdentifyMessageData(
-                    token=self._token,
-                    intents=int(self.intents),
-                    properties=GatewayIdentifyMessageConnectionProperties(
-                        os=platform.system(),
-                        browser="concord",
-                        device="concord",
-                    ),
-                )
-            )
+            GatewayPresenceUpdateMessage(data=self.presence),
+            coalesce_key=GatewaySendOpcode.PRESENCE_UPDATE,
         )
 
-    def _get_ws_url(self) -> str:
-        """Get the WebSocket URL for the gateway."""
-        return f"wss://gateway.discord.gg/?v={self.api_version}&enc=json"
+    def _get_ws_url(self, base_url: str) -> str:
+        """
+        Get the WebSocket URL for the gateway.
+
+        :param base_url: The URL of the gateway, without query parameters.
+        """
+        url = f"{base_url.rstrip('/')}/?v={self.api_version}&enc={self.codec.encoding}"
+
+        if self.compression is not None:
+            url += f"&compress={self.compression}"
+
+        return url
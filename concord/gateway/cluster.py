@@ -0,0 +1,632 @@
+"""
+Running shards in multiple worker processes.
+
+Each worker process runs a `ShardManager` for a subset of the shards. The parent
+process schedules the identifies of all workers and routes messages between
+them over `multiprocessing` pipes. Pipes are read with `loop.add_reader` and
+written from one thread per pipe, so a full pipe never blocks the event loop.
+Clusters are only supported on Unix.
+"""
+
+import asyncio
+import concurrent.futures
+import enum
+import functools
+import itertools
+import logging
+import multiprocessing
+import multiprocessing.connection
+import multiprocessing.process
+import typing
+
+from concord.types.common import DiscordApiVersion
+
+from .compression import GatewayCompression
+from .encoding import GatewayEncoding
+from .errors import GatewayConnectionException, GatewayException
+from .intents import Intents
+from .ratelimit import IdentifyConcurrencyLimiter
+from .shard import ShardManager
+
+__all__ = (
+    "ClusterMessageType",
+    "ClusterWorker",
+    "ShardCluster",
+)
+
+
+class ClusterMessageType(enum.StrEnum):
+    """Types of the messages sent between the parent and the worker processes."""
+
+    IDENTIFY = "identify"
+    """Sent by a worker to ask for permission to identify a shard."""
+    IDENTIFY_ACK = "identify_ack"
+    """Sent by the parent when the shard may identify."""
+    SEND = "send"
+    """A message from one worker to another, or to all other workers."""
+    REQUEST = "request"
+    """A message from one worker to another that expects a response."""
+    RESPONSE = "response"
+    """The response to a request."""
+    STOP = "stop"
+    """Sent by the parent to stop a worker."""
+
+
+class ClusterWorker:
+    """
+    This class is the interface of a worker process to the rest of the cluster.
+
+    It is passed to the setup function of the cluster, which should register
+    event handlers on `manager.dispatcher` and can set `message_handler` and
+    `request_handler` to handle messages from other workers.
+    """
+
+    def __init__(
+        self,
+        cluster_id: int,
+        connection: multiprocessing.connection.Connection,
+        manager_factory: typing.Callable[["ClusterWorker"], ShardManager],
+        logger: logging.Logger = logging.getLogger(__name__),
+    ) -> None:
+        """
+        Initialize the worker.
+
+        :param cluster_id: The ID of the cluster this worker runs.
+        :param connection: The pipe connected to the parent process.
+        :param manager_factory: Creates the shard manager of the worker.
+        :param logger: The logger to use. Defaults to the logger of this module.
+        """
+        self.cluster_id = cluster_id
+        self.message_handler: (
+            typing.Callable[[int, typing.Any], typing.Awaitable[None]] | None
+        ) = None
+        """Called with the source cluster ID and the data of received messages."""
+        self.request_handler: (
+            typing.Callable[[int, typing.Any], typing.Awaitable[typing.Any]] | None
+        ) = None
+        """Called with the source cluster ID and the data of received requests."""
+        self._connection = connection
+        self._writer = concurrent.futures.ThreadPoolExecutor(
+            1, thread_name_prefix=f"concord-cluster-{cluster_id}-writer"
+        )
+        self._logger = logger
+        self._request_ids = itertools.count()
+        self._pending: typing.Dict[int, asyncio.Future[typing.Any]] = {}
+        self._tasks: typing.Set[asyncio.Task[None]] = set()
+        self._stopped = asyncio.Event()
+        self.manager = manager_factory(self)
+
+    async def send(self, cluster_id: int | None, data: typing.Any) -> None:
+        """
+        Send a message to another worker.
+
+        :param cluster_id: The ID of the target cluster, or `None` to send the
+                           message to all other workers.
+        :param data: The data to send. Must be picklable.
+        :raises GatewayConnectionException: If the connection to the parent
+                                            process is lost.
+        """
+        await self._write((ClusterMessageType.SEND, cluster_id, data))
+
+    async def request(
+        self, cluster_id: int, data: typing.Any, timeout: float | None = None
+    ) -> typing.Any:
+        """
+        Send a request to another worker and wait for its response.
+
+        :param cluster_id: The ID of the target cluster.
+        :param data: The data to send. Must be picklable.
+        :param timeout: The seconds to wait for the response. Defaults to no limit.
+        :raises GatewayException: If the target worker failed to handle the
+                                  request or exited before responding.
+        :raises GatewayConnectionException: If the connection to the parent
+                                            process is lost.
+        :raises TimeoutError: If no response arrived in time.
+        :return: The response of the target worker.
+        """
+        return await asyncio.wait_for(
+            self._call(ClusterMessageType.REQUEST, cluster_id, data), timeout
+        )
+
+    async def acquire_identify(self, shard_id: int) -> None:
+        """
+        Wait until the parent allows the shard to identify.
+
+        :param shard_id: The ID of the shard that wants to identify.
+        """
+        await self._call(ClusterMessageType.IDENTIFY, shard_id)
+
+    async def run(self, token: str) -> None:
+        """
+        Run the shards of the worker until the parent stops it.
+
+        :param token: The token to use for authentication.
+        """
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self._connection.fileno(), self._on_readable)
+
+        try:
+            await self.manager.start(token)
+            await self._stopped.wait()
+        finally:
+            loop.remove_reader(self._connection.fileno())
+            # Close the pipe once the messages still being written are sent.
+            self._writer.submit(self._connection.close)
+            self._writer.shutdown(wait=False)
+
+    async def _call(self, kind: ClusterMessageType, *fields: typing.Any) -> typing.Any:
+        """
+        Send a message to the parent and wait for the reply to it.
+
+        :param kind: The type of the message.
+        :param fields: The fields of the message.
+        :raises GatewayConnectionException: If the connection to the parent
+                                            process is lost.
+        :return: The result carried by the reply.
+        """
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        try:
+            await self._write((kind, request_id, *fields))
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    def _on_readable(self) -> None:
+        """Handle all messages from the parent that are ready to be read."""
+        try:
+            while self._connection.poll():
+                self._handle_message(self._connection.recv())
+        except EOFError:
+            self._logger.warning("Connection to the parent process lost, stopping")
+            asyncio.get_running_loop().remove_reader(self._connection.fileno())
+
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(
+                        GatewayConnectionException(
+                            "Connection to the parent process lost"
+                        )
+                    )
+
+            self._stop()
+
+    async def _write(self, message: typing.Tuple[typing.Any, ...]) -> None:
+        """
+        Send a message to the parent from the writer thread of the worker.
+
+        :param message: The message to send.
+        :raises GatewayConnectionException: If the connection to the parent
+                                            process is lost.
+        """
+        if self._connection.closed:
+            raise GatewayConnectionException("Connection to the parent process lost")
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._writer, self._connection.send, message
+            )
+        except OSError as e:
+            raise GatewayConnectionException(
+                "Connection to the parent process lost"
+            ) from e
+
+    def _stop(self) -> None:
+        """Stop the shards of the worker and let `run` return."""
+        if not self._stopped.is_set():
+            self._stopped.set()
+            self._spawn(self.manager.stop())
+
+    def _handle_message(self, message: typing.Tuple[typing.Any, ...]) -> None:
+        """
+        Handle a message from the parent.
+
+        :param message: The message to handle.
+        """
+        kind = message[0]
+
+        if kind == ClusterMessageType.IDENTIFY_ACK:
+            self._resolve(message[1], True, None)
+        elif kind == ClusterMessageType.RESPONSE:
+            _, request_id, ok, result = message
+            self._resolve(request_id, ok, result)
+        elif kind == ClusterMessageType.REQUEST:
+            _, request_id, source, data = message
+            self._spawn(self._handle_request(request_id, source, data))
+        elif kind == ClusterMessageType.SEND:
+            _, source, data = message
+
+            if self.message_handler is not None:
+                self._spawn(self.message_handler(source, data))
+        elif kind == ClusterMessageType.STOP:
+            self._stop()
+
+    async def _handle_request(
+        self, request_id: int, source: int, data: typing.Any
+    ) -> None:
+        """
+        Handle a request from another worker and send the response back.
+
+        :param request_id: The ID of the request.
+        :param source: The ID of the cluster that sent the request.
+        :param data: The data of the request.
+        """
+        if self.request_handler is None:
+            response = (False, "No request handler registered")
+        else:
+            try:
+                response = (True, await self.request_handler(source, data))
+            except Exception as e:
+                self._logger.exception("Request handler failed")
+                response = (False, repr(e))
+
+        try:
+            await self._write(
+                (ClusterMessageType.RESPONSE, request_id, source, *response)
+            )
+        except GatewayConnectionException:
+            self._logger.warning("Could not send the response to cluster %d", source)
+
+    def _resolve(self, request_id: int, ok: bool, result: typing.Any) -> None:
+        """
+        Resolve the future of a pending call.
+
+        :param request_id: The ID of the call.
+        :param ok: Whether the call succeeded.
+        :param result: The result of the call, or the error if it failed.
+        """
+        future = self._pending.get(request_id)
+
+        if future is None or future.done():
+            return
+
+        if ok:
+            future.set_result(result)
+        else:
+            future.set_exception(GatewayException(f"Request failed: {result}"))
+
+    def _spawn(self, awaitable: typing.Awaitable[None]) -> None:
+        """
+        Run an awaitable in the background, keeping a reference to its task.
+
+        :param awaitable: The awaitable to run.
+        """
+        task = asyncio.ensure_future(awaitable)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+class _ClusterIdentifyLimiter:
+    """Identify limiter that asks the parent process for permission."""
+
+    def __init__(self, worker: ClusterWorker) -> None:
+        """
+        Initialize the limiter.
+
+        :param worker: The worker to ask the parent through.
+        """
+        self._worker = worker
+
+    async def acquire(self, shard_id: int) -> None:
+        """
+        Wait until the parent allows the shard to identify.
+
+        :param shard_id: The ID of the shard that wants to identify.
+        """
+        await self._worker.acquire_identify(shard_id)
+
+
+def _run_worker(
+    cluster_id: int,
+    connection: multiprocessing.connection.Connection,
+    token: str,
+    shard_ids: typing.Tuple[int, ...],
+    options: typing.Dict[str, typing.Any],
+    setup: typing.Callable[[ClusterWorker], None],
+) -> None:
+    """
+    Entry point of a worker process.
+
+    :param cluster_id: The ID of the cluster the worker runs.
+    :param connection: The pipe connected to the parent process.
+    :param token: The token to use for authentication.
+    :param shard_ids: The IDs of the shards the worker runs.
+    :param options: Keyword arguments for the `ShardManager` of the worker.
+    :param setup: Called with the worker before its shards are started.
+    """
+
+    def create_manager(worker: ClusterWorker) -> ShardManager:
+        return ShardManager(
+            shard_ids=shard_ids,
+            identify_limiter=_ClusterIdentifyLimiter(worker),
+            logger=logging.getLogger(f"{__name__}.{cluster_id}"),
+            **options,
+        )
+
+    async def main() -> None:
+        worker = ClusterWorker(cluster_id, connection, create_manager)
+        setup(worker)
+        await worker.run(token)
+
+    asyncio.run(main())
+
+
+class ShardCluster:
+    """
+    This class is responsible for running shards in multiple worker processes.
+
+    The shards are spread round-robin over `cluster_count` worker processes,
+    each running its own `ShardManager`. The parent process schedules the
+    identifies of all workers according to `max_concurrency` and routes messages
+    between the workers.
+    """
+
+    def __init__(
+        self,
+        intents: Intents,
+        shard_count: int,
+        cluster_count: int,
+        setup: typing.Callable[[ClusterWorker], None],
+        max_concurrency: int = 1,
+        api_version: DiscordApiVersion = DiscordApiVersion.DEFAULT,
+        compression: GatewayCompression | None = None,
+        encoding: GatewayEncoding = GatewayEncoding.JSON,
+        logger: logging.Logger = logging.getLogger(__name__),
+    ) -> None:
+        """
+        Initialize the cluster.
+
+        :param intents: The intents to request.
+        :param shard_count: The total number of shards of the bot.
+        :param cluster_count: The number of worker processes to run.
+        :param setup: Called in every worker process with its `ClusterWorker`
+                      before the shards are started. Must be picklable, so it
+                      has to be a module-level function.
+        :param max_concurrency: The `max_concurrency` of the bot.
+        :param api_version: The API version to use.
+        :param compression: The transport compression to use. Defaults to no
+                            compression.
+        :param encoding: The payload encoding to use. Defaults to JSON.
+        :param logger: The logger to use. Defaults to the logger of this module.
+        """
+        self.shard_count = shard_count
+        self.cluster_count = cluster_count
+        self._setup = setup
+        self._options: typing.Dict[str, typing.Any] = {
+            "intents": intents,
+            "shard_count": shard_count,
+            "api_version": api_version,
+            "compression": compression,
+            "encoding": encoding,
+        }
+        self._logger = logger
+        self._identify_limiter = IdentifyConcurrencyLimiter(max_concurrency)
+        self._processes: typing.Dict[int, multiprocessing.process.BaseProcess] = {}
+        self._connections: typing.Dict[int, multiprocessing.connection.Connection] = {}
+        self._writers: typing.Dict[int, concurrent.futures.ThreadPoolExecutor] = {}
+        self._requests: typing.Dict[int, typing.Set[typing.Tuple[int, int]]] = {}
+        """
+        The requests routed to each cluster that were not answered yet, as the
+        source cluster ID and the request ID.
+        """
+        self._tasks: typing.Set[asyncio.Task[None]] = set()
+
+    def shard_ids_for(self, cluster_id: int) -> typing.Tuple[int, ...]:
+        """
+        Get the IDs of the shards run by a cluster.
+
+        :param cluster_id: The ID of the cluster.
+        :return: The IDs of the shards.
+        """
+        return tuple(range(cluster_id, self.shard_count, self.cluster_count))
+
+    async def start(self, token: str) -> None:
+        """
+        Start the worker processes and route their messages until they exit.
+
+        :param token: The token to use for authentication.
+        """
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+
+        self._logger.info("Starting %d clusters", self.cluster_count)
+
+        for cluster_id in range(self.cluster_count):
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(
+                target=_run_worker,
+                args=(
+                    cluster_id,
+                    child_connection,
+                    token,
+                    self.shard_ids_for(cluster_id),
+                    self._options,
+                    self._setup,
+                ),
+                name=f"concord-cluster-{cluster_id}",
+            )
+            process.start()
+            child_connection.close()
+
+            self._processes[cluster_id] = process
+            self._connections[cluster_id] = parent_connection
+            self._writers[cluster_id] = concurrent.futures.ThreadPoolExecutor(
+                1, thread_name_prefix=f"concord-cluster-{cluster_id}-writer"
+            )
+            loop.add_reader(parent_connection.fileno(), self._on_readable, cluster_id)
+
+        try:
+            await asyncio.gather(
+                *(self._wait_for_exit(process) for process in self._processes.values())
+            )
+        finally:
+            for cluster_id in list(self._connections):
+                self._disconnect(cluster_id)
+
+            self._logger.info("All clusters exited")
+
+    async def stop(self) -> None:
+        """Ask all worker processes to stop their shards and exit."""
+        self._logger.info("Stopping clusters")
+
+        for cluster_id in self._connections:
+            self._send(cluster_id, (ClusterMessageType.STOP,))
+
+    async def _wait_for_exit(
+        self, process: multiprocessing.process.BaseProcess
+    ) -> None:
+        """
+        Wait until a worker process exits, by watching its sentinel instead of
+        blocking a thread on `join`.
+
+        :param process: The worker process.
+        """
+        loop = asyncio.get_running_loop()
+        exited: asyncio.Future[None] = loop.create_future()
+
+        def on_exit() -> None:
+            if not exited.done():
+                exited.set_result(None)
+
+        loop.add_reader(process.sentinel, on_exit)
+
+        try:
+            await exited
+        finally:
+            loop.remove_reader(process.sentinel)
+
+        process.join()
+
+    def _on_readable(self, cluster_id: int) -> None:
+        """
+        Handle all messages from a worker that are ready to be read.
+
+        :param cluster_id: The ID of the worker's cluster.
+        """
+        connection = self._connections[cluster_id]
+
+        try:
+            while connection.poll():
+                self._handle_message(cluster_id, connection.recv())
+        except EOFError:
+            self._logger.info("Cluster %d disconnected", cluster_id)
+            self._disconnect(cluster_id)
+
+    def _disconnect(self, cluster_id: int) -> None:
+        """
+        Close the pipe of a worker and fail the requests it did not answer.
+
+        :param cluster_id: The ID of the worker's cluster.
+        """
+        connection = self._connections.pop(cluster_id)
+        writer = self._writers.pop(cluster_id)
+
+        asyncio.get_running_loop().remove_reader(connection.fileno())
+        # Close the pipe once the messages still being written are sent.
+        writer.submit(connection.close)
+        writer.shutdown(wait=False)
+
+        for source, request_id in self._requests.pop(cluster_id, ()):
+            self._send(
+                source,
+                (
+                    ClusterMessageType.RESPONSE,
+                    request_id,
+                    False,
+                    f"Cluster {cluster_id} disconnected",
+                ),
+            )
+
+    def _handle_message(
+        self, cluster_id: int, message: typing.Tuple[typing.Any, ...]
+    ) -> None:
+        """
+        Handle a message from a worker.
+
+        :param cluster_id: The ID of the worker's cluster.
+        :param message: The message to handle.
+        """
+        kind = message[0]
+
+        if kind == ClusterMessageType.IDENTIFY:
+            _, request_id, shard_id = message
+            task = asyncio.get_running_loop().create_task(
+                self._grant_identify(cluster_id, request_id, shard_id)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif kind == ClusterMessageType.SEND:
+            _, target, data = message
+
+            for other_id in self._connections:
+                if (target is None and other_id != cluster_id) or other_id == target:
+                    self._send(other_id, (ClusterMessageType.SEND, cluster_id, data))
+        elif kind == ClusterMessageType.REQUEST:
+            _, request_id, target, data = message
+
+            if self._send(
+                target, (ClusterMessageType.REQUEST, request_id, cluster_id, data)
+            ):
+                self._requests.setdefault(target, set()).add((cluster_id, request_id))
+            else:
+                self._send(
+                    cluster_id,
+                    (
+                        ClusterMessageType.RESPONSE,
+                        request_id,
+                        False,
+                        f"Unknown cluster {target}",
+                    ),
+                )
+        elif kind == ClusterMessageType.RESPONSE:
+            _, request_id, source, ok, result = message
+            self._requests.get(cluster_id, set()).discard((source, request_id))
+            self._send(source, (ClusterMessageType.RESPONSE, request_id, ok, result))
+
+    async def _grant_identify(
+        self, cluster_id: int, request_id: int, shard_id: int
+    ) -> None:
+        """
+        Wait until a shard may identify and tell its worker.
+
+        :param cluster_id: The ID of the worker's cluster.
+        :param request_id: The ID of the worker's identify request.
+        :param shard_id: The ID of the shard that wants to identify.
+        """
+        await self._identify_limiter.acquire(shard_id)
+        self._send(cluster_id, (ClusterMessageType.IDENTIFY_ACK, request_id))
+
+    def _send(self, cluster_id: int, message: typing.Tuple[typing.Any, ...]) -> bool:
+        """
+        Send a message to a worker from the writer thread of its pipe.
+
+        :param cluster_id: The ID of the worker's cluster.
+        :param message: The message to send.
+        :return: Whether the worker is connected.
+        """
+        connection = self._connections.get(cluster_id)
+
+        if connection is None:
+            return False
+
+        sent = asyncio.get_running_loop().run_in_executor(
+            self._writers[cluster_id], connection.send, message
+        )
+        sent.add_done_callback(functools.partial(self._check_sent, cluster_id))
+        return True
+
+    def _check_sent(self, cluster_id: int, sent: asyncio.Future[None]) -> None:
+        """
+        Log a message that could not be sent to a worker.
+
+        :param cluster_id: The ID of the worker's cluster.
+        :param sent: The future of sending the message.
+        """
+        if not sent.cancelled() and sent.exception() is not None:
+            self._logger.warning(
+                "Could not send a message to cluster %d: %r",
+                cluster_id,
+                sent.exception(),
+            )
@@ -0,0 +1,178 @@
+import asyncio
+import dataclasses
+import enum
+import logging
+import typing
+
+from .buffer import get_coalesce_key
+from .dispatcher import SupportsDispatch
+from .types.receive import (
+    GatewayDispatchEventPayload,
+    GatewayEventPayload,
+    GatewayReceiveOpcode,
+)
+
+__all__ = (
+    "CoalesceMode",
+    "GatewayEventCoalescerMetrics",
+    "GatewayEventCoalescer",
+)
+
+
+class CoalesceMode(enum.StrEnum):
+    """How the coalesced events of an event name are passed on."""
+
+    LATEST = "latest"
+    """Pass on the latest event of every coalesce key on its own."""
+    BATCH = "batch"
+    """
+    Pass on one event whose data is the list of the data of the latest event of
+    every coalesce key, in the order the keys were first seen.
+    """
+
+
+@dataclasses.dataclass
+class GatewayEventCoalescerMetrics:
+    """Metrics about the events passed through a coalescer."""
+
+    coalesced: int = 0
+    """How many events replaced a pending event with the same coalesce key."""
+    dispatched: int = 0
+    """How many coalesced events or batches were passed on."""
+
+
+class GatewayEventCoalescer:
+    """
+    This class is responsible for coalescing bursts of high-frequency events in
+    front of a dispatcher.
+
+    Dispatch events whose name has a `CoalesceMode` are held back for `window`
+    seconds from the first one that arrives. Events with the same coalesce key
+    received in that window replace each other, so only the latest state of
+    every entity is passed on, either on its own or as one batch per event name.
+    All other payloads are passed on immediately.
+
+    The coalescer has the same `dispatch` method as the dispatcher, so it can be
+    used wherever a dispatcher is expected.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        dispatcher: SupportsDispatch,
+        modes: typing.Mapping[str, CoalesceMode],
+        window: float = 0.5,
+        coalesce_key: typing.Callable[
+            [GatewayDispatchEventPayload[typing.Any]], typing.Hashable
+        ] = get_coalesce_key,
+        logger: logging.Logger = logging.getLogger(__name__),
+    ) -> None:
+        """
+        Initialize the coalescer.
+
+        :param loop: The event loop to use.
+        :param dispatcher: The dispatcher to pass events on to.
+        :param modes: The coalesce modes by event name. Events of other names
+                      are not coalesced.
+        :param window: The seconds events are held back for.
+        :param coalesce_key: The function that gets the key events are
+                             coalesced by.
+        :param logger: The logger to use. Defaults to the logger of this module.
+        """
+        self.dispatcher = dispatcher
+        self.modes: typing.Dict[str, CoalesceMode] = dict(modes)
+        self.window = window
+        self.coalesce_key = coalesce_key
+        self.metrics = GatewayEventCoalescerMetrics()
+        self._loop = loop
+        self._logger = logger
+        self._pending: typing.Dict[
+            str,
+            typing.Dict[
+                typing.Hashable, GatewayEventPayload[GatewayReceiveOpcode, typing.Any]
+            ],
+        ] = {}
+        self._flush_tasks: typing.Dict[str, asyncio.Task[None]] = {}
+
+    @property
+    def pending(self) -> int:
+        """The number of events held back."""
+        return sum(len(events) for events in self._pending.values())
+
+    async def dispatch(
+        self, payload: GatewayEventPayload[GatewayReceiveOpcode, typing.Any]
+    ) -> None:
+        """
+        Hold back an event to coalesce it, or pass it on to the dispatcher.
+
+        :param payload: The payload of the event.
+        """
+        event = payload["t"] if payload["op"] == GatewayReceiveOpcode.DISPATCH else None
+
+        if event is None or event not in self.modes:
+            await self.dispatcher.dispatch(payload)
+            return
+
+        pending = self._pending.setdefault(event, {})
+        key = self.coalesce_key(
+            typing.cast(GatewayDispatchEventPayload[typing.Any], payload)
+        )
+
+        if key in pending:
+            self.metrics.coalesced += 1
+
+        pending[key] = payload
+
+        if event not in self._flush_tasks:
+            self._flush_tasks[event] = self._loop.create_task(self._flush_later(event))
+
+    async def flush(self) -> None:
+        """Pass on every event held back, without waiting for their windows."""
+        for task in self._flush_tasks.values():
+            task.cancel()
+
+        self._flush_tasks.clear()
+
+        for event in list(self._pending):
+            await self._flush(event)
+
+    async def _flush_later(self, event: str) -> None:
+        """
+        Pass on the events of an event name once its window has passed.
+
+        :param event: The name of the events.
+        """
+        await asyncio.sleep(self.window)
+        del self._flush_tasks[event]
+
+        try:
+            await self._flush(event)
+        except Exception:
+            self._logger.exception("Error dispatching coalesced %s events", event)
+
+    async def _flush(self, event: str) -> None:
+        """
+        Pass on the events held back for an event name.
+
+        :param event: The name of the events.
+        """
+        pending = self._pending.pop(event, None)
+
+        if not pending:
+            return
+
+        if self.modes[event] is CoalesceMode.BATCH:
+            payloads = list(pending.values())
+            batch: GatewayEventPayload[GatewayReceiveOpcode, typing.Any] = {
+                "op": GatewayReceiveOpcode.DISPATCH,
+                "d": [payload["d"] for payload in payloads],
+                "s": max(payload["s"] or 0 for payload in payloads),
+                "t": event,
+            }
+            self.metrics.dispatched += 1
+            await self.dispatcher.dispatch(batch)
+            return
+
+        for payload in pending.values():
+            self.metrics.dispatched += 1
+            await self.dispatcher.dispatch(payload)
@@ -0,0 +1,222 @@
+import collections.abc
+import json
+import typing
+
+from . import etf
+from .encoding import GatewayEncoding
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import msgspec
+
+    HAS_MSGSPEC = True
+except ImportError:
+    HAS_MSGSPEC = False
+
+__all__ = (
+    "GatewayCodec",
+    "JsonCodec",
+    "OrjsonCodec",
+    "MsgspecCodec",
+    "EtfCodec",
+    "get_default_codec",
+)
+
+
+class GatewayCodec(typing.Protocol):
+    """Interface for encoding and decoding gateway payloads."""
+
+    encoding: GatewayEncoding
+    """The encoding to request from the gateway."""
+    binary: bool
+    """Whether encoded payloads must be sent as binary frames."""
+
+    def encode(self, payload: typing.Any) -> bytes:
+        """
+        Encode a payload to be sent to the gateway.
+
+        :param payload: The payload to encode.
+        :return: The encoded payload.
+        """
+        ...
+
+    def decode(self, data: str | bytes) -> typing.Any:
+        """
+        Decode a payload received from the gateway.
+
+        :param data: The data to decode.
+        :return: The decoded payload.
+        """
+        ...
+
+
+class JsonCodec:
+    """JSON codec backed by the standard library."""
+
+    encoding = GatewayEncoding.JSON
+    binary = False
+
+    def encode(self, payload: typing.Any) -> bytes:
+        """
+        Encode a payload with the `json` module.
+
+        :param payload: The payload to encode.
+        :return: The encoded payload.
+        """
+        return json.dumps(
+            payload, separators=(",", ":"), default=_encode_mapping
+        ).encode()
+
+    def decode(self, data: str | bytes) -> typing.Any:
+        """
+        Decode a payload with the `json` module.
+
+        :param data: The data to decode.
+        :return: The decoded payload.
+        """
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """JSON codec backed by `orjson`."""
+
+    encoding = GatewayEncoding.JSON
+    binary = False
+
+    def __init__(self) -> None:
+        """
+        Initialize the codec.
+
+        :raises ImportError: If `orjson` is not installed.
+        """
+        if not HAS_ORJSON:
+            raise ImportError("OrjsonCodec requires the orjson package")
+
+    def encode(self, payload: typing.Any) -> bytes:
+        """
+        Encode a payload with `orjson`.
+
+        :param payload: The payload to encode.
+        :return: The encoded payload.
+        """
+        encoded: bytes = orjson.dumps(payload, default=_encode_mapping)
+        return encoded
+
+    def decode(self, data: str | bytes) -> typing.Any:
+        """
+        Decode a payload with `orjson`.
+
+        :param data: The data to decode.
+        :return: The decoded payload.
+        """
+        return orjson.loads(data)
+
+
+class MsgspecCodec:
+    """JSON codec backed by `msgspec`."""
+
+    encoding = GatewayEncoding.JSON
+    binary = False
+
+    def __init__(self) -> None:
+        """
+        Initialize the codec.
+
+        :raises ImportError: If `msgspec` is not installed.
+        """
+        if not HAS_MSGSPEC:
+            raise ImportError("MsgspecCodec requires the msgspec package")
+
+        self._encoder = msgspec.json.Encoder(enc_hook=_encode_mapping)
+        self._decoder = msgspec.json.Decoder()
+
+    def encode(self, payload: typing.Any) -> bytes:
+        """
+        Encode a payload with `msgspec`.
+
+        :param payload: The payload to encode.
+        :return: The encoded payload.
+        """
+        encoded: bytes = self._encoder.encode(payload)
+        return encoded
+
+    def decode(self, data: str | bytes) -> typing.Any:
+        """
+        Decode a payload with `msgspec`.
+
+        :param data: The data to decode.
+        :return: The decoded payload.
+        """
+        return self._decoder.decode(data)
+
+
+class EtfCodec:
+    """Codec for the Erlang External Term Format."""
+
+    encoding = GatewayEncoding.ETF
+    binary = True
+
+    def encode(self, payload: typing.Any) -> bytes:
+        """
+        Encode a payload to the Erlang External Term Format.
+
+        :param payload: The payload to encode.
+        :return: The encoded payload.
+        """
+        return etf.dumps(payload)
+
+    def decode(self, data: str | bytes) -> typing.Any:
+        """
+        Decode a payload from the Erlang External Term Format.
+
+        :param data: The data to decode.
+        :return: The decoded payload.
+        :raises ValueError: If the data is not binary.
+        """
+        if isinstance(data, str):
+            raise ValueError("ETF payloads must be received as binary data")
+
+        return etf.loads(data)
+
+
+def get_default_codec(encoding: GatewayEncoding) -> GatewayCodec:
+    """
+    Get the fastest available codec for an encoding.
+
+    For JSON, `orjson` is preferred over `msgspec`, and the standard library is
+    used if neither of them is installed.
+
+    :param encoding: The encoding to get a codec for.
+    :return: The codec.
+    """
+    if encoding is GatewayEncoding.ETF:
+        return EtfCodec()
+
+    if HAS_ORJSON:
+        return OrjsonCodec()
+
+    if HAS_MSGSPEC:
+        return MsgspecCodec()
+
+    return JsonCodec()
+
+
+def _encode_mapping(obj: typing.Any) -> typing.Any:
+    """
+    Convert a mapping that is not a `dict`, like a `LazyPayload`, to a `dict` for
+    the JSON encoders, which only encode dictionaries natively.
+
+    :param obj: The object the encoder could not encode.
+    :raises TypeError: If the object is not a mapping.
+    :return: The mapping as a `dict`.
+    """
+    if isinstance(obj, collections.abc.Mapping):
+        return dict(obj)
+
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,143 @@
+import enum
+import typing
+import zlib
+
+from .errors import GatewayException
+
+try:
+    import zstandard
+
+    HAS_ZSTANDARD = True
+except ImportError:
+    HAS_ZSTANDARD = False
+
+__all__ = (
+    "GatewayCompression",
+    "GatewayDecompressor",
+    "ZlibStreamDecompressor",
+    "ZstdStreamDecompressor",
+    "get_decompressor_factory",
+)
+
+
+class GatewayCompression(enum.StrEnum):
+    """
+    Transport compression modes supported by the gateway.
+
+    See [here](https://discord.com/developers/docs/topics/gateway#transport-compression)
+    for Discord's documentation.
+    """
+
+    ZLIB_STREAM = "zlib-stream"
+    ZSTD_STREAM = "zstd-stream"
+
+
+class GatewayDecompressor(typing.Protocol):
+    """
+    Interface for decompressing binary frames received from the gateway.
+
+    Stream decompressors keep state for the whole connection, so a new instance
+    must be created for each connection.
+    """
+
+    def decompress(self, data: bytes) -> bytes | None:
+        """
+        Feed a binary frame to the decompressor.
+
+        :param data: The binary frame received from the gateway.
+        :return: The decompressed message, or `None` if the message is incomplete.
+        """
+        ...
+
+
+class ZlibStreamDecompressor:
+    """
+    This class is responsible for decompressing messages received over a
+    `zlib-stream` compressed connection.
+
+    A single inflate context is shared by every message of the connection, so a
+    new instance must be created for each connection.
+    """
+
+    ZLIB_SUFFIX = b"\x00\x00\xff\xff"
+
+    def __init__(self) -> None:
+        """Initialize the decompressor."""
+        self._inflator = zlib.decompressobj()
+        self._chunks: typing.List[bytes] = []
+        self._tail = b""
+
+    def decompress(self, data: bytes) -> bytes | None:
+        """
+        Feed a binary frame to the decompressor.
+
+        The frame is inflated as soon as it arrives, but the output is only
+        returned once the received data ends with the zlib flush suffix, which
+        completes the message. The suffix itself may be split across frames.
+
+        :param data: The binary frame received from the gateway.
+        :return: The decompressed message, or `None` if the message is incomplete.
+        """
+        self._chunks.append(self._inflator.decompress(data))
+
+        if len(data) >= len(self.ZLIB_SUFFIX):
+            self._tail = data[-len(self.ZLIB_SUFFIX) :]
+        else:
+            self._tail = (self._tail + data)[-len(self.ZLIB_SUFFIX) :]
+
+        if self._tail != self.ZLIB_SUFFIX:
+            return None
+
+        message = b"".join(self._chunks)
+        self._chunks.clear()
+
+        return message
+
+
+class ZstdStreamDecompressor:
+    """
+    This class is responsible for decompressing messages received over a
+    `zstd-stream` compressed connection.
+
+    The gateway flushes the stream after every message, so each binary frame
+    decompresses to exactly one message. Requires the `zstandard` package.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the decompressor."""
+        if not HAS_ZSTANDARD:
+            raise GatewayException(
+                "zstd-stream compression requires the zstandard package"
+            )
+
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes | None:
+        """
+        Feed a binary frame to the decompressor.
+
+        :param data: The binary frame received from the gateway.
+        :return: The decompressed message, or `None` if the message is incomplete.
+        """
+        return self._decompressor.decompress(data) or None
+
+
+def get_decompressor_factory(
+    compression: GatewayCompression,
+) -> typing.Callable[[], GatewayDecompressor]:
+    """
+    Get the decompressor backend for a compression mode.
+
+    :param compression: The compression mode to get the backend for.
+    :raises GatewayException: If the backend is not available.
+    :return: A factory creating a new decompressor for each connection.
+    """
+    if compression is GatewayCompression.ZSTD_STREAM:
+        if not HAS_ZSTANDARD:
+            raise GatewayException(
+                "zstd-stream compression requires the zstandard package"
+            )
+
+        return ZstdStreamDecompressor
+
+    return ZlibStreamDecompressor
@@ -0,0 +1,125 @@
+import asyncio
+import collections
+import logging
+import typing
+
+__all__ = ("KeyedTaskRunner",)
+
+
+class KeyedTaskRunner:
+    """
+    This class is responsible for running callbacks as tasks, in the order they
+    were submitted for the same key.
+
+    Callbacks submitted for different keys run in parallel, but at most `limit`
+    callbacks run at the same time. Exceptions raised by callbacks are logged.
+
+    Submitting never waits. Producers that need backpressure can wait with
+    `wait_for_capacity` until fewer than `2 * limit` callbacks are running or
+    waiting to run.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        limit: int,
+        logger: logging.Logger = logging.getLogger(__name__),
+    ) -> None:
+        """
+        Initialize the runner.
+
+        :param loop: The event loop to use.
+        :param limit: The maximum number of callbacks running at the same time.
+        :param logger: The logger to use. Defaults to the logger of this module.
+        """
+        self.limit = limit
+        self._loop = loop
+        self._logger = logger
+        self._semaphore = asyncio.Semaphore(limit)
+        self._lanes: typing.Dict[
+            typing.Hashable,
+            typing.Deque[typing.Callable[[], typing.Awaitable[None]]],
+        ] = {}
+        self._tasks: typing.Set[asyncio.Task[None]] = set()
+        self._unfinished = 0
+        self._has_capacity = asyncio.Event()
+        self._has_capacity.set()
+
+    @property
+    def pending(self) -> int:
+        """The number of callbacks waiting to run."""
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def submit(
+        self,
+        key: typing.Hashable,
+        callback: typing.Callable[[], typing.Awaitable[None]],
+    ) -> None:
+        """
+        Schedule a callback to run after the callbacks submitted for the same key.
+
+        :param key: The key to order the callback by.
+        :param callback: The callback to run.
+        """
+        self._unfinished += 1
+
+        if self._unfinished >= 2 * self.limit:
+            self._has_capacity.clear()
+
+        lane = self._lanes.get(key)
+
+        if lane is not None:
+            lane.append(callback)
+            return
+
+        self._lanes[key] = collections.deque((callback,))
+        task = self._loop.create_task(self._run_lane(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def wait_for_capacity(self) -> None:
+        """Wait until fewer than `2 * limit` callbacks are running or waiting to run."""
+        await self._has_capacity.wait()
+
+    async def join(self) -> None:
+        """Wait until all submitted callbacks have run."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def cancel(self) -> None:
+        """Cancel the running callbacks and drop the waiting ones."""
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run_lane(self, key: typing.Hashable) -> None:
+        """
+        Run the callbacks of a key one after the other until none are left.
+
+        :param key: The key to run the callbacks of.
+        """
+        lane = self._lanes[key]
+
+        try:
+            while lane:
+                callback = lane.popleft()
+
+                async with self._semaphore:
+                    try:
+                        await callback()
+                    except Exception:
+                        self._logger.exception("Error in callback for key %r", key)
+                    finally:
+                        self._finish()
+        finally:
+            self._unfinished -= len(lane)
+            self._has_capacity.set()
+            del self._lanes[key]
+
+    def _finish(self) -> None:
+        """Count a callback as finished."""
+        self._unfinished -= 1
+
+        if self._unfinished < 2 * self.limit:
+            self._has_capacity.set()
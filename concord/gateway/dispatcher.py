@@ -1,32 +1,135 @@
 import asyncio
+import functools
 import logging
 import typing
 
+from .buffer import GatewayEventBuffer
+from .concurrency import KeyedTaskRunner
 from .types.receive import (
     GatewayDispatchEventPayload,
     GatewayEventPayload,
     GatewayHeartbeatAcknowledgeEventPayload,
     GatewayHeartbeatEventPayload,
     GatewayHelloEventPayload,
+    GatewayInvalidSessionEventPayload,
+    GatewayReadyEventPayload,
     GatewayReceiveOpcode,
     GatewayReconnectEventPayload,
 )
+from .waiters import GatewayEventWaiters
+
+__all__ = (
+    "SupportsDispatch",
+    "GatewayEventDispatcher",
+    "get_ordering_key",
+)
+
+type _CallPlan = typing.Tuple[typing.Tuple[typing.Any, bool], ...]
+"""The handlers to call for a key, each with whether it is a coroutine function."""
+
+
+def _compile(handlers: typing.Iterable[typing.Any]) -> _CallPlan:
+    """
+    Compile handlers into a call plan.
+
+    :param handlers: The handlers to compile.
+    :return: The call plan.
+    """
+    return tuple(
+        (handler, asyncio.iscoroutinefunction(handler)) for handler in handlers
+    )
 
-__all__ = ("GatewayEventDispatcher",)
+
+async def _call_sync(handler: typing.Any, payload: typing.Any) -> None:
+    """
+    Call a handler that is not a coroutine function from a task.
+
+    :param handler: The handler to call.
+    :param payload: The payload to call the handler with.
+    """
+    handler(payload)
+
+
+class SupportsDispatch(typing.Protocol):
+    """Interface for anything received payloads can be passed on to."""
+
+    async def dispatch(
+        self, payload: GatewayEventPayload[GatewayReceiveOpcode, typing.Any]
+    ) -> None:
+        """
+        Dispatch a received payload.
+
+        :param payload: The payload to dispatch.
+        """
+        ...
+
+
+def get_ordering_key(
+    payload: GatewayDispatchEventPayload[typing.Any],
+) -> typing.Hashable:
+    """
+    Get the key the handlers of a dispatch event are ordered by, which is the
+    guild of the event, or its channel if it isn't in a guild.
+
+    :param payload: The payload of the event.
+    :return: The key, or `None` if the event has neither a guild nor a channel.
+    """
+    data = payload["d"]
+
+    if not isinstance(data, dict):
+        return None
+
+    return data.get("guild_id") or data.get("channel_id")
 
 
 class GatewayEventDispatcher:
-    """This class is responsible for dispatching gateway events to multiple handlers."""
+    """
+    This class is responsible for dispatching gateway events to multiple handlers.
+
+    Handlers can be registered for an opcode, or for the name of a dispatch
+    event, such as `MESSAGE_CREATE`. Dispatch events are routed to the handlers
+    of their name with a dictionary lookup, so handlers of one event are not
+    called for the others.
+
+    By default, `dispatch` awaits every handler in turn. With a `concurrency`
+    limit, the handlers registered by event name are instead run as tasks, so a
+    slow handler doesn't hold up the receive loop. Handlers of events with the
+    same ordering key, such as the same guild, still run in the order the events
+    were received, while events with different keys are handled in parallel.
+    Handlers registered by opcode, which includes every control opcode, and
+    event handlers registered as `inline` are always awaited by `dispatch`.
+
+    With a `GatewayEventBuffer`, `dispatch` only queues dispatch events that
+    have handlers registered by event name, and a background task passes them on
+    to those handlers. Inline handlers and handlers registered by opcode are
+    still called by `dispatch`, so they never wait behind the buffer.
+
+    The registered handlers are compiled into immutable call plans whenever a
+    handler is registered or unregistered, so dispatching an event only looks
+    up its plan and calls the handlers in it.
+    """
 
     def __init__(
         self,
         loop: asyncio.AbstractEventLoop,
+        concurrency: int | None = None,
+        ordering_key: typing.Callable[
+            [GatewayDispatchEventPayload[typing.Any]], typing.Hashable
+        ] = get_ordering_key,
+        buffer: GatewayEventBuffer | None = None,
         logger: logging.Logger = logging.getLogger(__name__),
     ) -> None:
         """
         Initialize the dispatcher.
 
         :param loop: The event loop to use.
+        :param concurrency: The maximum number of event handlers running at the
+                            same time. `None` awaits every handler in `dispatch`.
+        :param ordering_key: The function that gets the key the handlers of a
+                             dispatch event are ordered by. Defaults to the guild
+                             or channel of the event.
+        :param buffer: The buffer to queue events for the handlers registered by
+                       event name in. Defaults to no buffer.
         :param logger: The logger to use. Defaults to the logger of this module.
         """
         self.handlers: typing.Dict[
@@ -50,9 +153,80 @@ class GatewayEventDispatcher:
         self.one_time_futures: typing.Dict[
             GatewayReceiveOpcode, typing.List[asyncio.Future[typing.Any]]
         ] = {}
+        self.event_handlers: typing.Dict[
+            str,
+            typing.List[
+                typing.Callable[
+                    [GatewayDispatchEventPayload[typing.Any]], typing.Awaitable[None]
+                ]
+            ],
+        ] = {}
+        self.one_time_event_handlers: typing.Dict[
+            str,
+            typing.List[
+                typing.Callable[
+                    [GatewayDispatchEventPayload[typing.Any]], typing.Awaitable[None]
+                ]
+            ],
+        ] = {}
+        self.one_time_event_futures: typing.Dict[
+            str, typing.List[asyncio.Future[typing.Any]]
+        ] = {}
+        self.inline_event_handlers: typing.Dict[
+            str,
+            typing.List[
+                typing.Callable[
+                    [GatewayDispatchEventPayload[typing.Any]], typing.Awaitable[None]
+                ]
+            ],
+        ] = {}
+        self._plans: typing.Dict[GatewayReceiveOpcode, _CallPlan] = {}
+        self._event_plans: typing.Dict[str, _CallPlan] = {}
+        self._inline_event_plans: typing.Dict[str, _CallPlan] = {}
+        self.ordering_key = ordering_key
+        self.buffer = buffer
+        self.waiters = GatewayEventWaiters(loop)
+        self._drain_task: asyncio.Task[None] | None = None
+        self._runner = (
+            KeyedTaskRunner(loop, concurrency, logger)
+            if concurrency is not None
+            else None
+        )
         self._loop = loop
         self._logger = logger
 
+    @property
+    def events(self) -> typing.FrozenSet[str]:
+        """
+        The names of the dispatch events handlers, one-time futures or waiters
+        are registered for.
+        """
+        return frozenset(
+            (
+                *self._event_plans,
+                *self._inline_event_plans,
+                *self.one_time_event_handlers,
+                *self.one_time_event_futures,
+                *self.waiters.events,
+            )
+        )
+
+    def has_listeners(self, event: str) -> bool:
+        """
+        Check whether a handler, one-time handler, future or waiter is
+        registered for a dispatch event.
+
+        :param event: The name of the event.
+        :return: Whether anything is registered for the event.
+        """
+        return (
+            event in self._event_plans
+            or event in self._inline_event_plans
+            or event in self.one_time_event_handlers
+            or event in self.one_time_event_futures
+            or event in self.waiters
+        )
+
     @typing.overload
     def register_handler(
         self,
@@ -87,6 +261,15 @@ class GatewayEventDispatcher:
         ],
     ) -> None: ...
 
+    @typing.overload
+    def register_handler(
+        self,
+        opcode: typing.Literal[GatewayReceiveOpcode.INVALID_SESSION],
+        handler: typing.Callable[
+            [GatewayInvalidSessionEventPayload], typing.Awaitable[None]
+        ],
+    ) -> None: ...
+
     @typing.overload
     def register_handler(
         self,
@@ -112,6 +295,22 @@ class GatewayEventDispatcher:
             self.handlers[opcode] = []
 
         self.handlers[opcode].append(handler)
+        self._plans[opcode] = _compile(self.handlers[opcode])
+
+    def unregister_handler(
+        self,
+        opcode: GatewayReceiveOpcode,
+        handler: typing.Any,
+    ) -> None:
+        """
+        Unregister a handler previously registered with `register_handler`.
+
+        :param opcode: The opcode the handler was registered for.
+        :param handler: The handler to unregister.
+        """
+        if handler in self.handlers.get(opcode, []):
+            self.handlers[opcode].remove(handler)
+            self._recompile(self.handlers, self._plans, opcode)
 
     @typing.overload
     def on_next(
@@ -147,6 +346,15 @@ class GatewayEventDispatcher:
         ],
     ) -> None: ...
 
+    @typing.overload
+    def on_next(
+        self,
+        opcode: typing.Literal[GatewayReceiveOpcode.INVALID_SESSION],
+        handler: typing.Callable[
+            [GatewayInvalidSessionEventPayload], typing.Awaitable[None]
+        ],
+    ) -> None: ...
+
     @typing.overload
     def on_next(
         self,
@@ -198,6 +406,12 @@ class GatewayEventDispatcher:
         opcode: typing.Literal[GatewayReceiveOpcode.HEARTBEAT_ACK],
     ) -> typing.Awaitable[GatewayHeartbeatAcknowledgeEventPayload]: ...
 
+    @typing.overload
+    def next(
+        self,
+        opcode: typing.Literal[GatewayReceiveOpcode.INVALID_SESSION],
+    ) -> typing.Awaitable[GatewayInvalidSessionEventPayload]: ...
+
     @typing.overload
     def next(
         self,
@@ -213,14 +427,173 @@ class GatewayEventDispatcher:
 
         :param opcode: The opcode of the event to wait for.
         """
-        future = self._loop.create_future()
+        return self._add_future(self.one_time_futures, opcode)
+
+    @typing.overload
+    def register_event_handler(
+        self,
+        event: typing.Literal["READY"],
+        handler: typing.Callable[[GatewayReadyEventPayload], typing.Awaitable[None]],
+        inline: bool = False,
+    ) -> None: ...
+
+    @typing.overload
+    def register_event_handler(
+        self,
+        event: str,
+        handler: typing.Callable[
+            [GatewayDispatchEventPayload[typing.Any]], typing.Awaitable[None]
+        ],
+        inline: bool = False,
+    ) -> None: ...
 
-        if opcode not in self.one_time_futures:
-            self.one_time_futures[opcode] = []
+    def register_event_handler(
+        self,
+        event: str,
+        handler: typing.Any,
+        inline: bool = False,
+    ) -> None:
+        """
+        Register a handler for a dispatch event.
 
-        self.one_time_futures[opcode].append(future)
+        :param event: The name of the event to register the handler for, such as
+                      `MESSAGE_CREATE`.
+        :param handler: The handler to register.
+        :param inline: Whether the handler is always awaited by `dispatch`, even
+                       if the dispatcher runs handlers concurrently.
+        """
+        (handlers, plans) = (
+            (self.inline_event_handlers, self._inline_event_plans)
+            if inline
+            else (self.event_handlers, self._event_plans)
+        )
 
-        return future
+        if event not in handlers:
+            handlers[event] = []
+
+        handlers[event].append(handler)
+        plans[event] = _compile(handlers[event])
+
+    def unregister_event_handler(
+        self,
+        event: str,
+        handler: typing.Any,
+    ) -> None:
+        """
+        Unregister a handler previously registered with `register_event_handler`.
+
+        :param event: The name of the event the handler was registered for.
+        :param handler: The handler to unregister.
+        """
+        for handlers, plans in (
+            (self.event_handlers, self._event_plans),
+            (self.inline_event_handlers, self._inline_event_plans),
+        ):
+            if handler in handlers.get(event, []):
+                handlers[event].remove(handler)
+                self._recompile(handlers, plans, event)
+
+    @typing.overload
+    def on_next_event(
+        self,
+        event: typing.Literal["READY"],
+        handler: typing.Callable[[GatewayReadyEventPayload], typing.Awaitable[None]],
+    ) -> None: ...
+
+    @typing.overload
+    def on_next_event(
+        self,
+        event: str,
+        handler: typing.Callable[
+            [GatewayDispatchEventPayload[typing.Any]], typing.Awaitable[None]
+        ],
+    ) -> None: ...
+
+    def on_next_event(
+        self,
+        event: str,
+        handler: typing.Any,
+    ) -> None:
+        """
+        Register a one-time handler for a dispatch event. This handler will be
+        called once and then removed.
+
+        :param event: The name of the event to register the handler for.
+        :param handler: The handler to register.
+        """
+        if event not in self.one_time_event_handlers:
+            self.one_time_event_handlers[event] = []
+
+        self.one_time_event_handlers[event].append(handler)
+
+    @typing.overload
+    def next_event(
+        self,
+        event: typing.Literal["READY"],
+    ) -> typing.Awaitable[GatewayReadyEventPayload]: ...
+
+    @typing.overload
+    def next_event(
+        self,
+        event: str,
+    ) -> typing.Awaitable[GatewayDispatchEventPayload[typing.Any]]: ...
+
+    def next_event(
+        self,
+        event: str,
+    ) -> typing.Awaitable[typing.Any]:
+        """
+        Wait for the next dispatch event with the given name and return the
+        payload.
+
+        :param event: The name of the event to wait for.
+        """
+        return self._add_future(self.one_time_event_futures, event)
+
+    async def wait_for(
+        self,
+        event: str,
+        check: (
+            typing.Callable[[GatewayDispatchEventPayload[typing.Any]], bool] | None
+        ) = None,
+        timeout: float | None = None,
+        *,
+        nonce: typing.Any = None,
+        message_id: typing.Any = None,
+        user_id: typing.Any = None,
+        channel_id: typing.Any = None,
+    ) -> GatewayDispatchEventPayload[typing.Any]:
+        """
+        Wait for the next dispatch event with the given name that matches the
+        given keys and check.
+
+        Waiters given a key are only matched against events with that key, so
+        waiting for replies by `message_id` or `nonce` stays cheap no matter how
+        many waiters there are. See `get_waiter_keys` for how the keys are read
+        from events.
+
+        :param event: The name of the event to wait for.
+        :param check: The predicate the event must satisfy.
+        :param timeout: The seconds to wait for. `None` waits forever.
+        :param nonce: The nonce the event must have.
+        :param message_id: The ID of the message the event must be about.
+        :param user_id: The ID of the user the event must be about.
+        :param channel_id: The ID of the channel the event must be in.
+        :raises asyncio.TimeoutError: If no matching event is received in time.
+        :return: The payload of the matching event.
+        """
+        future = self.waiters.add(
+            event,
+            check,
+            {
+                "nonce": nonce,
+                "message_id": message_id,
+                "user_id": user_id,
+                "channel_id": channel_id,
+            },
+        )
+
+        return await asyncio.wait_for(future, timeout)
 
     async def dispatch(
         self, payload: GatewayEventPayload[GatewayReceiveOpcode, typing.Any]
@@ -231,38 +604,218 @@ class GatewayEventDispatcher:
         :param payload: The payload of the event to dispatch.
         """
         opcode = payload["op"]
-
-        if opcode not in GatewayReceiveOpcode:
+        debug = self._logger.isEnabledFor(logging.DEBUG)
+
+        await self._dispatch_to(
+            opcode,
+            payload,
+            self._plans.get(opcode),
+            self.one_time_handlers,
+            self.one_time_futures,
+            debug,
+        )
+
+        if opcode != GatewayReceiveOpcode.DISPATCH or payload["t"] is None:
             return
 
-        if opcode in self.handlers:
-            for handler in self.handlers[opcode]:
-                self._logger.debug(f"Dispatching event {opcode} to handler {handler}")
+        event_payload = typing.cast(GatewayDispatchEventPayload[typing.Any], payload)
+        event = event_payload["t"]
 
-                if asyncio.iscoroutinefunction(handler):
-                    await handler(payload)
-                else:
-                    handler(payload)
+        if event in self.waiters:
+            self.waiters.resolve(event_payload)
 
-        if opcode in self.one_time_handlers:
-            for handler in self.one_time_handlers[opcode]:
+        for handler, is_async in self._inline_event_plans.get(event, ()):
+            if debug:
                 self._logger.debug(
-                    f"Dispatching event {opcode} to one-time handler {handler}"
+                    "Dispatching event %s to inline handler %r", event, handler
                 )
 
-                if asyncio.iscoroutinefunction(handler):
-                    await handler(payload)
-                else:
-                    handler(payload)
+            if is_async:
+                await handler(event_payload)
+            else:
+                handler(event_payload)
 
-            self.one_time_handlers.pop(opcode)
+        if self.buffer is None:
+            await self._dispatch_event(event_payload, debug)
+        elif (
+            event in self._event_plans
+            or event in self.one_time_event_handlers
+            or event in self.one_time_event_futures
+        ):
+            if self._drain_task is None or self._drain_task.done():
+                self._drain_task = self._loop.create_task(self._drain_buffer())
 
-        if opcode in self.one_time_futures:
-            for future in self.one_time_futures[opcode]:
-                self._logger.debug(
-                    f"Dispatching event {opcode} to one-time future {future}"
+            await self.buffer.put(event_payload)
+
+    async def join(self) -> None:
+        """
+        Wait until the buffered events have been handled and the event handlers
+        running as tasks have finished.
+        """
+        if self.buffer is not None:
+            await self.buffer.join()
+
+        if self._runner is not None:
+            await self._runner.join()
+
+    async def close(self) -> None:
+        """
+        Stop handling buffered events and cancel the event handlers running as
+        tasks.
+        """
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+            await asyncio.gather(self._drain_task, return_exceptions=True)
+            self._drain_task = None
+
+        if self._runner is not None:
+            await self._runner.cancel()
+
+    async def _drain_buffer(self) -> None:
+        """Pass the buffered events on to their handlers until cancelled."""
+        assert self.buffer is not None, "Buffer is not set"
+
+        while True:
+            if self._runner is not None:
+                await self._runner.wait_for_capacity()
+
+            payload = await self.buffer.get()
+
+            try:
+                await self._dispatch_event(
+                    payload, self._logger.isEnabledFor(logging.DEBUG)
+                )
+            except Exception:
+                self._logger.exception("Error dispatching event %s", payload["t"])
+            finally:
+                self.buffer.task_done()
+
+    async def _dispatch_event(
+        self, payload: GatewayDispatchEventPayload[typing.Any], debug: bool
+    ) -> None:
+        """
+        Dispatch a dispatch event to the handlers registered for its name.
+
+        :param payload: The payload of the event.
+        :param debug: Whether to log the handlers the event is dispatched to.
+        """
+        event = payload["t"]
+
+        await self._dispatch_to(
+            event,
+            payload,
+            self._event_plans.get(event),
+            self.one_time_event_handlers,
+            self.one_time_event_futures,
+            debug,
+            self._runner,
+        )
+
+    async def _dispatch_to(
+        self,
+        key: GatewayReceiveOpcode | str,
+        payload: typing.Any,
+        plan: _CallPlan | None,
+        one_time_handlers: typing.Dict[typing.Any, typing.List[typing.Any]],
+        one_time_futures: typing.Dict[
+            typing.Any, typing.List[asyncio.Future[typing.Any]]
+        ],
+        debug: bool,
+        runner: KeyedTaskRunner | None = None,
+    ) -> None:
+        """
+        Dispatch an event to the handlers and futures registered for a key.
+
+        :param key: The opcode or event name the handlers are registered for.
+        :param payload: The payload of the event to dispatch.
+        :param plan: The call plan of the handlers registered for the key.
+        :param one_time_handlers: The one-time handlers by key.
+        :param one_time_futures: The one-time futures by key.
+        :param debug: Whether to log the handlers the event is dispatched to.
+        :param runner: The runner to run the handlers with. The handlers are
+                       awaited if not given.
+        """
+        one_time_plan = (
+            _compile(one_time_handlers.pop(key)) if key in one_time_handlers else ()
+        )
+
+        ordering_key = (
+            self.ordering_key(payload)
+            if runner is not None and (plan or one_time_plan)
+            else None
+        )
+
+        for handler, is_async in (*plan, *one_time_plan) if plan else one_time_plan:
+            if debug:
+                self._logger.debug("Dispatching event %s to handler %r", key, handler)
+
+            if runner is not None:
+                runner.submit(
+                    ordering_key,
+                    (
+                        functools.partial(handler, payload)
+                        if is_async
+                        else functools.partial(_call_sync, handler, payload)
+                    ),
                 )
+            elif is_async:
+                await handler(payload)
+            else:
+                handler(payload)
+
+        if key in one_time_futures:
+            for future in one_time_futures.pop(key):
+                if future.done():
+                    continue
+
+                if debug:
+                    self._logger.debug(
+                        "Dispatching event %s to one-time future %r", key, future
+                    )
 
                 future.set_result(payload)
 
-            self.one_time_futures.pop(opcode)
+    def _recompile(
+        self,
+        handlers: typing.Dict[typing.Any, typing.List[typing.Any]],
+        plans: typing.Dict[typing.Any, _CallPlan],
+        key: GatewayReceiveOpcode | str,
+    ) -> None:
+        """
+        Rebuild the call plan of a key after a handler was unregistered.
+
+        :param handlers: The handlers by key.
+        :param plans: The call plans by key.
+        :param key: The opcode or event name to rebuild the call plan of.
+        """
+        if handlers[key]:
+            plans[key] = _compile(handlers[key])
+        else:
+            del handlers[key]
+            del plans[key]
+
+    def _add_future(
+        self,
+        futures: typing.Dict[typing.Any, typing.List[asyncio.Future[typing.Any]]],
+        key: GatewayReceiveOpcode | str,
+    ) -> asyncio.Future[typing.Any]:
+        """
+        Add a one-time future that removes itself when it is cancelled.
+
+        :param futures: The one-time futures by key.
+        :param key: The opcode or event name to add the future for.
+        :return: The future.
+        """
+        future = self._loop.create_future()
+        futures.setdefault(key, []).append(future)
+
+        def remove(_: asyncio.Future[typing.Any]) -> None:
+            if future in futures.get(key, ()):
+                futures[key].remove(future)
+
+                if not futures[key]:
+                    del futures[key]
+
+        future.add_done_callback(remove)
+
+        return future
@@ -0,0 +1,15 @@
+import enum
+
+__all__ = ("GatewayEncoding",)
+
+
+class GatewayEncoding(enum.StrEnum):
+    """
+    Payload encodings supported by the gateway.
+
+    See [here](https://discord.com/developers/docs/topics/gateway#etfjson)
+    for Discord's documentation.
+    """
+
+    JSON = "json"
+    ETF = "etf"
@@ -0,0 +1,266 @@
+"""
+Encoder and decoder for the Erlang External Term Format.
+
+Only the subset of the format used by the gateway is supported. Binaries and
+atoms are decoded to strings, the `nil`, `true` and `false` atoms to `None`,
+`True` and `False`, maps to dictionaries and lists and tuples to lists. Erlang
+strings are lists of small integers and are decoded as such.
+
+See [here](https://www.erlang.org/doc/apps/erts/erl_ext_dist.html) for Erlang's
+documentation.
+"""
+
+import collections.abc
+import struct
+import typing
+import zlib
+
+__all__ = (
+    "dumps",
+    "loads",
+)
+
+FORMAT_VERSION = 131
+
+NEW_FLOAT_EXT = 70
+COMPRESSED = 80
+SMALL_INTEGER_EXT = 97
+INTEGER_EXT = 98
+FLOAT_EXT = 99
+ATOM_EXT = 100
+SMALL_TUPLE_EXT = 104
+LARGE_TUPLE_EXT = 105
+NIL_EXT = 106
+STRING_EXT = 107
+LIST_EXT = 108
+BINARY_EXT = 109
+SMALL_BIG_EXT = 110
+LARGE_BIG_EXT = 111
+SMALL_ATOM_EXT = 115
+MAP_EXT = 116
+ATOM_UTF8_EXT = 118
+SMALL_ATOM_UTF8_EXT = 119
+
+_ATOMS: typing.Dict[str, typing.Any] = {"nil": None, "true": True, "false": False}
+
+_unpack_int32 = struct.Struct(">i").unpack_from
+_unpack_uint16 = struct.Struct(">H").unpack_from
+_unpack_uint32 = struct.Struct(">I").unpack_from
+_unpack_double = struct.Struct(">d").unpack_from
+_pack_int32 = struct.Struct(">i").pack
+_pack_uint32 = struct.Struct(">I").pack
+_pack_double = struct.Struct(">d").pack
+
+
+def loads(data: bytes) -> typing.Any:
+    """
+    Decode a term encoded in the External Term Format.
+
+    :param data: The encoded term.
+    :raises ValueError: If the data is not a valid term.
+    :return: The decoded term.
+    """
+    if not data or data[0] != FORMAT_VERSION:
+        raise ValueError("Invalid ETF version")
+
+    if len(data) > 1 and data[1] == COMPRESSED:
+        (size,) = _unpack_uint32(data, 2)
+        data = bytes([FORMAT_VERSION]) + zlib.decompress(data[6:], bufsize=size)
+
+    try:
+        term, position = _decode(data, 1)
+    except (IndexError, struct.error) as e:
+        raise ValueError("Truncated ETF data") from e
+
+    if position != len(data):
+        raise ValueError("Trailing data after ETF term")
+
+    return term
+
+
+def _decode(data: bytes, position: int) -> typing.Tuple[typing.Any, int]:
+    """
+    Decode the term starting at the given position.
+
+    :param data: The encoded data.
+    :param position: The position of the tag of the term.
+    :return: The decoded term and the position right after it.
+    """
+    tag = data[position]
+    position += 1
+
+    if tag == BINARY_EXT:
+        (length,) = _unpack_uint32(data, position)
+        position += 4
+        return data[position : position + length].decode(), position + length
+
+    if tag == SMALL_INTEGER_EXT:
+        return data[position], position + 1
+
+    if tag == MAP_EXT:
+        (arity,) = _unpack_uint32(data, position)
+        position += 4
+        result: typing.Dict[typing.Any, typing.Any] = {}
+
+        for _ in range(arity):
+            key, position = _decode(data, position)
+            result[key], position = _decode(data, position)
+
+        return result, position
+
+    if tag == SMALL_ATOM_UTF8_EXT or tag == SMALL_ATOM_EXT:
+        length = data[position]
+        position += 1
+        return _decode_atom(data[position : position + length]), position + length
+
+    if tag == ATOM_UTF8_EXT or tag == ATOM_EXT:
+        (length,) = _unpack_uint16(data, position)
+        position += 2
+        return _decode_atom(data[position : position + length]), position + length
+
+    if tag == INTEGER_EXT:
+        return _unpack_int32(data, position)[0], position + 4
+
+    if tag == SMALL_BIG_EXT or tag == LARGE_BIG_EXT:
+        if tag == SMALL_BIG_EXT:
+            length = data[position]
+            position += 1
+        else:
+            (length,) = _unpack_uint32(data, position)
+            position += 4
+
+        sign = data[position]
+        value = int.from_bytes(data[position + 1 : position + 1 + length], "little")
+        return -value if sign else value, position + 1 + length
+
+    if tag == NIL_EXT:
+        return [], position
+
+    if tag == LIST_EXT:
+        (length,) = _unpack_uint32(data, position)
+        position += 4
+        items = []
+
+        for _ in range(length):
+            item, position = _decode(data, position)
+            items.append(item)
+
+        tail, position = _decode(data, position)
+
+        if tail != []:
+            items.append(tail)
+
+        return items, position
+
+    if tag == SMALL_TUPLE_EXT or tag == LARGE_TUPLE_EXT:
+        if tag == SMALL_TUPLE_EXT:
+            arity = data[position]
+            position += 1
+        else:
+            (arity,) = _unpack_uint32(data, position)
+            position += 4
+
+        elements = []
+
+        for _ in range(arity):
+            element, position = _decode(data, position)
+            elements.append(element)
+
+        return elements, position
+
+    if tag == STRING_EXT:
+        (length,) = _unpack_uint16(data, position)
+        position += 2
+        return list(data[position : position + length]), position + length
+
+    if tag == NEW_FLOAT_EXT:
+        return _unpack_double(data, position)[0], position + 8
+
+    if tag == FLOAT_EXT:
+        raw = data[position : position + 31].split(b"\x00", 1)[0]
+        return float(raw), position + 31
+
+    raise ValueError(f"Unsupported ETF tag: {tag}")
+
+
+def _decode_atom(name: bytes) -> typing.Any:
+    """
+    Decode the name of an atom.
+
+    :param name: The encoded name of the atom.
+    :return: `None`, `True` or `False` for the special atoms, the name otherwise.
+    """
+    atom = name.decode()
+    return _ATOMS.get(atom, atom)
+
+
+def dumps(obj: typing.Any) -> bytes:
+    """
+    Encode an object in the External Term Format.
+
+    :param obj: The object to encode.
+    :raises TypeError: If the object contains a value that can't be encoded.
+    :return: The encoded term.
+    """
+    buffer = bytearray((FORMAT_VERSION,))
+    _encode(obj, buffer)
+    return bytes(buffer)
+
+
+def _encode(obj: typing.Any, buffer: bytearray) -> None:
+    """
+    Encode an object and append it to the buffer.
+
+    :param obj: The object to encode.
+    :param buffer: The buffer to append the encoded term to.
+    """
+    if obj is None:
+        buffer += b"\x77\x03nil"
+    elif obj is True:
+        buffer += b"\x77\x04true"
+    elif obj is False:
+        buffer += b"\x77\x05false"
+    elif isinstance(obj, int):
+        if 0 <= obj <= 255:
+            buffer += bytes((SMALL_INTEGER_EXT, obj))
+        elif -(2**31) <= obj < 2**31:
+            buffer.append(INTEGER_EXT)
+            buffer += _pack_int32(obj)
+        else:
+            value = abs(obj)
+            digits = value.to_bytes((value.bit_length() + 7) // 8, "little")
+
+            if len(digits) > 255:
+                raise TypeError(f"Integer too large to encode: {obj}")
+
+            buffer += bytes((SMALL_BIG_EXT, len(digits), obj < 0))
+            buffer += digits
+    elif isinstance(obj, float):
+        buffer.append(NEW_FLOAT_EXT)
+        buffer += _pack_double(obj)
+    elif isinstance(obj, (str, bytes)):
+        raw = obj.encode() if isinstance(obj, str) else obj
+        buffer.append(BINARY_EXT)
+        buffer += _pack_uint32(len(raw))
+        buffer += raw
+    elif isinstance(obj, collections.abc.Mapping):
+        buffer.append(MAP_EXT)
+        buffer += _pack_uint32(len(obj))
+
+        for key, value in obj.items():
+            _encode(key, buffer)
+            _encode(value, buffer)
+    elif isinstance(obj, (list, tuple)):
+        if not obj:
+            buffer.append(NIL_EXT)
+            return
+
+        buffer.append(LIST_EXT)
+        buffer += _pack_uint32(len(obj))
+
+        for item in obj:
+            _encode(item, buffer)
+
+        buffer.append(NIL_EXT)
+    else:
+        raise TypeError(f"Object of type {type(obj).__name__} is not ETF serializable")
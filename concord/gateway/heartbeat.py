@@ -1,12 +1,15 @@
 import asyncio
+import collections
 import logging
+import random
+import time
 import typing
 
 from .dispatcher import GatewayEventDispatcher
-from .errors import GatewayException
-from .sender import GatewayMessageSender
+from .errors import GatewayException, GatewayReconnectException
+from .scheduler import ScheduledMessage
+from .sender import GatewayMessageSender, MessagePriority
 from .types.receive import (
-    GatewayDispatchEventPayload,
     GatewayHeartbeatAcknowledgeEventPayload,
     GatewayHeartbeatEventPayload,
     GatewayReceiveOpcode,
@@ -17,17 +20,25 @@ __all__ = ("GatewayHeartbeatHandler",)
 
 
 class GatewayHeartbeatHandler:
-    """This class is responsible for handling heartbeats for a gateway client."""
+    """
+    This class is responsible for handling heartbeats for a gateway client.
+
+    The time between sending a heartbeat and receiving its acknowledgement is
+    measured, and the latencies of the last heartbeats are kept in a rolling
+    window.
+    """
 
     def __init__(
         self,
         loop: asyncio.AbstractEventLoop,
+        latency_window: int = 10,
         logger: logging.Logger = logging.getLogger(__name__),
     ) -> None:
         """
         Initialize the heartbeat handler.
 
         :param loop: The event loop to use.
+        :param latency_window: The number of latencies to keep.
         :param logger: The logger to use. Defaults to the logger of this module.
         """
         self._loop = loop
@@ -35,6 +46,8 @@ class GatewayHeartbeatHandler:
         self._heartbeat_interval_ms: float | None = None
         self._last_sequence_number: int | None = None
         self._last_heartbeat_acknowledged: bool = True
+        self._last_heartbeat: ScheduledMessage | None = None
+        self._latencies: typing.Deque[float] = collections.deque(maxlen=latency_window)
         self._heartbeat_loop_task: asyncio.Task[None] | None = None
         self._dispatcher: GatewayEventDispatcher | None = None
         self._sender: GatewayMessageSender | None = None
@@ -57,6 +70,9 @@ class GatewayHeartbeatHandler:
         self._logger.debug("Starting heartbeat handler")
 
         self._heartbeat_interval_ms = interval_ms
+        self._last_heartbeat_acknowledged = True
+        self._last_heartbeat = None
+        self._latencies.clear()
         self._dispatcher = dispatcher
         self._sender = sender
 
@@ -65,8 +81,61 @@ class GatewayHeartbeatHandler:
 
         return self._heartbeat_loop_task
 
+    @property
+    def last_sequence_number(self) -> int | None:
+        """The sequence number of the last dispatch event received."""
+        return self._last_sequence_number
+
+    @property
+    def latency(self) -> float | None:
+        """
+        The seconds between sending the last acknowledged heartbeat and receiving
+        its acknowledgement, or `None` if no heartbeat was acknowledged yet.
+        """
+        return self._latencies[-1] if self._latencies else None
+
+    @property
+    def latencies(self) -> typing.Tuple[float, ...]:
+        """The latencies of the last acknowledged heartbeats, oldest first."""
+        return tuple(self._latencies)
+
+    @property
+    def average_latency(self) -> float | None:
+        """
+        The average latency of the last acknowledged heartbeats, or `None` if no
+        heartbeat was acknowledged yet.
+        """
+        if not self._latencies:
+            return None
+
+        return sum(self._latencies) / len(self._latencies)
+
+    def record_sequence_number(self, sequence: int) -> None:
+        """
+        Record the sequence number of a received dispatch event.
+
+        Sequence numbers are recorded by the receiver as payloads arrive, so
+        they stay correct when events are filtered, coalesced or buffered
+        before they are dispatched.
+
+        :param sequence: The sequence number.
+        """
+        self._last_sequence_number = sequence
+
+    def reset_sequence_number(self) -> None:
+        """Forget the last sequence number, for when a session is invalidated."""
+        self._last_sequence_number = None
+
     async def stop(self) -> None:
-        """Stop the handler."""
+        """
+        Stop the handler.
+
+        The sequence number is kept, so the handler can be started again on a
+        new connection to resume the session.
+        """
+        if self._dispatcher is not None:
+            self._unregister_handlers()
+
         if (
             self._heartbeat_loop_task is not None
             and not self._heartbeat_loop_task.done()
@@ -91,21 +160,40 @@ class GatewayHeartbeatHandler:
         self._dispatcher.register_handler(
             GatewayReceiveOpcode.HEARTBEAT_ACK, self._on_heartbeat_acknowledge
         )
-        self._dispatcher.register_handler(
-            GatewayReceiveOpcode.DISPATCH, self._on_dispatch
+
+    def _unregister_handlers(self) -> None:
+        """Unregister the handlers registered by `_register_handlers`."""
+        if self._dispatcher is None:
+            raise GatewayException("Dispatcher not set")
+
+        self._dispatcher.unregister_handler(
+            GatewayReceiveOpcode.HEARTBEAT, self._on_heartbeat
+        )
+        self._dispatcher.unregister_handler(
+            GatewayReceiveOpcode.HEARTBEAT_ACK, self._on_heartbeat_acknowledge
         )
 
     async def _heartbeat_loop(self) -> None:
-        """Send heartbeats at the specified interval."""
+        """
+        Send heartbeats at the specified interval.
+
+        The first heartbeat is sent after a random fraction of the interval, as
+        Discord asks, so shards that connect together don't heartbeat together.
+
+        :raises GatewayReconnectException: If a heartbeat wasn't acknowledged
+                                           before the next one is due, which
+                                           means the connection is a zombie.
+        """
         if self._heartbeat_interval_ms is None:
             raise GatewayException("Heartbeat interval not set")
 
         self._logger.debug("Starting heartbeat loop")
 
+        await asyncio.sleep(self._heartbeat_interval_ms / 1000 * random.random())
+
         while True:
             if not self._last_heartbeat_acknowledged:
-                self._logger.debug("Heartbeat not acknowledged, stopping")
-                break
+                raise GatewayReconnectException("Heartbeat not acknowledged")
 
             await self._send_heartbeat()
             self._last_heartbeat_acknowledged = False
@@ -118,8 +206,9 @@ class GatewayHeartbeatHandler:
             raise GatewayException("Sender not set")
 
         self._logger.debug("Sending heartbeat")
-        await self._sender.send(
-            GatewayHeartbeatMessage(data=self._last_sequence_number)
+        self._last_heartbeat = await self._sender.send(
+            GatewayHeartbeatMessage(data=self._last_sequence_number),
+            MessagePriority.EMERGENCY,
         )
 
     async def _on_heartbeat(self, _: GatewayHeartbeatEventPayload) -> None:
@@ -131,13 +220,17 @@ class GatewayHeartbeatHandler:
     ) -> None:
         """
         Handle a heartbeat acknowledge event by setting the last heartbeat to
-        acknowledged.
+        acknowledged and recording its latency.
         """
-        self._logger.debug("Received heartbeat acknowledge")
         self._last_heartbeat_acknowledged = True
+        heartbeat, self._last_heartbeat = self._last_heartbeat, None
 
-    async def _on_dispatch(
-        self, payload: GatewayDispatchEventPayload[typing.Any]
-    ) -> None:
-        """Handle a dispatch event by updating the last sequence number."""
-        self._last_sequence_number = payload["s"]
+        if heartbeat is None or heartbeat.sent_at is None:
+            self._logger.debug("Received heartbeat acknowledge")
+            return
+
+        latency = time.monotonic() - heartbeat.sent_at
+        self._latencies.append(latency)
+        self._logger.debug(
+            "Received heartbeat acknowledge, latency %.1fms", latency * 1000
+        )
@@ -1,10 +1,147 @@
 from __future__ import annotations
 
+import logging
 import typing
 
 from .types.common import GatewayIntents
 
-__all__ = ("Intents",)
+__all__ = (
+    "EVENT_INTENTS",
+    "get_event_intents",
+    "plan_intents",
+    "Intents",
+)
+
+_MESSAGE_EVENTS = ("MESSAGE_CREATE", "MESSAGE_UPDATE", "MESSAGE_DELETE")
+_REACTION_EVENTS = (
+    "MESSAGE_REACTION_ADD",
+    "MESSAGE_REACTION_REMOVE",
+    "MESSAGE_REACTION_REMOVE_ALL",
+    "MESSAGE_REACTION_REMOVE_EMOJI",
+)
+_POLL_EVENTS = ("MESSAGE_POLL_VOTE_ADD", "MESSAGE_POLL_VOTE_REMOVE")
+
+_INTENT_EVENTS: typing.Dict[GatewayIntents, typing.Tuple[str, ...]] = {
+    GatewayIntents.GUILDS: (
+        "GUILD_CREATE",
+        "GUILD_UPDATE",
+        "GUILD_DELETE",
+        "GUILD_ROLE_CREATE",
+        "GUILD_ROLE_UPDATE",
+        "GUILD_ROLE_DELETE",
+        "CHANNEL_CREATE",
+        "CHANNEL_UPDATE",
+        "CHANNEL_DELETE",
+        "CHANNEL_PINS_UPDATE",
+        "THREAD_CREATE",
+        "THREAD_UPDATE",
+        "THREAD_DELETE",
+        "THREAD_LIST_SYNC",
+        "THREAD_MEMBER_UPDATE",
+        "THREAD_MEMBERS_UPDATE",
+        "STAGE_INSTANCE_CREATE",
+        "STAGE_INSTANCE_UPDATE",
+        "STAGE_INSTANCE_DELETE",
+    ),
+    GatewayIntents.GUILD_MEMBERS: (
+        "GUILD_MEMBER_ADD",
+        "GUILD_MEMBER_UPDATE",
+        "GUILD_MEMBER_REMOVE",
+    ),
+    GatewayIntents.GUILD_MODERATION: (
+        "GUILD_AUDIT_LOG_ENTRY_CREATE",
+        "GUILD_BAN_ADD",
+        "GUILD_BAN_REMOVE",
+    ),
+    GatewayIntents.GUILD_EXPRESSIONS: (
+        "GUILD_EMOJIS_UPDATE",
+        "GUILD_STICKERS_UPDATE",
+        "GUILD_SOUNDBOARD_SOUND_CREATE",
+        "GUILD_SOUNDBOARD_SOUND_UPDATE",
+        "GUILD_SOUNDBOARD_SOUND_DELETE",
+        "GUILD_SOUNDBOARD_SOUNDS_UPDATE",
+    ),
+    GatewayIntents.GUILD_INTEGRATIONS: (
+        "GUILD_INTEGRATIONS_UPDATE",
+        "INTEGRATION_CREATE",
+        "INTEGRATION_UPDATE",
+        "INTEGRATION_DELETE",
+    ),
+    GatewayIntents.GUILD_WEBHOOKS: ("WEBHOOKS_UPDATE",),
+    GatewayIntents.GUILD_INVITES: ("INVITE_CREATE", "INVITE_DELETE"),
+    GatewayIntents.GUILD_VOICE_STATES: (
+        "VOICE_CHANNEL_EFFECT_SEND",
+        "VOICE_STATE_UPDATE",
+    ),
+    GatewayIntents.GUILD_PRESENCES: ("PRESENCE_UPDATE",),
+    GatewayIntents.GUILD_MESSAGES: (*_MESSAGE_EVENTS, "MESSAGE_DELETE_BULK"),
+    GatewayIntents.GUILD_MESSAGE_REACTIONS: _REACTION_EVENTS,
+    GatewayIntents.GUILD_MESSAGE_TYPING: ("TYPING_START",),
+    GatewayIntents.DIRECT_MESSAGES: (*_MESSAGE_EVENTS, "CHANNEL_PINS_UPDATE"),
+    GatewayIntents.DIRECT_MESSAGE_REACTIONS: _REACTION_EVENTS,
+    GatewayIntents.DIRECT_MESSAGE_TYPING: ("TYPING_START",),
+    GatewayIntents.GUILD_SCHEDULED_EVENTS: (
+        "GUILD_SCHEDULED_EVENT_CREATE",
+        "GUILD_SCHEDULED_EVENT_UPDATE",
+        "GUILD_SCHEDULED_EVENT_DELETE",
+        "GUILD_SCHEDULED_EVENT_USER_ADD",
+        "GUILD_SCHEDULED_EVENT_USER_REMOVE",
+    ),
+    GatewayIntents.AUTO_MODERATION_CONFIGURATION: (
+        "AUTO_MODERATION_RULE_CREATE",
+        "AUTO_MODERATION_RULE_UPDATE",
+        "AUTO_MODERATION_RULE_DELETE",
+    ),
+    GatewayIntents.AUTO_MODERATION_EXECUTION: ("AUTO_MODERATION_ACTION_EXECUTION",),
+    GatewayIntents.GUILD_MESSAGE_POLLS: _POLL_EVENTS,
+    GatewayIntents.DIRECT_MESSAGE_POLLS: _POLL_EVENTS,
+}
+
+
+def _map_events_to_intents(
+    intent_events: typing.Mapping[GatewayIntents, typing.Iterable[str]],
+) -> typing.Dict[str, GatewayIntents]:
+    """
+    Map the events caused by intents to the intents that cause them.
+
+    :param intent_events: The events caused by each intent.
+    :return: The intents causing each event.
+    """
+    event_intents: typing.Dict[str, GatewayIntents] = {}
+
+    for intent, events in intent_events.items():
+        for event in events:
+            event_intents[event] = event_intents.get(event, GatewayIntents(0)) | intent
+
+    return event_intents
+
+
+EVENT_INTENTS = _map_events_to_intents(_INTENT_EVENTS)
+"""
+The intents that cause each dispatch event to be sent, by event name. An event
+sent both for guilds and for direct messages maps to both intents.
+
+See [here](https://discord.com/developers/docs/events/gateway#list-of-intents)
+for Discord's documentation.
+"""
+
+_DATA_INTENTS: typing.Dict[GatewayIntents, typing.Tuple[str, ...]] = {
+    GatewayIntents.MESSAGE_CONTENT: _MESSAGE_EVENTS,
+}
+"""
+The intents that don't cause events to be sent, but add data to some events,
+with the events they add data to.
+"""
+
+
+def get_event_intents(event: str) -> GatewayIntents:
+    """
+    Get the intents that cause a dispatch event to be sent.
+
+    :param event: The name of the event.
+    :return: The intents, which are empty if the event is always sent.
+    """
+    return EVENT_INTENTS.get(event, GatewayIntents(0))
 
 
 class Intents:
@@ -34,6 +171,43 @@ class Intents:
 
         return cls(*intents)
 
+    @classmethod
+    def for_events(cls, events: typing.Iterable[str]) -> Intents:
+        """
+        Create the smallest Intents instance that causes the given dispatch
+        events to be sent.
+
+        Events that are sent both for guilds and for direct messages require
+        both intents. Intents that only add data to events, such as
+        `MESSAGE_CONTENT`, are never included.
+
+        :param events: The names of the events.
+        :return: An Intents instance.
+        """
+        mask = GatewayIntents(0)
+
+        for event in events:
+            mask |= get_event_intents(event)
+
+        return cls.from_bitmask(mask)
+
+    def unused(self, events: typing.Iterable[str]) -> Intents:
+        """
+        Get the intents that don't cause any of the given dispatch events to be
+        sent, or add data to them.
+
+        :param events: The names of the events that are handled.
+        :return: The unused intents.
+        """
+        events = frozenset(events)
+        used = int(Intents.for_events(events))
+
+        for intent, data_events in _DATA_INTENTS.items():
+            if not events.isdisjoint(data_events):
+                used |= intent
+
+        return Intents(*(intent for intent in self.intents if not intent & used))
+
     def add(self, *intents: GatewayIntents) -> None:
         """
         Add intents to the intents.
@@ -64,3 +238,45 @@ class Intents:
     def __iter__(self) -> typing.Iterator[GatewayIntents]:
         """Iterate over the intents."""
         return iter(self.intents)
+
+
+def plan_intents(
+    intents: Intents | None,
+    events: typing.Iterable[str],
+    required: Intents | None = None,
+    logger: logging.Logger = logging.getLogger(__name__),
+) -> Intents:
+    """
+    Plan the intents to request for the dispatch events that are handled.
+
+    :param intents: The intents requested by the user. The smallest intents
+                    causing the events to be sent are planned if not given.
+    :param events: The names of the events that are handled.
+    :param required: The intents needed for other reasons than handled events,
+                     such as `GUILD_MEMBERS` to request all members of a guild.
+                     They are always planned and never reported as unused.
+    :param logger: The logger to warn about unused intents with. Defaults to the
+                   logger of this module.
+    :return: The intents to request.
+    """
+    events = frozenset(events)
+
+    required = required or Intents()
+
+    if intents is None:
+        intents = Intents.from_bitmask(int(Intents.for_events(events)) | int(required))
+        logger.info(
+            "Planned intents for the handled events: %s",
+            ", ".join(str(intent.name) for intent in intents),
+        )
+        return intents
+
+    unused = [intent for intent in intents.unused(events) if intent not in required]
+
+    if unused:
+        logger.warning(
+            "Intents are requested, but no handler consumes the events they cause: %s",
+            ", ".join(str(intent.name) for intent in unused),
+        )
+
+    return intents
@@ -0,0 +1,325 @@
+import asyncio
+import collections.abc
+import dataclasses
+import logging
+import typing
+import uuid
+
+from concord.types.common import Snowflake
+
+from .errors import GatewayConnectionException, GatewayException
+from .scheduler import MessagePriority
+from .types.receive import (
+    GatewayGuildMembersChunkEventPayload,
+    GatewayGuildMembersChunkEventPayloadData,
+)
+
+__all__ = (
+    "MEMBER_CHUNK_TIMEOUT",
+    "GatewayMemberChunkRouter",
+    "SupportsMemberRequests",
+    "MemberPrefetchProgress",
+    "GatewayMemberPrefetcher",
+)
+
+MEMBER_CHUNK_TIMEOUT = 30.0
+"""Seconds to wait for each chunk of a member request by default."""
+
+
+class GatewayMemberChunkRouter:
+    """
+    This class is responsible for routing `GUILD_MEMBERS_CHUNK` events to the
+    member requests they answer, by the nonce each request is sent with.
+
+    Every open request has its own queue, so chunks are handed over as they
+    arrive and only the chunks the consumer has not processed yet are kept in
+    memory. Chunks without a nonce or with the nonce of a closed request are
+    ignored. When the session is lost, `fail_all` puts an exception in the
+    queue of every open request, since their remaining chunks never arrive.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger = logging.getLogger(__name__),
+    ) -> None:
+        """
+        Initialize the router.
+
+        :param logger: The logger to use. Defaults to the logger of this module.
+        """
+        self._logger = logger
+        self._queues: typing.Dict[
+            str,
+            asyncio.Queue[GatewayGuildMembersChunkEventPayloadData | Exception],
+        ] = {}
+
+    def __len__(self) -> int:
+        return len(self._queues)
+
+    def open(
+        self,
+    ) -> typing.Tuple[
+        str, asyncio.Queue[GatewayGuildMembersChunkEventPayloadData | Exception]
+    ]:
+        """
+        Open a request.
+
+        :return: The unique nonce to send the request with, and the queue its
+                 chunks, or the exception it failed with, are put in.
+        """
+        nonce = uuid.uuid4().hex
+        queue: asyncio.Queue[GatewayGuildMembersChunkEventPayloadData | Exception] = (
+            asyncio.Queue()
+        )
+        self._queues[nonce] = queue
+
+        return (nonce, queue)
+
+    def close(self, nonce: str) -> None:
+        """
+        Close a request, dropping the chunks that were not taken from its queue.
+
+        :param nonce: The nonce of the request.
+        """
+        self._queues.pop(nonce, None)
+
+    def fail_all(self, exception: Exception) -> None:
+        """
+        Fail every open request, for when the session they were sent on is lost.
+
+        :param exception: The exception to raise to the consumers.
+        """
+        for queue in self._queues.values():
+            queue.put_nowait(exception)
+
+        self._queues.clear()
+
+    async def route(self, payload: GatewayGuildMembersChunkEventPayload) -> None:
+        """
+        Put a chunk in the queue of the request it answers.
+
+        :param payload: The payload of the `GUILD_MEMBERS_CHUNK` event.
+        """
+        data = payload["d"]
+        queue = self._queues.get(data.get("nonce", ""))
+
+        if queue is None:
+            self._logger.debug(
+                "Ignoring members chunk with unknown nonce %r", data.get("nonce")
+            )
+            return
+
+        queue.put_nowait(data)
+
+
+class SupportsMemberRequests(typing.Protocol):
+    """
+    Interface for requesting the members of guilds, such as a `GatewayClient`
+    or a `ShardManager`.
+    """
+
+    def request_guild_members(
+        self,
+        guild_id: Snowflake,
+        *,
+        presences: bool = ...,
+        chunk_timeout: float | None = ...,
+        priority: MessagePriority = ...,
+    ) -> typing.AsyncIterator[GatewayGuildMembersChunkEventPayloadData]:
+        """
+        Request the members of a guild.
+
+        :param guild_id: The ID of the guild to request the members of.
+        :param presences: Whether to send the presences of the members.
+        :param chunk_timeout: The seconds to wait for each chunk.
+        :param priority: The priority to send the request with.
+        :return: An iterator over the chunks.
+        """
+        ...
+
+
+@dataclasses.dataclass
+class MemberPrefetchProgress:
+    """The progress of fetching the members of many guilds."""
+
+    total: int | None
+    """The number of guilds to fetch, if known."""
+    completed: int = 0
+    """The number of guilds whose members were fetched."""
+    failed: int = 0
+    """The number of guilds whose members could not be fetched."""
+    in_flight: int = 0
+    """The number of guilds whose members are being fetched."""
+    members: int = 0
+    """The number of members received."""
+
+    @property
+    def done(self) -> int:
+        """The number of guilds that were completed or failed."""
+        return self.completed + self.failed
+
+
+class GatewayMemberPrefetcher:
+    """
+    This class is responsible for fetching the members of many guilds, for
+    example to warm a member cache after `READY`.
+
+    The gateway takes one guild per member request, so requests can't be
+    batched. Instead, up to `concurrency` requests are kept in flight, which
+    keeps the sender's queue fed so requests are sent as fast as its rate
+    limiter allows, without queueing a request for every guild at once.
+    Requests are sent with `MessagePriority.LOW` by default, so other traffic
+    keeps its share of the rate budget.
+
+    Guild IDs are taken from the given iterable only when a request slot is
+    free, and chunks are passed to `on_chunk` as they arrive and not kept, so
+    memory is bounded by `concurrency` whatever the number of guilds.
+
+    A request that fails because the connection was lost or a chunk timed out
+    is retried with exponential backoff, so a reconnect doesn't fail every
+    remaining guild. The next guild is only taken once the retries of the
+    current one succeeded or ran out. The chunks of a failed attempt may be
+    passed to `on_chunk` again when the guild is retried.
+    """
+
+    def __init__(
+        self,
+        requester: SupportsMemberRequests,
+        concurrency: int = 10,
+        presences: bool = False,
+        chunk_timeout: float | None = MEMBER_CHUNK_TIMEOUT,
+        priority: MessagePriority = MessagePriority.LOW,
+        on_chunk: (
+            typing.Callable[
+                [GatewayGuildMembersChunkEventPayloadData], typing.Awaitable[None]
+            ]
+            | None
+        ) = None,
+        on_progress: typing.Callable[[MemberPrefetchProgress], None] | None = None,
+        retries: int = 5,
+        retry_delay: float = 1.0,
+        logger: logging.Logger = logging.getLogger(__name__),
+    ) -> None:
+        """
+        Initialize the prefetcher.
+
+        :param requester: The client or shard manager to request members from.
+        :param concurrency: The maximum number of requests in flight.
+        :param presences: Whether to request the presences of the members.
+        :param chunk_timeout: The seconds to wait for each chunk.
+        :param priority: The priority to send the requests with.
+        :param on_chunk: The function to await with every received chunk.
+        :param on_progress: The function to call with the progress every time
+                            the members of a guild were fetched or failed.
+        :param retries: The number of times a failed request is retried before
+                        the guild is counted as failed.
+        :param retry_delay: The seconds to wait before the first retry. The
+                            delay doubles with every retry.
+        :param logger: The logger to use. Defaults to the logger of this module.
+        """
+        self.requester = requester
+        self.concurrency = concurrency
+        self.presences = presences
+        self.chunk_timeout = chunk_timeout
+        self.priority = priority
+        self.on_chunk = on_chunk
+        self.on_progress = on_progress
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.progress = MemberPrefetchProgress(None)
+        self._logger = logger
+
+    async def run(
+        self, guild_ids: typing.Iterable[Snowflake]
+    ) -> MemberPrefetchProgress:
+        """
+        Fetch the members of the given guilds.
+
+        A guild that still fails after its retries, because a chunk timed out
+        or the connection was lost, is counted and logged, and the other guilds
+        are still fetched.
+
+        :param guild_ids: The IDs of the guilds to fetch the members of.
+        :return: The final progress.
+        """
+        self.progress = MemberPrefetchProgress(
+            len(guild_ids) if isinstance(guild_ids, collections.abc.Sized) else None
+        )
+        guild_id_iterator = iter(guild_ids)
+
+        await asyncio.gather(
+            *(self._fetch(guild_id_iterator) for _ in range(self.concurrency))
+        )
+        self._logger.info(
+            "Fetched members of %d guilds, %d failed, %d members received",
+            self.progress.completed,
+            self.progress.failed,
+            self.progress.members,
+        )
+
+        return self.progress
+
+    async def _fetch(self, guild_ids: typing.Iterator[Snowflake]) -> None:
+        """
+        Fetch the members of guilds one after the other until none are left.
+
+        :param guild_ids: The IDs of the guilds, shared between all fetchers.
+        """
+        progress = self.progress
+
+        for guild_id in guild_ids:
+            progress.in_flight += 1
+
+            try:
+                await self._fetch_guild(guild_id)
+            except (GatewayException, asyncio.TimeoutError) as e:
+                progress.failed += 1
+                self._logger.warning(
+                    "Failed to fetch the members of guild %s: %r", guild_id, e
+                )
+            except Exception:
+                progress.failed += 1
+                self._logger.exception(
+                    "Error handling the members of guild %s", guild_id
+                )
+            else:
+                progress.completed += 1
+            finally:
+                progress.in_flight -= 1
+
+            if self.on_progress is not None:
+                self.on_progress(progress)
+
+    async def _fetch_guild(self, guild_id: Snowflake) -> None:
+        """
+        Fetch the members of a guild, retrying with exponential backoff when the
+        connection is lost or a chunk times out.
+
+        :param guild_id: The ID of the guild.
+        :raises GatewayConnectionException: If the connection was lost on the
+                                            last attempt.
+        :raises asyncio.TimeoutError: If a chunk timed out on the last attempt.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                async for chunk in self.requester.request_guild_members(
+                    guild_id,
+                    presences=self.presences,
+                    chunk_timeout=self.chunk_timeout,
+                    priority=self.priority,
+                ):
+                    self.progress.members += len(chunk["members"])
+
+                    if self.on_chunk is not None:
+                        await self.on_chunk(chunk)
+
+                return
+            except (GatewayConnectionException, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise
+
+                delay = self.retry_delay * 2**attempt
+                self._logger.debug(
+                    "Retrying the members of guild %s in %.2fs: %r", guild_id, delay, e
+                )
+                await asyncio.sleep(delay)
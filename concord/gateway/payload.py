@@ -0,0 +1,279 @@
+import dataclasses
+import re
+import typing
+
+from .codec import GatewayCodec, MsgspecCodec
+from .encoding import GatewayEncoding
+
+try:
+    import msgspec
+
+    HAS_MSGSPEC = True
+except ImportError:
+    HAS_MSGSPEC = False
+
+__all__ = (
+    "LazyPayload",
+    "GatewayPayloadDecoder",
+)
+
+_NAME = r'(null|"[A-Z0-9_]+")'
+_SEQUENCE = r"(null|\d+)"
+_ENVELOPE_PREFIX = rf'\{{"t":{_NAME},"s":{_SEQUENCE},"op":(\d+),"d":'
+"""Matches `{"t":..,"s":..,"op":..,"d":`, the key order the gateway sends."""
+_OPCODE_PREFIX = r'\{"op":(\d+),"d":'
+"""Matches the start of `{"op":..,"d":..,"s":..,"t":..}`, the documented key order."""
+_SEQUENCE_SUFFIX = rf',"s":{_SEQUENCE},"t":{_NAME}\}}\Z'
+"""Matches the end of `{"op":..,"d":..,"s":..,"t":..}`."""
+_SUFFIX_SEARCH_LENGTH = 64
+"""How many characters from the end the suffix is searched in."""
+
+
+@dataclasses.dataclass(frozen=True)
+class _EnvelopePatterns[T: (str, bytes)]:
+    """The patterns to extract an envelope from a text or binary payload with."""
+
+    envelope_prefix: re.Pattern[T]
+    opcode_prefix: re.Pattern[T]
+    sequence_suffix: re.Pattern[T]
+    null: T
+    end: T
+
+
+_TEXT_PATTERNS = _EnvelopePatterns(
+    re.compile(_ENVELOPE_PREFIX),
+    re.compile(_OPCODE_PREFIX),
+    re.compile(_SEQUENCE_SUFFIX),
+    "null",
+    "}",
+)
+_BINARY_PATTERNS = _EnvelopePatterns(
+    re.compile(_ENVELOPE_PREFIX.encode()),
+    re.compile(_OPCODE_PREFIX.encode()),
+    re.compile(_SEQUENCE_SUFFIX.encode()),
+    b"null",
+    b"}",
+)
+
+
+class LazyPayload(typing.Mapping[str, typing.Any]):
+    """
+    A gateway payload whose `op`, `s` and `t` are decoded, but whose `d` is only
+    decoded the first time it is accessed.
+
+    Looking up `d`, or using the payload as a whole, for example by iterating
+    over it or copying it, decodes `d`. Looking up the other keys never does.
+
+    The payload is a read-only mapping rather than a `dict`, because encoders
+    like `orjson` and `msgspec` read the storage of a `dict` directly and would
+    leave out a `d` that is not decoded yet. The codecs of this package encode
+    it like a `dict`, other encoders reject it.
+    """
+
+    __slots__ = ("_payload", "_decode")
+
+    def __init__(
+        self,
+        envelope: typing.Dict[str, typing.Any],
+        decode: typing.Callable[[], typing.Any],
+    ) -> None:
+        """
+        Initialize the payload.
+
+        :param envelope: The decoded `op`, `s` and `t` of the payload.
+        :param decode: The function that decodes `d`.
+        """
+        self._payload = envelope
+        self._decode: typing.Callable[[], typing.Any] | None = decode
+
+    @property
+    def decoded(self) -> bool:
+        """Whether `d` has been decoded."""
+        return self._decode is None
+
+    def __getitem__(self, key: str) -> typing.Any:
+        if key == "d":
+            self._load()
+
+        return self._payload[key]
+
+    def __contains__(self, key: object) -> bool:
+        return (key == "d" and self._decode is not None) or key in self._payload
+
+    def get(self, key: str, default: typing.Any = None) -> typing.Any:
+        if key == "d":
+            self._load()
+
+        return self._payload.get(key, default)
+
+    def __iter__(self) -> typing.Iterator[str]:
+        self._load()
+        return iter(self._payload)
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._payload)
+
+    def __repr__(self) -> str:
+        self._load()
+        return repr(self._payload)
+
+    def __eq__(self, other: object) -> bool:
+        self._load()
+        return self._payload == other
+
+    def __reduce__(self) -> typing.Tuple[typing.Any, ...]:
+        self._load()
+        return (dict, (dict(self._payload),))
+
+    def keys(self) -> typing.KeysView[str]:
+        self._load()
+        return self._payload.keys()
+
+    def values(self) -> typing.ValuesView[typing.Any]:
+        self._load()
+        return self._payload.values()
+
+    def items(self) -> typing.ItemsView[str, typing.Any]:
+        self._load()
+        return self._payload.items()
+
+    def copy(self) -> typing.Dict[str, typing.Any]:
+        self._load()
+        return dict(self._payload)
+
+    def _load(self) -> None:
+        """Decode `d`, unless it has already been decoded."""
+        if self._decode is None:
+            return
+
+        decode = self._decode
+        self._decode = None
+        self._payload["d"] = decode()
+
+
+if HAS_MSGSPEC:
+
+    class _MsgspecEnvelope(msgspec.Struct):  # type: ignore[misc, unused-ignore]
+        """The envelope of a payload, with `d` left undecoded."""
+
+        op: int
+        d: msgspec.Raw = msgspec.Raw()
+        s: int | None = None
+        t: str | None = None
+
+
+class GatewayPayloadDecoder:
+    """
+    This class is responsible for decoding received payloads lazily.
+
+    For JSON, only `op`, `s` and `t` are extracted when a payload is received,
+    and `d` is decoded with the codec when a handler accesses it. Events no
+    handler looks at are therefore never fully decoded.
+
+    With `MsgspecCodec`, the envelope is decoded by `msgspec` with `d` kept as
+    raw JSON, which works for any key order. Other JSON codecs recognize the
+    key orders the gateway uses with regular expressions, and decode payloads
+    in any other shape fully. ETF payloads are always decoded fully.
+    """
+
+    def __init__(self, codec: GatewayCodec) -> None:
+        """
+        Initialize the decoder.
+
+        :param codec: The codec to decode payloads with.
+        """
+        self._codec = codec
+        self._lazy = codec.encoding is GatewayEncoding.JSON
+        self._envelope_decoder: typing.Any = None
+
+        if HAS_MSGSPEC and isinstance(codec, MsgspecCodec):
+            self._envelope_decoder = msgspec.json.Decoder(_MsgspecEnvelope)
+
+    def decode(self, data: str | bytes) -> typing.Any:
+        """
+        Decode a received payload.
+
+        :param data: The data to decode.
+        :return: The decoded payload, a `LazyPayload` if `d` could be left
+                 undecoded.
+        """
+        if not self._lazy:
+            return self._codec.decode(data)
+
+        if self._envelope_decoder is not None:
+            return self._decode_msgspec(data)
+
+        if isinstance(data, str):
+            payload = self._decode_envelope(data, _TEXT_PATTERNS)
+        else:
+            payload = self._decode_envelope(data, _BINARY_PATTERNS)
+
+        if payload is None:
+            return self._codec.decode(data)
+
+        return payload
+
+    def _decode_msgspec(self, data: str | bytes) -> LazyPayload:
+        """
+        Decode the envelope of a payload with `msgspec`.
+
+        :param data: The data to decode.
+        :return: The decoded payload.
+        """
+        envelope = self._envelope_decoder.decode(data)
+        raw = envelope.d
+
+        return LazyPayload(
+            {"op": envelope.op, "s": envelope.s, "t": envelope.t},
+            lambda: self._codec.decode(raw) if len(raw) else None,
+        )
+
+    def _decode_envelope[
+        T: (str, bytes)
+    ](self, data: T, patterns: _EnvelopePatterns[T]) -> LazyPayload | None:
+        """
+        Extract the envelope of a payload with regular expressions.
+
+        :param data: The data to decode.
+        :param patterns: The patterns matching the type of the data.
+        :return: The decoded payload, or `None` if the payload is not in a shape
+                 that is recognized.
+        """
+        match = patterns.envelope_prefix.match(data)
+
+        if match is not None and data.endswith(patterns.end):
+            (name, sequence, opcode) = match.groups()
+            raw = data[match.end() : -1]
+        else:
+            match = patterns.opcode_prefix.match(data)
+
+            if match is None:
+                return None
+
+            suffix = patterns.sequence_suffix.search(
+                data, max(match.end(), len(data) - _SUFFIX_SEARCH_LENGTH)
+            )
+
+            if suffix is None:
+                return None
+
+            (opcode,) = match.groups()
+            (sequence, name) = suffix.groups()
+            raw = data[match.end() : suffix.start()]
+
+        if name != patterns.null:
+            name = name[1:-1]
+
+        return LazyPayload(
+            {
+                "op": int(opcode),
+                "s": None if sequence == patterns.null else int(sequence),
+                "t": (
+                    None
+                    if name == patterns.null
+                    else name if isinstance(name, str) else name.decode()
+                ),
+            },
+            lambda: self._codec.decode(raw),
+        )
@@ -0,0 +1,134 @@
+import asyncio
+import collections
+import time
+import typing
+
+__all__ = (
+    "GatewayIdentifyLimiter",
+    "IdentifyConcurrencyLimiter",
+    "GatewaySendRateLimiter",
+)
+
+IDENTIFY_INTERVAL = 5.0
+"""Seconds that must pass between two identifies in the same bucket."""
+
+
+class GatewayIdentifyLimiter(typing.Protocol):
+    """Interface for limiting how fast shards can identify."""
+
+    async def acquire(self, shard_id: int) -> None:
+        """
+        Wait until the shard is allowed to identify.
+
+        :param shard_id: The ID of the shard that wants to identify.
+        """
+        ...
+
+
+class IdentifyConcurrencyLimiter:
+    """
+    This class is responsible for scheduling identifies according to the
+    `max_concurrency` of the bot.
+
+    Shards are grouped into `max_concurrency` buckets by `shard_id % max_concurrency`.
+    Every bucket may identify once every five seconds, so the buckets identify in
+    parallel while the shards in one bucket identify one after the other.
+
+    See [here](https://discord.com/developers/docs/topics/gateway#sharding-max-concurrency)
+    for Discord's documentation.
+    """
+
+    def __init__(
+        self, max_concurrency: int = 1, interval: float = IDENTIFY_INTERVAL
+    ) -> None:
+        """
+        Initialize the limiter.
+
+        :param max_concurrency: The `max_concurrency` of the bot.
+        :param interval: The seconds between two identifies in the same bucket.
+        """
+        self.max_concurrency = max_concurrency
+        self.interval = interval
+        self._locks: typing.Dict[int, asyncio.Lock] = {}
+        self._next_identify_at: typing.Dict[int, float] = {}
+
+    async def acquire(self, shard_id: int) -> None:
+        """
+        Wait until the shard is allowed to identify.
+
+        :param shard_id: The ID of the shard that wants to identify.
+        """
+        bucket = shard_id % self.max_concurrency
+        lock = self._locks.setdefault(bucket, asyncio.Lock())
+        loop = asyncio.get_running_loop()
+
+        async with lock:
+            delay = self._next_identify_at.get(bucket, 0.0) - loop.time()
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            self._next_identify_at[bucket] = loop.time() + self.interval
+
+
+class GatewaySendRateLimiter:
+    """
+    This class is responsible for keeping the messages sent on a connection
+    within the gateway's send rate limit.
+
+    The sends of the last `per` seconds are counted in a sliding window, so no
+    window of `per` seconds ever contains more than `limit` sends. The last
+    `reserved` sends of every window are only available to reserved traffic,
+    so heartbeats can always be sent.
+
+    See [here](https://discord.com/developers/docs/topics/gateway#rate-limiting)
+    for Discord's documentation.
+    """
+
+    def __init__(self, limit: int = 120, per: float = 60.0, reserved: int = 5) -> None:
+        """
+        Initialize the limiter.
+
+        :param limit: The number of sends allowed per window.
+        :param per: The length of the window in seconds.
+        :param reserved: The number of sends per window kept for reserved traffic.
+        """
+        self.limit = limit
+        self.per = per
+        self.reserved = reserved
+        self._sends: typing.Deque[float] = collections.deque()
+
+    def delay(self, reserved: bool = False) -> float:
+        """
+        Get the seconds to wait until a message may be sent.
+
+        :param reserved: Whether the message may use the reserved sends.
+        :return: The seconds to wait, or `0` if the message may be sent now.
+        """
+        now = time.monotonic()
+        self._prune(now)
+        allowance = self.limit if reserved else self.limit - self.reserved
+
+        if len(self._sends) < allowance:
+            return 0.0
+
+        return self._sends[len(self._sends) - allowance] + self.per - now
+
+    def record(self) -> None:
+        """Record that a message was sent."""
+        self._sends.append(time.monotonic())
+
+    @property
+    def remaining(self) -> int:
+        """The number of sends left in the current window, including reserved ones."""
+        self._prune(time.monotonic())
+        return self.limit - len(self._sends)
+
+    def _prune(self, now: float) -> None:
+        """
+        Forget the sends that left the window.
+
+        :param now: The current time.
+        """
+        while self._sends and self._sends[0] <= now - self.per:
+            self._sends.popleft()
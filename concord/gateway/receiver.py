@@ -1,9 +1,15 @@
 import asyncio
 import logging
+import typing
 
 import aiohttp
 
-from .dispatcher import GatewayEventDispatcher
+from .codec import GatewayCodec, JsonCodec
+from .compression import GatewayDecompressor
+from .dispatcher import SupportsDispatch
+from .errors import GatewayReconnectException
+from .payload import GatewayPayloadDecoder
+from .types.receive import GatewayReceiveOpcode
 
 __all__ = ("GatewayMessageReceiver",)
 
@@ -12,45 +18,95 @@ class GatewayMessageReceiver:
     """
     This class is repsonsible for receiving messages from the gateway and
     passing them on to the dispatcher.
+
+    JSON payloads are decoded lazily with a `GatewayPayloadDecoder`, so the data
+    of an event is only decoded once a handler accesses it.
+
+    The receiver also acts as a watchdog for half-open connections: if no frame
+    is received for `frame_timeout` seconds, the receive loop ends with a
+    `GatewayReconnectException`.
+
+    When `event_filter` is given, dispatch events whose name it rejects are
+    dropped right after their envelope is decoded, so their data is never
+    decoded. The sequence number of every dispatch event is still reported to
+    `on_sequence`, so heartbeats and resumes stay correct.
     """
 
     def __init__(
         self,
         loop: asyncio.AbstractEventLoop,
+        codec: GatewayCodec | None = None,
+        frame_timeout: float | None = None,
+        event_filter: typing.Callable[[str], bool] | None = None,
+        on_sequence: typing.Callable[[int], None] | None = None,
         logger: logging.Logger = logging.getLogger(__name__),
     ) -> None:
         """
         Initialize the receiver.
 
         :param loop: The event loop to use.
+        :param codec: The codec to decode received payloads with. Defaults to
+                      the standard library JSON codec.
+        :param frame_timeout: The seconds without a frame after which the
+                              connection is considered dead. `None` disables
+                              the watchdog.
+        :param event_filter: The function that decides whether a dispatch
+                             event with the given name is passed on. Defaults
+                             to passing on all events.
+        :param on_sequence: The function to call with the sequence number of
+                            every received dispatch event.
         :param logger: The logger to use. Defaults to the logger of this module.
         """
         self._loop = loop
+        self._codec = codec or JsonCodec()
+        self._decoder = GatewayPayloadDecoder(self._codec)
+        self.frame_timeout = frame_timeout
+        self.event_filter = event_filter
+        self.on_sequence = on_sequence
+        self.skipped_events = 0
         self._logger = logger
+        self._last_frame_at: float | None = None
         self._receive_loop_task: asyncio.Task[None] | None = None
 
     def start(
-        self, ws: aiohttp.ClientWebSocketResponse, dispatcher: GatewayEventDispatcher
+        self,
+        ws: aiohttp.ClientWebSocketResponse,
+        dispatcher: SupportsDispatch,
+        decompressor: GatewayDecompressor | None = None,
     ) -> asyncio.Task[None]:
         """
         Start the receiver with the given websocket and dispatcher.
 
         :param ws: The websocket to receive from.
         :param dispatcher: The dispatcher to pass messages to.
+        :param decompressor: The decompressor to use for binary messages. Must be
+                             given if transport compression is enabled.
         :return: The task running the receive loop.
         """
         self._logger.debug("Starting receiver")
+        self._last_frame_at = self._loop.time()
         self._receive_loop_task = self._loop.create_task(
-            self._receive_loop(ws, dispatcher)
+            self._receive_loop(ws, dispatcher, decompressor)
         )
 
         return self._receive_loop_task
 
+    @property
+    def time_since_last_frame(self) -> float | None:
+        """
+        The seconds since the last frame was received, or since the receiver was
+        started if no frame was received yet. `None` if it was never started.
+        """
+        if self._last_frame_at is None:
+            return None
+
+        return self._loop.time() - self._last_frame_at
+
     async def stop(self) -> None:
         """Stop the receiver."""
         self._logger.debug("Stopping receiver")
 
-        if self._receive_loop_task:
+        if self._receive_loop_task and not self._receive_loop_task.done():
             self._receive_loop_task.cancel()
 
             try:
@@ -60,7 +116,10 @@ class GatewayMessageReceiver:
                 raise
 
     async def _receive_loop(
-        self, ws: aiohttp.ClientWebSocketResponse, dispatcher: GatewayEventDispatcher
+        self,
+        ws: aiohttp.ClientWebSocketResponse,
+        dispatcher: SupportsDispatch,
+        decompressor: GatewayDecompressor | None,
     ) -> None:
         """
         Receive messages from the websocket until cancelled and pass them on to
@@ -68,14 +127,59 @@ class GatewayMessageReceiver:
 
         :param ws: The websocket to receive from.
         :param dispatcher: The dispatcher to pass messages to.
+        :param decompressor: The decompressor to use for binary messages.
+        :raises GatewayReconnectException: If no frame is received within
+                                           `frame_timeout` seconds.
         """
         while True:
-            message = await ws.receive()
+            try:
+                message = await ws.receive(self.frame_timeout)
+            except asyncio.TimeoutError:
+                raise GatewayReconnectException(
+                    f"No frame received in {self.frame_timeout:.1f}s"
+                )
+
+            self._last_frame_at = self._loop.time()
 
             if message.type == aiohttp.WSMsgType.TEXT:
-                self._logger.debug(f"Received message: {message}")
-                json_data = message.json()
-                await dispatcher.dispatch(json_data)
+                self._logger.debug("Received message: %d characters", len(message.data))
+                await self._dispatch(dispatcher, self._decoder.decode(message.data))
+            elif message.type == aiohttp.WSMsgType.BINARY:
+                data = message.data
+
+                if decompressor is not None:
+                    data = decompressor.decompress(data)
+
+                    if data is None:
+                        continue
+
+                self._logger.debug("Received binary message: %d bytes", len(data))
+                await self._dispatch(dispatcher, self._decoder.decode(data))
             else:
-                self._logger.info(f"Received unexpected message: {message}")
+                self._logger.info("Received unexpected message: %s", message)
                 break
+
+    async def _dispatch(
+        self, dispatcher: SupportsDispatch, payload: typing.Any
+    ) -> None:
+        """
+        Record the sequence number of a payload and pass it on to the dispatcher,
+        unless it is a dispatch event that is filtered out.
+
+        :param dispatcher: The dispatcher to pass the payload to.
+        :param payload: The decoded payload.
+        """
+        sequence = payload.get("s")
+
+        if sequence is not None and self.on_sequence is not None:
+            self.on_sequence(sequence)
+
+        if (
+            self.event_filter is not None
+            and payload.get("op") == GatewayReceiveOpcode.DISPATCH
+            and not self.event_filter(payload.get("t"))
+        ):
+            self.skipped_events += 1
+            return
+
+        await dispatcher.dispatch(payload)
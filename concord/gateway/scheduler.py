@@ -0,0 +1,248 @@
+import asyncio
+import collections
+import dataclasses
+import enum
+import time
+import typing
+
+from .types.send import GatewayMessage
+
+__all__ = (
+    "MessagePriority",
+    "ScheduledMessage",
+    "GatewayMessageScheduler",
+)
+
+
+class MessagePriority(enum.IntEnum):
+    """Priority levels for messages."""
+
+    EMERGENCY = 0
+    HIGH = 10
+    MEDIUM = 100
+    LOW = 1000
+
+
+@dataclasses.dataclass(slots=True)
+class ScheduledMessage:
+    """A message waiting in the scheduler."""
+
+    message: GatewayMessage[typing.Any]
+    priority: MessagePriority
+    queued_at: float
+    """The `time.monotonic()` time the message was queued at."""
+    expires_at: float | None = None
+    """The `time.monotonic()` time after which the message is dropped."""
+    coalesce_key: typing.Hashable = None
+    """The key a later message replaces this message by, if any."""
+    sent_at: float | None = None
+    """The `time.monotonic()` time the message was sent at, once it was sent."""
+
+
+class GatewayMessageScheduler:
+    """
+    This class is responsible for deciding which queued message is sent next.
+
+    Every `MessagePriority` has its own FIFO queue, so messages of the same
+    priority are sent in the order they were queued. The oldest message of each
+    priority competes for the next send, and waiting messages are aged towards
+    higher priorities so that low priority traffic can't starve. Aging never
+    promotes a message to `MessagePriority.EMERGENCY`, which is kept for
+    heartbeats.
+
+    Every priority can be given a quota of queued messages. When a priority is
+    over its quota, its oldest message is dropped. Messages may also be given a
+    time to live, after which they are dropped instead of sent.
+
+    Messages queued with a coalesce key are last-write-wins: queuing a message
+    with the key of a message that is still queued replaces that message, so
+    only the latest one is sent.
+    """
+
+    def __init__(
+        self,
+        aging_interval: float | None = 5.0,
+        quotas: typing.Mapping[MessagePriority, int] | None = None,
+    ) -> None:
+        """
+        Initialize the scheduler.
+
+        :param aging_interval: The seconds a message must wait to be promoted by
+                               one priority. `None` disables aging.
+        :param quotas: The maximum number of queued messages per priority.
+                       Priorities without a quota are unbounded.
+        """
+        self.aging_interval = aging_interval
+        self.quotas: typing.Dict[MessagePriority, int] = dict(quotas or {})
+        self.dropped = 0
+        """The number of messages dropped because their priority was over quota."""
+        self.expired = 0
+        """The number of messages dropped because their time to live passed."""
+        self.coalesced = 0
+        """The number of messages replaced by a later message with the same key."""
+        self._priorities = sorted(MessagePriority)
+        self._queues: typing.Dict[MessagePriority, typing.Deque[ScheduledMessage]] = {
+            priority: collections.deque() for priority in self._priorities
+        }
+        self._coalesce_index: typing.Dict[typing.Hashable, ScheduledMessage] = {}
+        self._not_empty = asyncio.Event()
+
+    def __len__(self) -> int:
+        """The number of queued messages of all priorities."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def put(
+        self,
+        message: GatewayMessage[typing.Any],
+        priority: MessagePriority = MessagePriority.MEDIUM,
+        ttl: float | None = None,
+        coalesce_key: typing.Hashable = None,
+    ) -> ScheduledMessage:
+        """
+        Queue a message.
+
+        :param message: The message to queue.
+        :param priority: The priority of the message.
+        :param ttl: The seconds after which the message is dropped if it wasn't
+                    sent yet. `None` means the message never expires.
+        :param coalesce_key: The key of the message. A queued message with the
+                             same key is replaced, keeping its place in the
+                             queue if it has the same priority.
+        :return: The queued message.
+        """
+        now = time.monotonic()
+        expires_at = now + ttl if ttl is not None else None
+        previous = (
+            self._coalesce_index.get(coalesce_key) if coalesce_key is not None else None
+        )
+
+        if previous is not None:
+            self.coalesced += 1
+
+            if previous.priority == priority:
+                previous.message = message
+                previous.expires_at = expires_at
+                return previous
+
+            self._queues[previous.priority].remove(previous)
+
+        entry = ScheduledMessage(message, priority, now, expires_at, coalesce_key)
+        queue = self._queues[priority]
+        queue.append(entry)
+
+        if coalesce_key is not None:
+            self._coalesce_index[coalesce_key] = entry
+
+        quota = self.quotas.get(priority)
+
+        while quota is not None and len(queue) > quota:
+            self._forget(queue.popleft())
+            self.dropped += 1
+
+        self._not_empty.set()
+
+        return entry
+
+    def requeue(self, entry: ScheduledMessage) -> None:
+        """
+        Put a message that was taken from the scheduler back in front of its
+        priority, keeping the time it was originally queued at.
+
+        :param entry: The message to put back.
+        """
+        if entry.coalesce_key is not None:
+            if entry.coalesce_key in self._coalesce_index:
+                self.coalesced += 1
+                return
+
+            self._coalesce_index[entry.coalesce_key] = entry
+
+        self._queues[entry.priority].appendleft(entry)
+        self._not_empty.set()
+
+    async def get(self) -> ScheduledMessage:
+        """
+        Wait for the next message to send.
+
+        :return: The message that should be sent next.
+        """
+        while True:
+            entry = self.get_nowait()
+
+            if entry is not None:
+                return entry
+
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+    def get_nowait(self) -> ScheduledMessage | None:
+        """
+        Get the next message to send without waiting.
+
+        :return: The message that should be sent next, or `None` if no message
+                 is queued.
+        """
+        now = time.monotonic()
+        best: typing.Tuple[int, float] | None = None
+        best_queue: typing.Deque[ScheduledMessage] | None = None
+
+        for rank, priority in enumerate(self._priorities):
+            queue = self._queues[priority]
+            self._drop_expired(queue, now)
+
+            if not queue:
+                continue
+
+            head = queue[0]
+            key = (self._effective_rank(rank, now - head.queued_at), head.queued_at)
+
+            if best is None or key < best:
+                best = key
+                best_queue = queue
+
+        if best_queue is None:
+            return None
+
+        entry = best_queue.popleft()
+        self._forget(entry)
+
+        return entry
+
+    def _effective_rank(self, rank: int, waited: float) -> int:
+        """
+        Get the rank of a priority after aging.
+
+        :param rank: The index of the priority, `0` being the most important.
+        :param waited: The seconds the message has been waiting.
+        :return: The aged rank.
+        """
+        if self.aging_interval is None or rank <= 1:
+            return rank
+
+        return max(rank - int(waited // self.aging_interval), 1)
+
+    def _drop_expired(self, queue: typing.Deque[ScheduledMessage], now: float) -> None:
+        """
+        Drop the expired messages from the front of a queue.
+
+        Expired messages further back are dropped once they reach the front,
+        before they could be sent.
+
+        :param queue: The queue to drop the messages from.
+        :param now: The current time.
+        """
+        while queue and queue[0].expires_at is not None and queue[0].expires_at <= now:
+            self._forget(queue.popleft())
+            self.expired += 1
+
+    def _forget(self, entry: ScheduledMessage) -> None:
+        """
+        Remove a message that left its queue from the coalesce index.
+
+        :param entry: The message.
+        """
+        if (
+            entry.coalesce_key is not None
+            and self._coalesce_index.get(entry.coalesce_key) is entry
+        ):
+            del self._coalesce_index[entry.coalesce_key]
@@ -1,49 +1,80 @@
 import asyncio
-import enum
+import dataclasses
 import logging
+import time
 import typing
 
 import aiohttp
 
+from .codec import GatewayCodec, JsonCodec
+from .ratelimit import GatewaySendRateLimiter
+from .scheduler import GatewayMessageScheduler, MessagePriority, ScheduledMessage
 from .types.send import GatewayMessage
 
 __all__ = (
     "MessagePriority",
+    "GatewaySenderMetrics",
     "GatewayMessageSender",
 )
 
 
-class MessagePriority(enum.IntEnum):
-    """Priority levels for messages."""
+@dataclasses.dataclass
+class GatewaySenderMetrics:
+    """Metrics about the messages sent by a sender."""
 
-    EMERGENCY = 0
-    HIGH = 10
-    MEDIUM = 100
-    LOW = 1000
+    messages_sent: int = 0
+    rate_limited: int = 0
+    """How many times the send loop had to wait for the rate limit."""
+    total_queue_wait: float = 0.0
+    """Seconds the sent messages spent in the queue in total."""
+    max_queue_wait: float = 0.0
+    """The longest time in seconds a sent message spent in the queue."""
+    last_queue_wait: float = 0.0
+    """Seconds the last sent message spent in the queue."""
+
+    @property
+    def average_queue_wait(self) -> float:
+        """Seconds the sent messages spent in the queue on average."""
+        return self.total_queue_wait / self.messages_sent if self.messages_sent else 0.0
 
 
 class GatewayMessageSender:
     """
     This class is responsible for sending messages to the gateway.
 
-    It uses a priority queue to ensure that messages can be prioritized.
+    It uses a `GatewayMessageScheduler` to ensure that messages can be
+    prioritized without starving low priority traffic, and a rate limiter to
+    stay within the gateway's send rate limit. Messages with
+    `MessagePriority.EMERGENCY` may use the sends the rate limiter reserves, so
+    heartbeats can always be sent.
     """
 
     def __init__(
         self,
         loop: asyncio.AbstractEventLoop,
+        codec: GatewayCodec | None = None,
+        rate_limiter: GatewaySendRateLimiter | None = None,
+        scheduler: GatewayMessageScheduler | None = None,
         logger: logging.Logger = logging.getLogger(__name__),
     ) -> None:
         """
         Initialize the sender.
 
         :param loop: The event loop to use.
+        :param codec: The codec to serialize messages with. Defaults to the
+                      standard library JSON codec.
+        :param rate_limiter: The rate limiter to pace messages with. Defaults to
+                             the gateway's limit of 120 sends per 60 seconds.
+        :param scheduler: The scheduler to queue messages in. Defaults to a
+                          scheduler with aging and no quotas.
         :param logger: The logger to use. Defaults to the logger of this module.
         """
         self._loop = loop
-        self.queue: asyncio.PriorityQueue[
-            typing.Tuple[int, GatewayMessage[typing.Any]]
-        ] = asyncio.PriorityQueue()
+        self._codec = codec or JsonCodec()
+        self.scheduler = scheduler or GatewayMessageScheduler()
+        self.rate_limiter = rate_limiter or GatewaySendRateLimiter()
+        self.metrics = GatewaySenderMetrics()
+        self._emergency_queued = asyncio.Event()
         self._logger = logger
         self._send_loop_task: asyncio.Task[None] | None = None
 
@@ -51,13 +82,26 @@ class GatewayMessageSender:
         self,
         message: GatewayMessage[typing.Any],
         priority: MessagePriority = MessagePriority.MEDIUM,
-    ) -> None:
+        ttl: float | None = None,
+        coalesce_key: typing.Hashable = None,
+    ) -> ScheduledMessage:
         """
         Send a message to the gateway.
 
         :param message: The message to send.
+        :param priority: The priority of the message.
+        :param ttl: The seconds after which the message is dropped if it wasn't
+                    sent yet. `None` means the message never expires.
+        :param coalesce_key: The key of the message. If a message with the same
+                             key is still queued, it is replaced by this one.
+        :return: The queued message. Its `sent_at` is set once it is sent.
         """
-        await self.queue.put((priority, message))
+        entry = self.scheduler.put(message, priority, ttl, coalesce_key)
+
+        if priority == MessagePriority.EMERGENCY:
+            self._emergency_queued.set()
+
+        return entry
 
     def start(self, ws: aiohttp.ClientWebSocketResponse) -> asyncio.Task[None]:
         """
@@ -91,7 +135,51 @@ class GatewayMessageSender:
         :param ws: The websocket to send messages to.
         """
         while True:
-            (_, message) = await self.queue.get()
-            serialized = message.serialize()
-            self._logger.debug(f"Sending message: {serialized}")
-            await ws.send_str(serialized)
+            entry = await self.scheduler.get()
+            delay = self.rate_limiter.delay(
+                reserved=entry.priority == MessagePriority.EMERGENCY
+            )
+
+            if delay > 0:
+                self.scheduler.requeue(entry)
+                await self._wait_for_rate_limit(delay)
+                continue
+
+            self.rate_limiter.record()
+            self._record_queue_wait(time.monotonic() - entry.queued_at)
+
+            serialized = entry.message.serialize(self._codec)
+            self._logger.debug("Sending message: %r", serialized)
+            entry.sent_at = time.monotonic()
+
+            if self._codec.binary:
+                await ws.send_bytes(serialized)
+            else:
+                await ws.send_str(serialized.decode())
+
+    async def _wait_for_rate_limit(self, delay: float) -> None:
+        """
+        Wait until the rate limit allows another send, or until an emergency
+        message is queued, whichever happens first.
+
+        :param delay: The seconds until the rate limit allows another send.
+        """
+        self.metrics.rate_limited += 1
+        self._logger.debug("Rate limited, waiting up to %.2fs", delay)
+        self._emergency_queued.clear()
+
+        try:
+            await asyncio.wait_for(self._emergency_queued.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    def _record_queue_wait(self, wait: float) -> None:
+        """
+        Record how long a sent message spent in the queue.
+
+        :param wait: The seconds the message spent in the queue.
+        """
+        self.metrics.messages_sent += 1
+        self.metrics.total_queue_wait += wait
+        self.metrics.last_queue_wait = wait
+        self.metrics.max_queue_wait = max(self.metrics.max_queue_wait, wait)
@@ -0,0 +1,281 @@
+import asyncio
+import collections.abc
+import logging
+import typing
+
+from concord.session import ClientSessionProvider, SharedClientSessionProvider
+from concord.types.common import DiscordApiVersion, Snowflake
+
+from .buffer import GatewayEventBuffer
+from .client import GatewayClient
+from .coalescer import CoalesceMode
+from .codec import GatewayCodec, get_default_codec
+from .compression import GatewayCompression
+from .dispatcher import GatewayEventDispatcher
+from .encoding import GatewayEncoding
+from .errors import GatewayException
+from .intents import Intents, plan_intents
+from .members import MEMBER_CHUNK_TIMEOUT
+from .ratelimit import GatewayIdentifyLimiter, IdentifyConcurrencyLimiter
+from .scheduler import MessagePriority
+from .types.common import GatewayActivity, GatewayPresenceStatus
+from .types.receive import (
+    GatewayDispatchEventPayload,
+    GatewayEventPayload,
+    GatewayGuildMembersChunkEventPayloadData,
+    GatewayReceiveOpcode,
+)
+
+__all__ = ("ShardManager",)
+
+
+class ShardManager:
+    """
+    This class is responsible for running multiple shards on one event loop.
+
+    Dispatch events of every shard are passed on to one shared dispatcher, and
+    identifies are scheduled according to the `max_concurrency` of the bot. All
+    shards connect with one shared session, so DNS lookups and the SSL context
+    are shared between them.
+    """
+
+    def __init__(
+        self,
+        intents: Intents | None,
+        shard_count: int,
+        shard_ids: typing.Iterable[int] | None = None,
+        max_concurrency: int = 1,
+        api_version: DiscordApiVersion = DiscordApiVersion.DEFAULT,
+        compression: GatewayCompression | None = None,
+        encoding: GatewayEncoding = GatewayEncoding.JSON,
+        codec: GatewayCodec | None = None,
+        identify_limiter: GatewayIdentifyLimiter | None = None,
+        session_provider: ClientSessionProvider | None = None,
+        dispatch_concurrency: int | None = None,
+        event_buffer: GatewayEventBuffer | None = None,
+        coalesce: typing.Mapping[str, CoalesceMode] | None = None,
+        coalesce_window: float = 0.5,
+        events: typing.Iterable[str] | None = None,
+        required_intents: Intents | None = None,
+        logger: logging.Logger = logging.getLogger(__name__),
+    ) -> None:
+        """
+        Initialize the shard manager.
+
+        :param intents: The intents to request. `None` requests the smallest
+                        intents causing the events handlers are registered for
+                        when the shards are started.
+        :param shard_count: The total number of shards of the bot.
+        :param shard_ids: The IDs of the shards to run. Defaults to all shards.
+        :param max_concurrency: The `max_concurrency` of the bot.
+        :param api_version: The API version to use.
+        :param compression: The transport compression to use. Defaults to no
+                            compression.
+        :param encoding: The payload encoding to use. Defaults to JSON.
+        :param codec: The codec to encode and decode payloads with. Overrides
+                      `encoding` when given.
+        :param identify_limiter: The limiter to wait on before identifying.
+                                 Defaults to a limiter for `max_concurrency`.
+        :param session_provider: The provider of the session the shards connect
+                                 with. A provider that is given is not closed by
+                                 the manager. Defaults to a provider owned by the
+                                 manager.
+        :param dispatch_concurrency: The maximum number of event handlers the
+                                     shared dispatcher runs at the same time.
+                                     Defaults to awaiting every handler in turn.
+        :param event_buffer: The buffer to queue events for the event handlers
+                             of the shared dispatcher in. Defaults to no buffer.
+        :param coalesce: The modes to coalesce the events of every shard with by
+                         event name, see `GatewayEventCoalescer`. Defaults to
+                         not coalescing.
+        :param coalesce_window: The seconds coalesced events are held back for.
+        :param events: The names of the dispatch events handlers are registered
+                       for. Other dispatch events are dropped by the shards
+                       without decoding their data, unless a handler,
+                       `next_event` or `wait_for` is registered for them on
+                       the shared dispatcher. Defaults to all events.
+        :param required_intents: The intents to request whatever events are
+                                 handled, such as `GUILD_MEMBERS` to request
+                                 all members of a guild. They are added to
+                                 planned intents and never reported as unused.
+        :param logger: The logger to use. Defaults to the logger of this module.
+        """
+        self.intents = intents
+        self.required_intents = required_intents
+        self.shard_count = shard_count
+        self.shard_ids = (
+            tuple(shard_ids) if shard_ids is not None else tuple(range(shard_count))
+        )
+        self.dispatch_concurrency = dispatch_concurrency
+        self.event_buffer = event_buffer
+        self._logger = logger
+        self._dispatcher: GatewayEventDispatcher | None = None
+        self._identify_limiter = identify_limiter or IdentifyConcurrencyLimiter(
+            max_concurrency
+        )
+        self._session_provider = session_provider or SharedClientSessionProvider()
+        self._owns_session_provider = session_provider is None
+        self.clients: typing.Dict[int, GatewayClient] = {}
+
+        shared_codec = codec if codec is not None else get_default_codec(encoding)
+        self._events = frozenset(events) if events is not None else None
+
+        for shard_id in self.shard_ids:
+            self.clients[shard_id] = GatewayClient(
+                intents,
+                api_version=api_version,
+                compression=compression,
+                codec=shared_codec,
+                shard=(shard_id, shard_count),
+                identify_limiter=self._identify_limiter,
+                session_provider=self._session_provider,
+                coalesce=coalesce,
+                coalesce_window=coalesce_window,
+                events=self._events,
+                check_intents=False,
+                logger=logger.getChild(str(shard_id)),
+            )
+
+    @property
+    def dispatcher(self) -> GatewayEventDispatcher:
+        """
+        The dispatcher the dispatch events of all shards are passed to.
+
+        It must first be accessed from a running event loop.
+        """
+        if self._dispatcher is None:
+            self._dispatcher = GatewayEventDispatcher(
+                asyncio.get_running_loop(),
+                self.dispatch_concurrency,
+                buffer=self.event_buffer,
+            )
+
+        return self._dispatcher
+
+    async def start(self, token: str) -> None:
+        """
+        Start all shards and run them until they are stopped.
+
+        :param token: The token to use for authentication.
+        :raises GatewayFatalException: If a shard can't recover from an error.
+                                       All shards are stopped in that case.
+        """
+        self._logger.info(
+            "Starting %d of %d shards", len(self.clients), self.shard_count
+        )
+
+        self.intents = plan_intents(
+            self.intents,
+            self._events if self._events is not None else self.dispatcher.events,
+            self.required_intents,
+            self._logger,
+        )
+
+        for client in self.clients.values():
+            client.intents = self.intents
+
+            if self.dispatcher not in client.event_dispatchers:
+                client.event_dispatchers.append(self.dispatcher)
+
+            if self._forward_dispatch not in client.dispatcher.handlers.get(
+                GatewayReceiveOpcode.DISPATCH, ()
+            ):
+                client.dispatcher.register_handler(
+                    GatewayReceiveOpcode.DISPATCH, self._forward_dispatch
+                )
+
+        try:
+            await asyncio.gather(
+                *(client.start(token) for client in self.clients.values())
+            )
+        except Exception:
+            await self.stop()
+            raise
+
+    def shard_for(self, guild_id: Snowflake) -> GatewayClient:
+        """
+        Get the shard that receives the events of a guild.
+
+        :param guild_id: The ID of the guild.
+        :raises GatewayException: If the shard of the guild is not run by this
+                                  manager.
+        :return: The client of the shard.
+        """
+        shard_id = (int(guild_id) >> 22) % self.shard_count
+
+        if shard_id not in self.clients:
+            raise GatewayException(f"Shard {shard_id} is not run by this manager")
+
+        return self.clients[shard_id]
+
+    def request_guild_members(
+        self,
+        guild_id: Snowflake,
+        query: str | None = None,
+        limit: int = 0,
+        presences: bool = False,
+        user_ids: Snowflake | collections.abc.Sequence[Snowflake] | None = None,
+        chunk_timeout: float | None = MEMBER_CHUNK_TIMEOUT,
+        priority: MessagePriority = MessagePriority.MEDIUM,
+    ) -> typing.AsyncIterator[GatewayGuildMembersChunkEventPayloadData]:
+        """
+        Request the members of a guild on the shard of the guild, see
+        `GatewayClient.request_guild_members`.
+
+        :param guild_id: The ID of the guild to request the members of.
+        :param query: The prefix usernames must start with.
+        :param limit: The maximum number of members to send.
+        :param presences: Whether to send the presences of the members.
+        :param user_ids: The IDs of the members to send.
+        :param chunk_timeout: The seconds to wait for each chunk.
+        :param priority: The priority to send the request with.
+        :raises GatewayException: If the shard of the guild is not run by this
+                                  manager.
+        :return: An iterator over the chunks.
+        """
+        return self.shard_for(guild_id).request_guild_members(
+            guild_id, query, limit, presences, user_ids, chunk_timeout, priority
+        )
+
+    async def update_presence(
+        self,
+        status: GatewayPresenceStatus = GatewayPresenceStatus.ONLINE,
+        activities: collections.abc.Iterable[GatewayActivity] = (),
+        afk: bool = False,
+        since: int | None = None,
+    ) -> None:
+        """
+        Update the presence of the bot on all shards, see
+        `GatewayClient.update_presence`.
+
+        :param status: The status of the bot.
+        :param activities: The activities of the bot.
+        :param afk: Whether the bot is AFK.
+        :param since: The Unix time in milliseconds the bot went idle at, if it
+                      is idle.
+        """
+        activities = list(activities)
+
+        await asyncio.gather(
+            *(
+                client.update_presence(status, activities, afk, since)
+                for client in self.clients.values()
+            )
+        )
+
+    async def stop(self) -> None:
+        """Stop all shards."""
+        self._logger.info("Stopping shards")
+
+        await asyncio.gather(*(client.stop() for client in self.clients.values()))
+
+        if self._owns_session_provider:
+            await self._session_provider.close()
+
+    async def _forward_dispatch(
+        self, payload: GatewayDispatchEventPayload[typing.Any]
+    ) -> None:
+        """Pass a dispatch event of a shard on to the shared dispatcher."""
+        await self.dispatcher.dispatch(
+            typing.cast(GatewayEventPayload[GatewayReceiveOpcode, typing.Any], payload)
+        )
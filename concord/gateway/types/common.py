@@ -77,7 +77,7 @@ class GatewayPresenceUpdate(typing.TypedDict):
     for Discord's documentation.
     """
 
-    since: int
+    since: int | None
     activities: typing.List[GatewayActivity]
     status: GatewayPresenceStatus
     afk: bool
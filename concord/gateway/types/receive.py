@@ -5,8 +5,9 @@ import collections.abc
 import enum
 import typing
 
+from concord.types.common import Snowflake
 from concord.types.resources.application import PartialApplication
-from concord.types.resources.guild import UnavailableGuild
+from concord.types.resources.guild import GuildMember, UnavailableGuild
 from concord.types.resources.user import User
 
 __all__ = (
@@ -19,9 +20,12 @@ __all__ = (
     "GatewayHeartbeatEventPayload",
     "GatewayHeartbeatAcknowledgeEventPayload",
     "GatewayReconnectEventPayload",
+    "GatewayInvalidSessionEventPayload",
     "GatewayDispatchEventPayload",
     "GatewayReadyEventPayloadData",
     "GatewayReadyEventPayload",
+    "GatewayGuildMembersChunkEventPayloadData",
+    "GatewayGuildMembersChunkEventPayload",
 )
 
 
@@ -130,6 +134,14 @@ See [here](https://discord.com/developers/docs/topics/gateway-events#reconnect)
 for Discord's documentation.
 """
 
+GatewayInvalidSessionEventPayload = GatewayEventPayload[
+    typing.Literal[GatewayReceiveOpcode.INVALID_SESSION], bool
+]
+"""
+See [here](https://discord.com/developers/docs/topics/gateway-events#invalid-session)
+for Discord's documentation.
+"""
+
 
 class GatewayDispatchEventPayload[T](
     GatewayEventPayload[typing.Literal[GatewayReceiveOpcode.DISPATCH], T]
@@ -164,3 +176,30 @@ GatewayReadyEventPayload = GatewayDispatchEventPayload[GatewayReadyEventPayloadD
 See [here](https://discord.com/developers/docs/topics/gateway#ready)
 for Discord's documentation.
 """
+
+
+class GatewayGuildMembersChunkEventPayloadData(typing.TypedDict):
+    """
+    See [here](https://discord.com/developers/docs/topics/gateway-events#guild-members-chunk)
+    for Discord's documentation.
+    """
+
+    guild_id: Snowflake
+    members: collections.abc.Sequence[GuildMember]
+    chunk_index: int
+    chunk_count: int
+    not_found: typing.NotRequired[collections.abc.Sequence[Snowflake]]
+    presences: typing.NotRequired[
+        collections.abc.Sequence[typing.Dict[str, typing.Any]]
+    ]
+    """Presence update events of the members."""
+    nonce: typing.NotRequired[str]
+
+
+GatewayGuildMembersChunkEventPayload = GatewayDispatchEventPayload[
+    GatewayGuildMembersChunkEventPayloadData
+]
+"""
+See [here](https://discord.com/developers/docs/topics/gateway-events#guild-members-chunk)
+for Discord's documentation.
+"""
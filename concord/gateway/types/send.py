@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import collections.abc
 import dataclasses
 import enum
-import json
 import typing
 
+from concord.types.common import Snowflake
+
+from ..codec import GatewayCodec, JsonCodec
 from .common import GatewayPresenceUpdate
 
 __all__ = (
@@ -16,6 +19,9 @@ __all__ = (
     "GatewayIdentifyMessageData",
     "GatewayIdentifyMessageConnectionProperties",
     "GatewayIdentifyMessage",
+    "GatewayRequestGuildMembersMessageData",
+    "GatewayRequestGuildMembersMessage",
+    "GatewayPresenceUpdateMessage",
 )
 
 
@@ -46,19 +52,20 @@ class GatewayMessage[T]:
     opcode: GatewaySendOpcode
     data: T
 
-    def serialize(self) -> str:
-        """Serialize the message to a string that can be sent to the gateway."""
-        return json.dumps(
+    def serialize(self, codec: GatewayCodec | None = None) -> bytes:
+        """
+        Serialize the message so that it can be sent to the gateway.
+
+        :param codec: The codec to use. Defaults to the standard library JSON codec.
+        :return: The encoded message.
+        """
+        return (codec or JsonCodec()).encode(
             {
                 "op": self.opcode,
                 "d": self.data,
             }
         )
 
-    def __lt__(self, _: GatewayMessage[typing.Any]) -> bool:
-        """Required for the priority queue."""
-        return True
-
 
 @dataclasses.dataclass(kw_only=True)
 class GatewayHeartbeatMessage(GatewayMessage[int | None]):
@@ -129,3 +136,43 @@ class GatewayIdentifyMessage(GatewayMessage[GatewayIdentifyMessageData]):
     """
 
     opcode: typing.Literal[GatewaySendOpcode.IDENTIFY] = GatewaySendOpcode.IDENTIFY
+
+
+class GatewayRequestGuildMembersMessageData(typing.TypedDict):
+    """
+    See [here](https://discord.com/developers/docs/topics/gateway-events#request-guild-members)
+    for Discord's documentation.
+    """
+
+    guild_id: Snowflake
+    query: typing.NotRequired[str]
+    limit: int
+    presences: typing.NotRequired[bool]
+    user_ids: typing.NotRequired[Snowflake | collections.abc.Sequence[Snowflake]]
+    nonce: typing.NotRequired[str]
+
+
+@dataclasses.dataclass(kw_only=True)
+class GatewayRequestGuildMembersMessage(
+    GatewayMessage[GatewayRequestGuildMembersMessageData]
+):
+    """
+    See [here](https://discord.com/developers/docs/topics/gateway-events#request-guild-members-request-guild-members-structure)
+    for Discord's documentation.
+    """
+
+    opcode: typing.Literal[GatewaySendOpcode.REQUEST_GUILD_MEMBERS] = (
+        GatewaySendOpcode.REQUEST_GUILD_MEMBERS
+    )
+
+
+@dataclasses.dataclass(kw_only=True)
+class GatewayPresenceUpdateMessage(GatewayMessage[GatewayPresenceUpdate]):
+    """
+    See [here](https://discord.com/developers/docs/topics/gateway-events#update-presence)
+    for Discord's documentation.
+    """
+
+    opcode: typing.Literal[GatewaySendOpcode.PRESENCE_UPDATE] = (
+        GatewaySendOpcode.PRESENCE_UPDATE
+    )
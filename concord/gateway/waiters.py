@@ -0,0 +1,202 @@
+import asyncio
+import dataclasses
+import typing
+
+from .types.receive import GatewayDispatchEventPayload
+
+__all__ = (
+    "WAITER_KEYS",
+    "get_waiter_keys",
+    "GatewayEventWaiters",
+)
+
+WAITER_KEYS = ("nonce", "message_id", "user_id", "channel_id")
+"""The keys waiters can be indexed by, from the most to the least selective."""
+
+_MESSAGE_EVENTS = frozenset(("MESSAGE_CREATE", "MESSAGE_UPDATE", "MESSAGE_DELETE"))
+"""The events whose `id` is the ID of a message."""
+
+
+def get_waiter_keys(
+    payload: GatewayDispatchEventPayload[typing.Any],
+) -> typing.Dict[str, str]:
+    """
+    Get the values of the waiter keys of a dispatch event.
+
+    The values are converted to strings, so snowflakes match whether they were
+    decoded from JSON or from ETF.
+
+    :param payload: The payload of the event.
+    :return: The values by key, for the keys the event has a value for.
+    """
+    data = payload["d"]
+
+    if not isinstance(data, dict):
+        return {}
+
+    message = data.get("message")
+    author = data.get("author")
+    user = data.get("user")
+    member = data.get("member")
+
+    values = {
+        "nonce": data.get("nonce"),
+        "message_id": (
+            data.get("id")
+            if payload["t"] in _MESSAGE_EVENTS
+            else data.get("message_id")
+            or (message.get("id") if isinstance(message, dict) else None)
+        ),
+        "user_id": (
+            data.get("user_id")
+            or (author.get("id") if isinstance(author, dict) else None)
+            or (user.get("id") if isinstance(user, dict) else None)
+            or (
+                member["user"].get("id")
+                if isinstance(member, dict) and isinstance(member.get("user"), dict)
+                else None
+            )
+        ),
+        "channel_id": data.get("channel_id"),
+    }
+
+    return {key: str(value) for (key, value) in values.items() if value is not None}
+
+
+@dataclasses.dataclass(eq=False, slots=True)
+class _Waiter:
+    """A future waiting for a dispatch event."""
+
+    future: asyncio.Future[GatewayDispatchEventPayload[typing.Any]]
+    keys: typing.Dict[str, str]
+    check: typing.Callable[[GatewayDispatchEventPayload[typing.Any]], bool] | None
+    index: typing.Tuple[str, str] | None
+    """The key and value the waiter is indexed by, if any."""
+
+
+class GatewayEventWaiters:
+    """
+    This class is responsible for resolving futures waiting for dispatch events.
+
+    Waiters are indexed by the most selective of the `WAITER_KEYS` they were
+    given, so an event is only matched against the waiters for the values it
+    has, instead of against every waiter for its event name. Waiters are removed
+    as soon as they are resolved, cancelled or time out.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Initialize the waiters.
+
+        :param loop: The event loop to use.
+        """
+        self._loop = loop
+        self._waiters: typing.Dict[
+            str, typing.Dict[typing.Tuple[str, str] | None, typing.List[_Waiter]]
+        ] = {}
+
+    def __contains__(self, event: object) -> bool:
+        return event in self._waiters
+
+    @property
+    def events(self) -> typing.FrozenSet[str]:
+        """The names of the events that are waited for."""
+        return frozenset(self._waiters)
+
+    def __len__(self) -> int:
+        return sum(
+            len(waiters)
+            for index in self._waiters.values()
+            for waiters in index.values()
+        )
+
+    def add(
+        self,
+        event: str,
+        check: (
+            typing.Callable[[GatewayDispatchEventPayload[typing.Any]], bool] | None
+        ) = None,
+        keys: typing.Mapping[str, typing.Any] | None = None,
+    ) -> asyncio.Future[GatewayDispatchEventPayload[typing.Any]]:
+        """
+        Add a waiter for a dispatch event.
+
+        :param event: The name of the event to wait for.
+        :param check: The predicate the event must satisfy.
+        :param keys: The values of the `WAITER_KEYS` the event must have.
+        :raises ValueError: If a key is not one of the `WAITER_KEYS`.
+        :return: The future resolved with the payload of the matching event.
+        """
+        normalized = {
+            key: str(value)
+            for (key, value) in (keys or {}).items()
+            if value is not None
+        }
+
+        for key in normalized:
+            if key not in WAITER_KEYS:
+                raise ValueError(f"Unknown waiter key: {key}")
+
+        index = next(
+            ((key, normalized[key]) for key in WAITER_KEYS if key in normalized), None
+        )
+        waiter = _Waiter(self._loop.create_future(), normalized, check, index)
+
+        self._waiters.setdefault(event, {}).setdefault(index, []).append(waiter)
+        waiter.future.add_done_callback(lambda _: self._remove(event, waiter))
+
+        return waiter.future
+
+    def resolve(self, payload: GatewayDispatchEventPayload[typing.Any]) -> None:
+        """
+        Resolve the waiters matching a dispatch event.
+
+        A waiter whose check raises an exception is resolved with that exception.
+
+        :param payload: The payload of the event.
+        """
+        index = self._waiters.get(payload["t"])
+
+        if index is None:
+            return
+
+        values = get_waiter_keys(payload)
+        candidates = list(index.get(None, ()))
+
+        for key, value in values.items():
+            candidates.extend(index.get((key, value), ()))
+
+        for waiter in candidates:
+            if waiter.future.done() or any(
+                values.get(key) != value for (key, value) in waiter.keys.items()
+            ):
+                continue
+
+            try:
+                if waiter.check is not None and not waiter.check(payload):
+                    continue
+            except Exception as e:
+                waiter.future.set_exception(e)
+                continue
+
+            waiter.future.set_result(payload)
+
+    def _remove(self, event: str, waiter: _Waiter) -> None:
+        """
+        Remove a waiter once its future is done.
+
+        :param event: The name of the event the waiter waits for.
+        :param waiter: The waiter to remove.
+        """
+        index = self._waiters.get(event)
+
+        if index is None or waiter not in index.get(waiter.index, ()):
+            return
+
+        index[waiter.index].remove(waiter)
+
+        if not index[waiter.index]:
+            del index[waiter.index]
+
+        if not index:
+            del self._waiters[event]
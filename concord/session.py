@@ -0,0 +1,101 @@
+import ssl
+import typing
+
+import aiohttp
+
+__all__ = (
+    "ClientSessionProvider",
+    "SharedClientSessionProvider",
+)
+
+
+class ClientSessionProvider(typing.Protocol):
+    """Interface for providing the `aiohttp.ClientSession` connections are made with."""
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the session to make connections with.
+
+        :return: The session.
+        """
+        ...
+
+    async def close(self) -> None:
+        """Close the sessions the provider owns."""
+        ...
+
+
+class SharedClientSessionProvider:
+    """
+    This class is responsible for providing one `aiohttp.ClientSession` that can
+    be shared by many clients.
+
+    The session's connector caches DNS lookups and uses one shared SSL context,
+    so reconnects and additional shards don't resolve the gateway again or load
+    the certificate store again.
+
+    TLS sessions are not resumed. `asyncio` can't pass a saved `ssl.SSLSession`
+    to a new connection, so every connection still makes a full TLS handshake.
+    Only the connection pool and the SSL context are shared.
+
+    A session given to the provider is used as is and is never closed by it.
+    Otherwise the provider creates the session on first use, owns it and closes
+    it in `close`. A closed session is replaced on the next `get_session` call.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession | None = None,
+        ssl_context: ssl.SSLContext | None = None,
+        dns_cache_ttl: int | None = 300,
+        connection_limit: int = 0,
+    ) -> None:
+        """
+        Initialize the provider.
+
+        :param session: The session to provide. The provider creates and owns
+                        one if not given.
+        :param ssl_context: The SSL context to connect with. Defaults to the
+                            default context of the `ssl` module.
+        :param dns_cache_ttl: The seconds DNS lookups are cached for. `None`
+                              caches them forever.
+        :param connection_limit: The maximum number of simultaneous connections,
+                                 or 0 for no limit. Every shard keeps its
+                                 websocket connection open for as long as it
+                                 runs, so a limit must be at least the number
+                                 of shards sharing the session.
+        """
+        self.ssl_context = ssl_context
+        self.dns_cache_ttl = dns_cache_ttl
+        self.connection_limit = connection_limit
+        self._session = session
+        self._owns_session = session is None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the shared session, creating it if needed.
+
+        :return: The session.
+        """
+        if self._session is not None and (
+            not self._session.closed or not self._owns_session
+        ):
+            return self._session
+
+        if self.ssl_context is None:
+            self.ssl_context = ssl.create_default_context()
+
+        connector = aiohttp.TCPConnector(
+            limit=self.connection_limit,
+            ttl_dns_cache=self.dns_cache_ttl,
+            ssl=self.ssl_context,
+        )
+        self._session = aiohttp.ClientSession(connector=connector)
+
+        return self._session
+
+    async def close(self) -> None:
+        """Close the session if the provider owns it."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
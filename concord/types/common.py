@@ -13,7 +13,11 @@ __all__ = (
 )
 
 
-Snowflake: typing.TypeAlias = str
+Snowflake: typing.TypeAlias = str | int
+"""
+Snowflakes are sent as strings when using JSON encoding and as integers when
+using ETF encoding.
+"""
 Iso8601Timestamp: typing.TypeAlias = str
 UnparsedPermissionBitSet: typing.TypeAlias = str
 
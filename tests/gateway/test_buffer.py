@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import typing
+
+import pytest
+
+from concord.gateway.buffer import GatewayEventBuffer, OverflowPolicy
+from concord.gateway.types.receive import (
+    GatewayDispatchEventPayload,
+    GatewayReceiveOpcode,
+)
+
+
+def _event(
+    name: str, sequence: int, **data: typing.Any
+) -> GatewayDispatchEventPayload[typing.Any]:
+    return {"op": GatewayReceiveOpcode.DISPATCH, "d": data, "s": sequence, "t": name}
+
+
+async def _drain(
+    buffer: GatewayEventBuffer,
+) -> typing.List[GatewayDispatchEventPayload[typing.Any]]:
+    events = []
+
+    while len(buffer):
+        events.append(await buffer.get())
+        buffer.task_done()
+
+    return events
+
+
+def test_events_block_by_default() -> None:
+    async def run() -> None:
+        buffer = GatewayEventBuffer(maxsize=1)
+        await buffer.put(_event("MESSAGE_CREATE", 1))
+
+        put = asyncio.create_task(buffer.put(_event("MESSAGE_CREATE", 2)))
+        await asyncio.sleep(0)
+
+        assert not put.done()
+        assert (await buffer.get())["s"] == 1
+
+        await put
+
+        assert [event["s"] for event in await _drain(buffer)] == [2]
+        assert buffer.metrics.blocked == 1
+        assert buffer.metrics.dropped == 0
+
+    asyncio.run(run())
+
+
+def test_drop_oldest_keeps_blocking_events() -> None:
+    async def run() -> None:
+        buffer = GatewayEventBuffer(
+            maxsize=3, policies={"TYPING_START": OverflowPolicy.DROP_OLDEST}
+        )
+        await buffer.put(_event("MESSAGE_CREATE", 1))
+        await buffer.put(_event("TYPING_START", 2))
+        await buffer.put(_event("TYPING_START", 3))
+        await buffer.put(_event("GUILD_CREATE", 4))
+
+        assert [event["s"] for event in await _drain(buffer)] == [1, 3, 4]
+        assert buffer.metrics.dropped_by_event == {"TYPING_START": 1}
+
+    asyncio.run(run())
+
+
+def test_droppable_event_is_dropped_when_nothing_else_can_be() -> None:
+    async def run() -> None:
+        buffer = GatewayEventBuffer(
+            maxsize=1, policies={"TYPING_START": OverflowPolicy.DROP_OLDEST}
+        )
+        await buffer.put(_event("MESSAGE_CREATE", 1))
+        await buffer.put(_event("TYPING_START", 2))
+
+        assert [event["s"] for event in await _drain(buffer)] == [1]
+        assert buffer.metrics.dropped == 1
+
+    asyncio.run(run())
+
+
+def test_coalesce_replaces_queued_event_with_same_key() -> None:
+    async def run() -> None:
+        buffer = GatewayEventBuffer(
+            policies={"PRESENCE_UPDATE": OverflowPolicy.COALESCE}
+        )
+        await buffer.put(_event("PRESENCE_UPDATE", 1, guild_id="1", user={"id": "2"}))
+        await buffer.put(_event("PRESENCE_UPDATE", 2, guild_id="1", user={"id": "3"}))
+        await buffer.put(_event("PRESENCE_UPDATE", 3, guild_id="1", user={"id": "2"}))
+
+        assert [event["s"] for event in await _drain(buffer)] == [3, 2]
+        assert buffer.metrics.coalesced == 1
+
+    asyncio.run(run())
+
+
+def test_join_waits_for_handled_events() -> None:
+    async def run() -> None:
+        buffer = GatewayEventBuffer()
+        await buffer.put(_event("MESSAGE_CREATE", 1))
+        join = asyncio.create_task(buffer.join())
+
+        await buffer.get()
+        await asyncio.sleep(0)
+
+        assert not join.done()
+
+        buffer.task_done()
+        await join
+
+    asyncio.run(run())
+
+
+def test_drops_are_logged(caplog: pytest.LogCaptureFixture) -> None:
+    async def run() -> None:
+        buffer = GatewayEventBuffer(
+            maxsize=1, policies={"TYPING_START": OverflowPolicy.DROP_OLDEST}
+        )
+
+        for sequence in range(5):
+            await buffer.put(_event("TYPING_START", sequence))
+
+        assert buffer.metrics.dropped == 4
+
+    with caplog.at_level(logging.WARNING, "concord.gateway.buffer"):
+        asyncio.run(run())
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "Event buffer is full, dropped a TYPING_START event, 1 dropped in total"
+    ]
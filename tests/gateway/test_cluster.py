@@ -0,0 +1,80 @@
+import asyncio
+import functools
+import os
+import pathlib
+import typing
+
+from concord.gateway.cluster import ClusterWorker, ShardCluster
+from concord.gateway.intents import Intents
+
+TIMEOUT = 30.0
+
+_tasks: typing.Set[asyncio.Task[None]] = set()
+
+
+async def _double(source: int, data: int) -> int:
+    return data * 2
+
+
+async def _exit(source: int, data: int) -> int:
+    os._exit(1)
+
+
+async def _request(worker: ClusterWorker, result_path: str) -> None:
+    try:
+        result = repr(await worker.request(1, 21, timeout=TIMEOUT))
+    except Exception as e:
+        result = type(e).__name__
+
+    # Rename the written file so the test never reads it half written.
+    path = pathlib.Path(result_path)
+    path.with_suffix(".tmp").write_text(result)
+    path.with_suffix(".tmp").replace(path)
+
+
+def _setup(
+    request_handler: typing.Callable[[int, int], typing.Awaitable[int]],
+    result_path: str,
+    worker: ClusterWorker,
+) -> None:
+    if worker.cluster_id == 0:
+        task = asyncio.get_running_loop().create_task(_request(worker, result_path))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+    else:
+        worker.request_handler = request_handler
+
+
+async def _run_cluster(
+    request_handler: typing.Callable[[int, int], typing.Awaitable[int]],
+    result_path: pathlib.Path,
+) -> str:
+    # Clusters without shards never connect to the gateway.
+    cluster = ShardCluster(
+        Intents(),
+        shard_count=0,
+        cluster_count=2,
+        setup=functools.partial(_setup, request_handler, str(result_path)),
+    )
+    task = asyncio.create_task(cluster.start("token"))
+
+    async with asyncio.timeout(TIMEOUT):
+        while not result_path.exists():
+            await asyncio.sleep(0.05)
+
+        await cluster.stop()
+        await task
+
+    return result_path.read_text()
+
+
+def test_request_round_trip(tmp_path: pathlib.Path) -> None:
+    result = asyncio.run(_run_cluster(_double, tmp_path / "result"))
+
+    assert result == "42"
+
+
+def test_request_to_exited_worker_fails(tmp_path: pathlib.Path) -> None:
+    result = asyncio.run(_run_cluster(_exit, tmp_path / "result"))
+
+    assert result == "GatewayException"
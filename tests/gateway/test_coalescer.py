@@ -0,0 +1,132 @@
+import asyncio
+import typing
+
+from concord.gateway.coalescer import CoalesceMode, GatewayEventCoalescer
+from concord.gateway.receiver import GatewayMessageReceiver
+from concord.gateway.types.receive import GatewayEventPayload, GatewayReceiveOpcode
+
+WINDOW = 0.01
+
+
+class _Dispatcher:
+    def __init__(self) -> None:
+        self.payloads: typing.List[
+            GatewayEventPayload[GatewayReceiveOpcode, typing.Any]
+        ] = []
+
+    async def dispatch(
+        self, payload: GatewayEventPayload[GatewayReceiveOpcode, typing.Any]
+    ) -> None:
+        self.payloads.append(payload)
+
+
+def _event(
+    name: str, sequence: int, **data: typing.Any
+) -> GatewayEventPayload[GatewayReceiveOpcode, typing.Any]:
+    return {"op": GatewayReceiveOpcode.DISPATCH, "d": data, "s": sequence, "t": name}
+
+
+def _coalescer(
+    mode: CoalesceMode,
+) -> typing.Tuple[GatewayEventCoalescer, _Dispatcher]:
+    dispatcher = _Dispatcher()
+    coalescer = GatewayEventCoalescer(
+        asyncio.get_running_loop(),
+        dispatcher,
+        {"PRESENCE_UPDATE": mode},
+        window=WINDOW,
+    )
+
+    return coalescer, dispatcher
+
+
+def test_other_events_pass_through() -> None:
+    async def run() -> None:
+        coalescer, dispatcher = _coalescer(CoalesceMode.LATEST)
+        await coalescer.dispatch(_event("MESSAGE_CREATE", 1))
+        await coalescer.dispatch(
+            {"op": GatewayReceiveOpcode.HEARTBEAT_ACK, "d": None, "s": None, "t": None}
+        )
+
+        assert len(dispatcher.payloads) == 2
+        assert coalescer.pending == 0
+
+    asyncio.run(run())
+
+
+def test_latest_passes_on_latest_event_per_key() -> None:
+    async def run() -> None:
+        coalescer, dispatcher = _coalescer(CoalesceMode.LATEST)
+        await coalescer.dispatch(_event("PRESENCE_UPDATE", 1, user={"id": "1"}))
+        await coalescer.dispatch(_event("PRESENCE_UPDATE", 2, user={"id": "2"}))
+        await coalescer.dispatch(_event("PRESENCE_UPDATE", 3, user={"id": "1"}))
+
+        assert dispatcher.payloads == []
+        assert coalescer.pending == 2
+
+        await asyncio.sleep(WINDOW * 5)
+
+        assert [payload["s"] for payload in dispatcher.payloads] == [3, 2]
+        assert coalescer.metrics.coalesced == 1
+        assert coalescer.metrics.dispatched == 2
+
+    asyncio.run(run())
+
+
+def test_batch_passes_on_one_event() -> None:
+    async def run() -> None:
+        coalescer, dispatcher = _coalescer(CoalesceMode.BATCH)
+        await coalescer.dispatch(
+            _event("PRESENCE_UPDATE", 1, user={"id": "1"}, status="idle")
+        )
+        await coalescer.dispatch(_event("PRESENCE_UPDATE", 2, user={"id": "2"}))
+        await coalescer.dispatch(
+            _event("PRESENCE_UPDATE", 3, user={"id": "1"}, status="dnd")
+        )
+        await asyncio.sleep(WINDOW * 5)
+
+        assert dispatcher.payloads == [
+            {
+                "op": GatewayReceiveOpcode.DISPATCH,
+                "d": [{"user": {"id": "1"}, "status": "dnd"}, {"user": {"id": "2"}}],
+                "s": 3,
+                "t": "PRESENCE_UPDATE",
+            }
+        ]
+
+    asyncio.run(run())
+
+
+def test_flush_passes_on_pending_events() -> None:
+    async def run() -> None:
+        coalescer, dispatcher = _coalescer(CoalesceMode.LATEST)
+        await coalescer.dispatch(_event("PRESENCE_UPDATE", 1, user={"id": "1"}))
+        await coalescer.flush()
+
+        assert [payload["s"] for payload in dispatcher.payloads] == [1]
+
+        await asyncio.sleep(WINDOW * 5)
+
+        assert len(dispatcher.payloads) == 1
+
+    asyncio.run(run())
+
+
+def test_sequence_is_recorded_for_held_back_events() -> None:
+    async def run() -> None:
+        sequences: typing.List[int] = []
+        coalescer, dispatcher = _coalescer(CoalesceMode.LATEST)
+        receiver = GatewayMessageReceiver(
+            asyncio.get_running_loop(), on_sequence=sequences.append
+        )
+
+        await receiver._dispatch(
+            coalescer, _event("PRESENCE_UPDATE", 7, user={"id": "1"})
+        )
+
+        assert dispatcher.payloads == []
+        assert sequences == [7]
+
+        await coalescer.flush()
+
+    asyncio.run(run())
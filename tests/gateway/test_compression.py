@@ -0,0 +1,95 @@
+import typing
+import zlib
+
+import pytest
+
+from concord.gateway import compression
+from concord.gateway.compression import (
+    GatewayCompression,
+    ZlibStreamDecompressor,
+    ZstdStreamDecompressor,
+    get_decompressor_factory,
+)
+from concord.gateway.errors import GatewayException
+
+
+def _zlib_frames(*messages: bytes) -> typing.List[bytes]:
+    compressor = zlib.compressobj()
+
+    return [
+        compressor.compress(message) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        for message in messages
+    ]
+
+
+def _zstd_frames(*messages: bytes) -> typing.List[bytes]:
+    zstandard = pytest.importorskip("zstandard")
+    compressor = zstandard.ZstdCompressor().compressobj()
+
+    return [
+        compressor.compress(message)
+        + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        for message in messages
+    ]
+
+
+def test_zlib_stream_messages_share_one_context() -> None:
+    messages = [b'{"op":10}', b'{"op":11}', b'{"op":11}']
+    decompressor = ZlibStreamDecompressor()
+
+    frames = _zlib_frames(*messages)
+
+    assert [decompressor.decompress(frame) for frame in frames] == messages
+    # The repeated message is sent as a back reference into the shared context.
+    assert len(frames[2]) < len(messages[2])
+
+
+def test_zlib_stream_message_split_across_frames() -> None:
+    message = b'{"op":0,"d":"' + b"x" * 1000 + b'"}'
+    (frame,) = _zlib_frames(message)
+    decompressor = ZlibStreamDecompressor()
+
+    assert decompressor.decompress(frame[:10]) is None
+    assert decompressor.decompress(frame[10:-2]) is None
+    assert decompressor.decompress(frame[-2:]) == message
+
+
+def test_zlib_stream_is_the_default_backend() -> None:
+    factory = get_decompressor_factory(GatewayCompression.ZLIB_STREAM)
+
+    assert isinstance(factory(), ZlibStreamDecompressor)
+
+
+def test_zstd_stream_messages_share_one_context() -> None:
+    messages = [b'{"op":10}', b'{"op":11}' * 20, b'{"op":11}' * 20]
+    frames = _zstd_frames(*messages)
+    decompressor = ZstdStreamDecompressor()
+
+    assert [decompressor.decompress(frame) for frame in frames] == messages
+    assert len(frames[2]) < len(frames[1])
+
+
+def test_zstd_stream_incomplete_frame() -> None:
+    message = b'{"op":0,"d":"' + b"x" * 1000 + b'"}'
+    (frame,) = _zstd_frames(message)
+    decompressor = ZstdStreamDecompressor()
+
+    assert decompressor.decompress(frame[:4]) is None
+    assert decompressor.decompress(frame[4:]) == message
+
+
+def test_zstd_stream_backend() -> None:
+    pytest.importorskip("zstandard")
+    factory = get_decompressor_factory(GatewayCompression.ZSTD_STREAM)
+
+    assert isinstance(factory(), ZstdStreamDecompressor)
+
+
+def test_zstd_stream_requires_zstandard(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(compression, "HAS_ZSTANDARD", False)
+
+    with pytest.raises(GatewayException):
+        get_decompressor_factory(GatewayCompression.ZSTD_STREAM)
+
+    with pytest.raises(GatewayException):
+        ZstdStreamDecompressor()
@@ -0,0 +1,134 @@
+import struct
+import typing
+import zlib
+
+import pytest
+
+from concord.gateway import etf
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        0,
+        255,
+        256,
+        -1,
+        2**31 - 1,
+        -(2**31),
+        2**31,
+        -(2**31) - 1,
+        175928847299117063,
+        -(2**64),
+        1.5,
+        -0.25,
+        "",
+        "guild",
+        "héllo ✨",
+        None,
+        True,
+        False,
+        [],
+        [1, "two", 3.0, None],
+        {"op": 0, "s": 1, "t": "READY"},
+    ],
+)
+def test_round_trip(value: typing.Any) -> None:
+    assert etf.loads(etf.dumps(value)) == value
+
+
+def test_round_trip_nested_maps() -> None:
+    value = {
+        "op": 0,
+        "d": {
+            "guild_id": 175928847299117063,
+            "member": {"roles": [], "nick": None, "deaf": False},
+            "embeds": [{"title": "a", "fields": [{"inline": True}]}],
+        },
+    }
+
+    assert etf.loads(etf.dumps(value)) == value
+
+
+def test_tuples_are_encoded_as_lists() -> None:
+    assert etf.loads(etf.dumps((1, 2))) == [1, 2]
+
+
+def test_bytes_are_encoded_as_binaries() -> None:
+    assert etf.dumps(b"ab") == bytes([131, etf.BINARY_EXT, 0, 0, 0, 2]) + b"ab"
+    assert etf.loads(etf.dumps(b"ab")) == "ab"
+
+
+def test_integer_encodings() -> None:
+    assert etf.dumps(1)[1] == etf.SMALL_INTEGER_EXT
+    assert etf.dumps(-1)[1] == etf.INTEGER_EXT
+    assert etf.dumps(2**31)[1] == etf.SMALL_BIG_EXT
+    assert etf.dumps(1.0)[1] == etf.NEW_FLOAT_EXT
+
+
+def test_atoms() -> None:
+    assert etf.dumps(None) == b"\x83\x77\x03nil"
+    assert etf.loads(bytes([131, etf.ATOM_EXT, 0, 4]) + b"true") is True
+    assert etf.loads(bytes([131, etf.SMALL_ATOM_EXT, 5]) + b"false") is False
+    assert etf.loads(bytes([131, etf.ATOM_UTF8_EXT, 0, 5]) + b"guild") == "guild"
+
+
+def test_string_ext_decodes_to_integers() -> None:
+    assert etf.loads(bytes([131, etf.STRING_EXT, 0, 2, 0, 1])) == [0, 1]
+    assert etf.loads(bytes([131, etf.STRING_EXT, 0, 0])) == []
+
+
+def test_large_big_ext() -> None:
+    data = bytes([131, etf.LARGE_BIG_EXT, 0, 0, 0, 2, 1, 0, 1])
+
+    assert etf.loads(data) == -256
+
+
+def test_tuple_ext() -> None:
+    data = bytes([131, etf.SMALL_TUPLE_EXT, 2, etf.SMALL_INTEGER_EXT, 1])
+    data += bytes([etf.SMALL_ATOM_UTF8_EXT, 3]) + b"nil"
+
+    assert etf.loads(data) == [1, None]
+
+
+def test_improper_list_keeps_its_tail() -> None:
+    data = bytes([131, etf.LIST_EXT, 0, 0, 0, 1, etf.SMALL_INTEGER_EXT, 1])
+    data += bytes([etf.SMALL_INTEGER_EXT, 2])
+
+    assert etf.loads(data) == [1, 2]
+
+
+def test_float_ext() -> None:
+    data = bytes([131, etf.FLOAT_EXT]) + b"1.5".ljust(31, b"\x00")
+
+    assert etf.loads(data) == 1.5
+
+
+def test_compressed() -> None:
+    term = etf.dumps({"d": "x" * 100})[1:]
+    data = bytes([131, etf.COMPRESSED]) + struct.pack(">I", len(term))
+
+    assert etf.loads(data + zlib.compress(term)) == {"d": "x" * 100}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        bytes([130, etf.NIL_EXT]),
+        bytes([131, etf.BINARY_EXT, 0, 0]),
+        bytes([131, etf.NIL_EXT, etf.NIL_EXT]),
+        bytes([131, 1]),
+    ],
+)
+def test_invalid_data(data: bytes) -> None:
+    with pytest.raises(ValueError):
+        etf.loads(data)
+
+
+def test_unserializable_object() -> None:
+    with pytest.raises(TypeError):
+        etf.dumps(object())
+
+    with pytest.raises(TypeError):
+        etf.dumps(2**2048)
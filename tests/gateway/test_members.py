@@ -0,0 +1,79 @@
+import asyncio
+
+from concord.gateway.errors import GatewayConnectionException
+from concord.gateway.members import GatewayMemberChunkRouter
+from concord.gateway.types.receive import (
+    GatewayGuildMembersChunkEventPayload,
+    GatewayGuildMembersChunkEventPayloadData,
+    GatewayReceiveOpcode,
+)
+
+
+def _chunk(nonce: str | None, index: int) -> GatewayGuildMembersChunkEventPayload:
+    data = GatewayGuildMembersChunkEventPayloadData(
+        guild_id="1", members=[], chunk_index=index, chunk_count=2
+    )
+
+    if nonce is not None:
+        data["nonce"] = nonce
+
+    return {
+        "op": GatewayReceiveOpcode.DISPATCH,
+        "d": data,
+        "s": 1,
+        "t": "GUILD_MEMBERS_CHUNK",
+    }
+
+
+def test_chunks_are_routed_by_nonce() -> None:
+    async def run() -> None:
+        router = GatewayMemberChunkRouter()
+        (first_nonce, first) = router.open()
+        (second_nonce, second) = router.open()
+
+        assert first_nonce != second_nonce
+
+        await router.route(_chunk(second_nonce, 0))
+        await router.route(_chunk(first_nonce, 0))
+        await router.route(_chunk(second_nonce, 1))
+
+        assert first.get_nowait() == _chunk(first_nonce, 0)["d"]
+        assert first.empty()
+        assert [second.get_nowait(), second.get_nowait()] == [
+            _chunk(second_nonce, 0)["d"],
+            _chunk(second_nonce, 1)["d"],
+        ]
+
+    asyncio.run(run())
+
+
+def test_unknown_and_closed_nonces_are_ignored() -> None:
+    async def run() -> None:
+        router = GatewayMemberChunkRouter()
+        (nonce, chunks) = router.open()
+        router.close(nonce)
+
+        await router.route(_chunk(nonce, 0))
+        await router.route(_chunk(None, 0))
+        await router.route(_chunk("unknown", 0))
+
+        assert chunks.empty()
+        assert len(router) == 0
+
+    asyncio.run(run())
+
+
+def test_fail_all_fails_open_requests() -> None:
+    async def run() -> None:
+        router = GatewayMemberChunkRouter()
+        (_, first) = router.open()
+        (_, second) = router.open()
+        exception = GatewayConnectionException("Gateway connection lost")
+
+        router.fail_all(exception)
+
+        assert first.get_nowait() is exception
+        assert second.get_nowait() is exception
+        assert len(router) == 0
+
+    asyncio.run(run())
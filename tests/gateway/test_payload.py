@@ -0,0 +1,111 @@
+import json
+import pickle
+
+import pytest
+
+from concord.gateway import etf
+from concord.gateway.codec import (
+    EtfCodec,
+    GatewayCodec,
+    JsonCodec,
+    MsgspecCodec,
+    OrjsonCodec,
+)
+from concord.gateway.payload import GatewayPayloadDecoder, LazyPayload
+
+MESSAGE = '{"t":"MESSAGE_CREATE","s":42,"op":0,"d":{"id":"1","content":"\\"s\\":1}"}}'
+
+
+def _codec(name: str) -> GatewayCodec:
+    if name == "orjson":
+        pytest.importorskip("orjson")
+        return OrjsonCodec()
+
+    if name == "msgspec":
+        pytest.importorskip("msgspec")
+        return MsgspecCodec()
+
+    return JsonCodec()
+
+
+@pytest.fixture(params=["json", "orjson", "msgspec"])
+def codec(request: pytest.FixtureRequest) -> GatewayCodec:
+    return _codec(request.param)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        MESSAGE,
+        '{"op":0,"d":{"id":"1","content":"\\"s\\":1}"},"s":42,"t":"MESSAGE_CREATE"}',
+    ],
+)
+def test_envelope_is_decoded_without_data(codec: GatewayCodec, data: str) -> None:
+    for raw in (data, data.encode()):
+        payload = GatewayPayloadDecoder(codec).decode(raw)
+
+        assert isinstance(payload, LazyPayload)
+        assert (payload["op"], payload["s"], payload["t"]) == (0, 42, "MESSAGE_CREATE")
+        assert "d" in payload
+        assert not payload.decoded
+
+        assert payload["d"] == {"id": "1", "content": '"s":1}'}
+        assert payload.decoded
+
+
+def test_null_envelope(codec: GatewayCodec) -> None:
+    payload = GatewayPayloadDecoder(codec).decode(
+        '{"t":null,"s":null,"op":11,"d":null}'
+    )
+
+    assert (payload["op"], payload["s"], payload["t"]) == (11, None, None)
+    assert payload.get("d") is None
+
+
+def test_unrecognized_shapes_are_decoded_fully() -> None:
+    decoder = GatewayPayloadDecoder(JsonCodec())
+
+    assert decoder.decode('{"op":11}') == {"op": 11}
+    assert decoder.decode('{ "op": 1, "d": 3 }') == {"op": 1, "d": 3}
+
+
+def test_etf_payloads_are_decoded_fully() -> None:
+    data = etf.dumps({"op": 0, "d": {"a": 1}, "s": 1, "t": "X"})
+    payload = GatewayPayloadDecoder(EtfCodec()).decode(data)
+
+    assert type(payload) is dict
+    assert payload["d"] == {"a": 1}
+
+
+def test_using_the_payload_as_a_whole_decodes_data() -> None:
+    payload = GatewayPayloadDecoder(JsonCodec()).decode(MESSAGE)
+
+    assert len(payload) == 4
+    assert payload.decoded
+    assert dict(payload) == json.loads(MESSAGE)
+    assert payload == json.loads(MESSAGE)
+    assert payload.copy() == json.loads(MESSAGE)
+
+
+def test_pickle() -> None:
+    payload = GatewayPayloadDecoder(JsonCodec()).decode(MESSAGE)
+
+    assert pickle.loads(pickle.dumps(payload)) == json.loads(MESSAGE)
+
+
+@pytest.mark.parametrize("encoder", ["json", "orjson", "msgspec", "etf"])
+def test_encode_received_payload(codec: GatewayCodec, encoder: str) -> None:
+    payload = GatewayPayloadDecoder(codec).decode(MESSAGE)
+    encoding_codec = EtfCodec() if encoder == "etf" else _codec(encoder)
+
+    assert not payload.decoded
+
+    encoded = encoding_codec.encode({"op": 0, "d": [payload]})
+
+    assert encoding_codec.decode(encoded) == {"op": 0, "d": [json.loads(MESSAGE)]}
+    assert encoding_codec.decode(encoding_codec.encode(payload)) == json.loads(MESSAGE)
+
+
+def test_encode_unsupported_object(codec: GatewayCodec) -> None:
+    with pytest.raises(TypeError):
+        codec.encode({"d": object()})
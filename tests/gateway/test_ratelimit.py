@@ -0,0 +1,66 @@
+import types
+
+import pytest
+
+from concord.gateway import ratelimit
+from concord.gateway.ratelimit import GatewaySendRateLimiter
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(ratelimit, "time", types.SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_sends_within_limit_are_not_delayed(clock: _Clock) -> None:
+    limiter = GatewaySendRateLimiter(limit=3, per=10.0, reserved=1)
+
+    assert limiter.delay() == 0.0
+
+    limiter.record()
+
+    assert limiter.delay() == 0.0
+    assert limiter.remaining == 2
+
+
+def test_reserved_sends_are_kept_for_reserved_traffic(clock: _Clock) -> None:
+    limiter = GatewaySendRateLimiter(limit=3, per=10.0, reserved=1)
+    limiter.record()
+    clock.now += 1.0
+    limiter.record()
+    clock.now += 1.0
+
+    assert limiter.delay() == pytest.approx(8.0)
+    assert limiter.delay(reserved=True) == 0.0
+
+    limiter.record()
+
+    assert limiter.delay(reserved=True) == pytest.approx(8.0)
+    assert limiter.remaining == 0
+
+
+def test_window_slides(clock: _Clock) -> None:
+    limiter = GatewaySendRateLimiter(limit=2, per=10.0, reserved=0)
+    limiter.record()
+    clock.now += 5.0
+    limiter.record()
+
+    assert limiter.delay() == pytest.approx(5.0)
+
+    clock.now += 5.0
+
+    assert limiter.delay() == 0.0
+    assert limiter.remaining == 1
+
+    clock.now += 5.0
+
+    assert limiter.remaining == 2
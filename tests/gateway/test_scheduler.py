@@ -0,0 +1,113 @@
+import asyncio
+import types
+import typing
+
+import pytest
+
+from concord.gateway import scheduler
+from concord.gateway.scheduler import GatewayMessageScheduler, MessagePriority
+from concord.gateway.types.send import GatewayHeartbeatMessage
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(scheduler, "time", types.SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def _message(data: int) -> GatewayHeartbeatMessage:
+    return GatewayHeartbeatMessage(data=data)
+
+
+def _drain(queue: GatewayMessageScheduler) -> typing.List[int | None]:
+    sent = []
+
+    while (entry := queue.get_nowait()) is not None:
+        sent.append(entry.message.data)
+
+    return sent
+
+
+def test_priorities_and_fifo_order(clock: _Clock) -> None:
+    queue = GatewayMessageScheduler()
+    queue.put(_message(1), MessagePriority.LOW)
+    queue.put(_message(2), MessagePriority.MEDIUM)
+    queue.put(_message(3), MessagePriority.MEDIUM)
+    queue.put(_message(4), MessagePriority.EMERGENCY)
+
+    assert len(queue) == 4
+    assert _drain(queue) == [4, 2, 3, 1]
+
+
+def test_aging_promotes_waiting_messages(clock: _Clock) -> None:
+    queue = GatewayMessageScheduler(aging_interval=5.0)
+    queue.put(_message(1), MessagePriority.LOW)
+    clock.now += 5.0
+    queue.put(_message(2), MessagePriority.MEDIUM)
+
+    # The low priority message has aged to medium and was queued first.
+    assert _drain(queue) == [1, 2]
+
+
+def test_aging_never_reaches_emergency(clock: _Clock) -> None:
+    queue = GatewayMessageScheduler(aging_interval=5.0)
+    queue.put(_message(1), MessagePriority.LOW)
+    clock.now += 60.0
+    queue.put(_message(2), MessagePriority.EMERGENCY)
+    queue.put(_message(3), MessagePriority.HIGH)
+
+    assert _drain(queue) == [2, 1, 3]
+
+
+def test_aging_can_be_disabled(clock: _Clock) -> None:
+    queue = GatewayMessageScheduler(aging_interval=None)
+    queue.put(_message(1), MessagePriority.LOW)
+    clock.now += 60.0
+    queue.put(_message(2), MessagePriority.MEDIUM)
+
+    assert _drain(queue) == [2, 1]
+
+
+def test_quota_drops_oldest_message(clock: _Clock) -> None:
+    queue = GatewayMessageScheduler(quotas={MessagePriority.LOW: 2})
+
+    for data in range(4):
+        queue.put(_message(data), MessagePriority.LOW)
+
+    assert _drain(queue) == [2, 3]
+    assert queue.dropped == 2
+
+
+def test_expired_messages_are_dropped(clock: _Clock) -> None:
+    queue = GatewayMessageScheduler()
+    queue.put(_message(1), ttl=1.0)
+    queue.put(_message(2), ttl=10.0)
+    queue.put(_message(3))
+    clock.now += 5.0
+
+    assert _drain(queue) == [2, 3]
+    assert queue.expired == 1
+
+
+def test_get_waits_for_a_message() -> None:
+    async def run() -> None:
+        queue = GatewayMessageScheduler()
+        get = asyncio.create_task(queue.get())
+        await asyncio.sleep(0)
+
+        assert not get.done()
+
+        queue.put(_message(1))
+
+        assert (await get).message.data == 1
+
+    asyncio.run(run())
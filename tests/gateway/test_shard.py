@@ -0,0 +1,46 @@
+import asyncio
+import typing
+
+import pytest
+
+from concord.gateway.intents import Intents
+from concord.gateway.shard import ShardManager
+from concord.gateway.types.receive import (
+    GatewayDispatchEventPayload,
+    GatewayReceiveOpcode,
+)
+
+
+async def _start(token: str) -> None:
+    pass
+
+
+def test_restart_forwards_each_event_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def run() -> typing.List[str]:
+        manager = ShardManager(Intents(), shard_count=2)
+        received: typing.List[str] = []
+
+        async def on_message(payload: GatewayDispatchEventPayload[typing.Any]) -> None:
+            received.append(payload["t"])
+
+        manager.dispatcher.register_event_handler("MESSAGE_CREATE", on_message)
+
+        for client in manager.clients.values():
+            monkeypatch.setattr(client, "start", _start)
+
+        await manager.start("token")
+        await manager.start("token")
+
+        await manager.clients[1].dispatcher.dispatch(
+            {
+                "op": GatewayReceiveOpcode.DISPATCH,
+                "d": {},
+                "s": 1,
+                "t": "MESSAGE_CREATE",
+            }
+        )
+        await manager.stop()
+
+        return received
+
+    assert asyncio.run(run()) == ["MESSAGE_CREATE"]